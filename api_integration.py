@@ -1,86 +1,222 @@
+import asyncio
 import requests
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from cachetools import TTLCache, LRUCache
+from requests.adapters import HTTPAdapter
+from tenacity import Retrying, retry_if_exception_type, stop_after_attempt, wait_exponential
+from fixtures import fixture_keys
+from instrumentation import count, profile_analysis, timed
+from rating_engine import TeamRatingEngine
+
+# Tekrar denenecek HTTP durum kodları
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class RetryableStatusError(requests.HTTPError):
+    """Geçici sunucu hatası, istek tekrar denenebilir"""
 
 class SportsDataCollector:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, base_url=None, timeout=(3.05, 10), max_retries=3,
+                 retry_backoff=0.5, cache_ttl=300, cache_size=1024, pool_maxsize=20,
+                 conditional_requests=True, store=None, store_max_age=3600):
         self.api_key = api_key
+        # Kalıcı yerel depo (KuponDataStore); varsa önce buradan okunur
+        self.store = store
+        self.store_max_age = store_max_age
+        # Sezon boyunca gelen sonuçlarla güncellenen derecelendirmeler
+        self.rating_engine = TeamRatingEngine()
+        self._rating_lock = threading.Lock()
         # Ücretsiz API'ler
         self.apis = {
-            'football_data': 'https://api.football-data.org/v4/',
+            'football_data': base_url or 'https://api.football-data.org/v4/',
             'sport_api': 'https://v3.football.api-sports.io/',
             'rapid_api': 'https://api-football-v1.p.rapidapi.com/v3/'
         }
         
+        # Bağlantıları yeniden kullanan oturum
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.apis), pool_maxsize=pool_maxsize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        if api_key:
+            self.session.headers['X-Auth-Token'] = api_key
+        
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.conditional_requests = conditional_requests
+        
+        # (endpoint, params) -> yanıt; süresi dolan kayıtlar ETag ile yeniden doğrulanır
+        self._cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self._validators = LRUCache(maxsize=cache_size)
+        self._cache_lock = threading.Lock()
+        self.cache_stats = {'hits': 0, 'misses': 0, 'not_modified': 0}
+    
+    def _cache_key(self, endpoint, params):
+        return endpoint, tuple(sorted((params or {}).items()))
+    
+    def _request(self, url, params, headers):
+        """Tek bir GET isteği; geçici hatalarda RetryableStatusError fırlatır"""
+        response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+        if response.status_code in RETRY_STATUS_CODES:
+            raise RetryableStatusError(f"HTTP {response.status_code}: {url}", response=response)
+        return response
+    
+    def _get_json(self, endpoint, params=None, api='football_data'):
+        """Önbellekli, tekrar denemeli GET; başarısız yanıtlarda None döner"""
+        key = self._cache_key(endpoint, params)
+        
+        with self._cache_lock:
+            if key in self._cache:
+                self.cache_stats['hits'] += 1
+                count('http_cache', result='hit')
+                return self._cache[key]
+            self.cache_stats['misses'] += 1
+            validator = self._validators.get(key)
+        count('http_cache', result='miss')
+        
+        # Koşullu istek: veri değişmediyse sunucu 304 döner
+        headers = {}
+        if self.conditional_requests and validator:
+            if validator['etag']:
+                headers['If-None-Match'] = validator['etag']
+            if validator['last_modified']:
+                headers['If-Modified-Since'] = validator['last_modified']
+        
+        retrying = Retrying(
+            stop=stop_after_attempt(self.max_retries),
+            wait=wait_exponential(multiplier=self.retry_backoff, max=10),
+            retry=retry_if_exception_type((requests.ConnectionError, requests.Timeout, RetryableStatusError)),
+            reraise=True
+        )
+        with timed('http_fetch', api=api):
+            response = retrying(self._request, f"{self.apis[api]}{endpoint}", params, headers)
+        
+        if response.status_code == 304 and validator:
+            data = validator['data']
+            with self._cache_lock:
+                self.cache_stats['not_modified'] += 1
+            count('http_cache', result='not_modified')
+        elif response.status_code == 200:
+            data = response.json()
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if etag or last_modified:
+                with self._cache_lock:
+                    self._validators[key] = {'etag': etag, 'last_modified': last_modified, 'data': data}
+        else:
+            return None
+        
+        with self._cache_lock:
+            self._cache[key] = data
+        return data
+    
     def get_team_stats(self, team_name, league_id=203):  # 203 = Süper Lig
-        """Takım istatistiklerini çek"""
+        """Takım istatistiklerini çek
+
+        record_results ile sonuçları işlenmiş takımlar motordan okunur; API
+        geçmişinden yeniden hesaplama yalnızca motorun tanımadığı takımlar içindir.
+        """
+        with self._rating_lock:
+            if self.rating_engine.has_ratings(team_name):
+                count('rating_engine', result='hit')
+                return self.rating_engine.ratings(team_name)
+        
+        if self.store is not None:
+            stored = self.store.get_team_ratings(team_name, max_age=self.store_max_age)
+            if stored:
+                count('store', result='hit')
+                return {key: stored[key] for key in ('attack', 'defense', 'form')}
+            count('store', result='miss')
+        
         try:
-            # Örnek API çağrısı (football-data.org)
-            headers = {'X-Auth-Token': self.api_key} if self.api_key else {}
-            
-            # Son 10 maç verisi
-            url = f"{self.apis['football_data']}teams/{team_name}/matches"
-            params = {
+            # Son 10 maç verisi (football-data.org)
+            data = self._get_json(f"teams/{team_name}/matches", {
                 'limit': 10,
                 'status': 'FINISHED'
-            }
+            })
             
-            response = requests.get(url, headers=headers, params=params)
-            
-            if response.status_code == 200:
-                data = response.json()
-                return self.process_team_data(data)
-            else:
-                # API hatası durumunda varsayılan değerler
-                return self.get_default_stats(team_name)
+            if data is not None:
+                matches = self.parse_api_matches(data)
+                stats = self._rate_matches(matches, team_name)
+                if stats is not None:
+                    if self.store is not None:
+                        self.store.add_matches(matches)
+                        self.store.upsert_team_ratings(team_name, stats)
+                    return stats
                 
         except Exception as e:
             print(f"API Hatası: {e}")
-            return self.get_default_stats(team_name)
+        
+        # API hatası veya boş yanıtta depodaki eski kayıt, o da yoksa varsayılan
+        # değerler (varsayılanlar depoya yazılmaz)
+        return self.get_fallback_stats(team_name)
+    
+    def get_fallback_stats(self, team_name):
+        """API'ye ulaşılamadığında kullanılacak istatistikler"""
+        if self.store is not None:
+            stored = self.store.get_team_ratings(team_name)
+            if stored:
+                return {key: stored[key] for key in ('attack', 'defense', 'form')}
+        return self.get_default_stats(team_name)
     
-    def process_team_data(self, raw_data):
+    def parse_api_matches(self, raw_data):
+        """API yanıtındaki bitmiş maçları depo formatına çevir"""
+        parsed = []
+        for match in raw_data.get('matches', []):
+            full_time = match.get('score', {}).get('fullTime', {})
+            if full_time.get('home') is None or full_time.get('away') is None:
+                continue
+            parsed.append({
+                'league': match.get('competition', {}).get('name', ''),
+                'match_date': match.get('utcDate', '')[:10],
+                'home_team': match['homeTeam']['name'],
+                'away_team': match['awayTeam']['name'],
+                'home_goals': full_time['home'],
+                'away_goals': full_time['away']
+            })
+        return parsed
+    
+    def process_team_data(self, raw_data, team_name=None):
         """Ham veriyi işle"""
-        matches = raw_data.get('matches', [])
-        
+        stats = self._rate_matches(self.parse_api_matches(raw_data), team_name)
+        return stats or {'attack': 5.0, 'defense': 5.0, 'form': 5.0}
+    
+    def _rate_matches(self, matches, team_name=None):
+        """Maç listesinden takım değerleri; maç yoksa None"""
         if not matches:
-            return {'attack': 5.0, 'defense': 5.0, 'form': 5.0}
+            return None
         
-        goals_scored = []
-        goals_conceded = []
-        results = []
+        # API maçları yeniden eskiye döndürür, motor eskiden yeniye bekler
+        matches = sorted(matches, key=lambda match: match['match_date'])
+        engine = TeamRatingEngine()
+        engine.update_many(matches)
         
-        for match in matches:
-            home_team = match['homeTeam']['name']
-            away_team = match['awayTeam']['name']
-            home_score = match['score']['fullTime']['home']
-            away_score = match['score']['fullTime']['away']
-            
-            # Hangi takım olduğunu belirle
-            if home_team in match:  # Basitleştirilmiş kontrol
-                goals_scored.append(home_score)
-                goals_conceded.append(away_score)
-                if home_score > away_score:
-                    results.append('W')
-                elif home_score < away_score:
-                    results.append('L')
-                else:
-                    results.append('D')
-        
-        # İstatistikleri hesapla
-        attack_rating = sum(goals_scored) / len(goals_scored) * 2 if goals_scored else 5.0
-        defense_rating = 10 - (sum(goals_conceded) / len(goals_conceded) * 2) if goals_conceded else 5.0
-        
-        # Form hesapla (son 5 maç)
-        recent_results = results[-5:]
-        wins = recent_results.count('W')
-        draws = recent_results.count('D')
-        form_rating = (wins * 3 + draws * 1) / (len(recent_results) * 3) * 10
+        # Takım adı verilmemişse veya API farklı yazıyorsa (ör. "Fenerbahce" /
+        # "Fenerbahçe SK") yanıttaki tüm maçlarda geçen takım kullanılır
+        if team_name is None or not engine.has_ratings(team_name):
+            appearances = {}
+            for match in matches:
+                for team in (match['home_team'], match['away_team']):
+                    appearances[team] = appearances.get(team, 0) + 1
+            team_name = max(appearances, key=appearances.get)
+        return engine.ratings(team_name)
+    
+    def record_results(self, matches):
+        """Yeni bitmiş maçları artımlı olarak derecelendirmelere işle"""
+        with self._rating_lock:
+            self.rating_engine.update_many(matches)
         
-        return {
-            'attack': min(10, max(1, attack_rating)),
-            'defense': min(10, max(1, defense_rating)),
-            'form': min(10, max(1, form_rating))
-        }
+        if self.store is not None:
+            self.store.add_matches(matches)
+            team_leagues = {}
+            for match in matches:
+                team_leagues[match['home_team']] = match.get('league', '')
+                team_leagues[match['away_team']] = match.get('league', '')
+            for team, league in team_leagues.items():
+                self.store.upsert_team_ratings(team, self.rating_engine.ratings(team), league)
     
     def get_default_stats(self, team_name):
         """Varsayılan takım istatistikleri"""
@@ -97,6 +233,11 @@ class SportsDataCollector:
     
     def get_head_to_head(self, team1, team2):
         """İki takım arasındaki geçmiş karşılaşmalar"""
+        if self.store is not None:
+            h2h = self.store.head_to_head(team1, team2)
+            if h2h:
+                return h2h
+        
         # Bu fonksiyon API'den son karşılaşmaları çeker
         # Şimdilik basit bir örnek
         return {
@@ -109,6 +250,11 @@ class SportsDataCollector:
     
     def get_current_odds(self, match_info):
         """Güncel bahis oranları"""
+        if self.store is not None:
+            odds = self.store.latest_odds(match_info['home'], match_info['away'])
+            if odds:
+                return odds
+        
         # Bahis sitelerinden oran çekme (dikkat: yasal durumu kontrol edin)
         # Örnek veri
         return {
@@ -119,9 +265,74 @@ class SportsDataCollector:
             'under_2_5': 2.0
         }
 
+class AsyncSportsDataCollector:
+    """SportsDataCollector için asyncio arayüzü
+
+    İstekler ortak oturumu kullanan, max_concurrency iş parçacıklı ayrı bir
+    havuzda çalışır (loop'un varsayılan havuzu küçük makinelerde daha dardır);
+    aynı anda uçuşta olan istek sayısı semafor ile sınırlanır. İş bitince
+    close() çağrılmalı veya `with` bloğu kullanılmalıdır.
+    """
+    
+    def __init__(self, collector=None, max_concurrency=16):
+        self.collector = collector or SportsDataCollector(pool_maxsize=max_concurrency)
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+        self._executor = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+    
+    async def _run(self, func, *args):
+        # Semafor çalışan event loop'a bağlı olduğundan ilk kullanımda oluşturulur
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        async with self._semaphore:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+    
+    async def get_team_stats(self, team_name, league_id=203):
+        return await self._run(self.collector.get_team_stats, team_name, league_id)
+    
+    async def get_head_to_head(self, team1, team2):
+        return await self._run(self.collector.get_head_to_head, team1, team2)
+    
+    async def get_current_odds(self, match_info):
+        return await self._run(self.collector.get_current_odds, match_info)
+    
+    async def fetch_kupon_data(self, matches):
+        """Kupondaki tüm takım, h2h ve oran verilerini eşzamanlı çek
+
+        Birden fazla maçta geçen takımlar ve tekrar eden eşleşmeler bir kez çekilir.
+        """
+        keys = fixture_keys(matches)
+        teams = list(dict.fromkeys(team for home, away, _ in keys for team in (home, away)))
+        pairs = list(dict.fromkeys((home, away) for home, away, _ in keys))
+        
+        results = await asyncio.gather(
+            *(self.get_team_stats(team) for team in teams),
+            *(self.get_head_to_head(home, away) for home, away in pairs),
+            *(self.get_current_odds({'home': home, 'away': away}) for home, away in pairs)
+        )
+        
+        team_stats = dict(zip(teams, results[:len(teams)]))
+        h2h = dict(zip(pairs, results[len(teams):len(teams) + len(pairs)]))
+        odds = dict(zip(pairs, results[len(teams) + len(pairs):]))
+        
+        return team_stats, h2h, odds
+
 class EnhancedKuponAnalyzer:
-    def __init__(self, api_key=None):
-        self.data_collector = SportsDataCollector(api_key)
+    def __init__(self, api_key=None, data_collector=None):
+        self.data_collector = data_collector or SportsDataCollector(api_key)
         
     def analyze_match_with_api(self, home_team, away_team, bet_type="1X2"):
         """API verisi ile gelişmiş maç analizi"""
@@ -136,6 +347,41 @@ class EnhancedKuponAnalyzer:
         # Bahis oranları
         odds = self.data_collector.get_current_odds({'home': home_team, 'away': away_team})
         
+        return self.analyze_match_data(home_team, away_team, home_stats, away_stats, h2h, odds, bet_type)
+    
+    async def analyze_kupon_async(self, matches, max_concurrency=16):
+        """Kupondaki tüm maçların verisini eşzamanlı çekip analiz et"""
+        with AsyncSportsDataCollector(self.data_collector, max_concurrency) as async_collector, \
+                timed('kupon_fetch'):
+            team_stats, h2h, odds = await async_collector.fetch_kupon_data(matches)
+        
+        results = []
+        total_confidence = 1.0
+        
+        for home_team, away_team, bet_type in fixture_keys(matches):
+            result = self.analyze_match_data(
+                home_team, away_team,
+                team_stats[home_team], team_stats[away_team],
+                h2h[(home_team, away_team)], odds[(home_team, away_team)],
+                bet_type
+            )
+            results.append(result)
+            total_confidence *= result['confidence'] / 100
+        
+        return {
+            'matches': results,
+            'kupon_confidence': round(total_confidence * 100, 2),
+            'total_matches': len(matches)
+        }
+    
+    def analyze_kupon(self, matches, max_concurrency=16):
+        """analyze_kupon_async için senkron sarmalayıcı"""
+        with profile_analysis('analyze_kupon_api'), timed('analyze_kupon', analyzer='api'):
+            return asyncio.run(self.analyze_kupon_async(matches, max_concurrency))
+    
+    def analyze_match_data(self, home_team, away_team, home_stats, away_stats, h2h, odds, bet_type="1X2"):
+        """Önceden çekilmiş verilerle maç analizi"""
+        
         # Gelişmiş analiz
         home_strength = (home_stats['attack'] + home_stats['defense'] + home_stats['form']) / 3
         away_strength = (away_stats['attack'] + away_stats['defense'] + away_stats['form']) / 3
@@ -152,16 +398,15 @@ class EnhancedKuponAnalyzer:
         
         home_strength *= h2h_factor
         
-        # Oran analizi (value betting)
-        implied_prob_home = 1 / odds['1']
-        calculated_prob_home = home_strength / (home_strength + away_strength)
-        
-        value = calculated_prob_home - implied_prob_home
-        
         # Tahmin
         strength_diff = home_strength - away_strength
         
         if bet_type == "1X2":
+            # Oran analizi (value betting)
+            implied_prob_home = 1 / odds['1']
+            calculated_prob_home = home_strength / (home_strength + away_strength)
+            value = calculated_prob_home - implied_prob_home
+            
             if strength_diff > 1.0 and value > 0.1:
                 prediction = "1"
                 confidence = min(85, 65 + (strength_diff * 8))
@@ -171,6 +416,22 @@ class EnhancedKuponAnalyzer:
             else:
                 prediction = "X"
                 confidence = 45 + (5 - abs(strength_diff))
+            recommended_odd = odds.get(prediction.lower(), odds.get(prediction, 0))
+        
+        # Alt/Üst 2.5 gol analizi (KuponAnalyzer ile aynı eşik)
+        elif bet_type == "O/U2.5":
+            total_attack = (home_stats['attack'] + away_stats['attack']) / 2
+            calculated_prob_over = min(0.95, max(0.05, 0.5 + (total_attack - 7.5) / 10))
+            if total_attack > 7.5:
+                prediction, odd_key, calculated_prob = "Üst 2.5", 'over_2_5', calculated_prob_over
+            else:
+                prediction, odd_key, calculated_prob = "Alt 2.5", 'under_2_5', 1 - calculated_prob_over
+            confidence = min(75, 50 + abs(total_attack - 7.5) * 10)
+            recommended_odd = odds.get(odd_key, 0)
+            value = calculated_prob - 1 / recommended_odd if recommended_odd else 0.0
+        
+        else:
+            raise ValueError(f"Bilinmeyen bahis türü: {bet_type}")
         
         return {
             'home_team': home_team,
@@ -179,7 +440,7 @@ class EnhancedKuponAnalyzer:
             'confidence': round(confidence, 1),
             'value_bet': value > 0.05,
             'odds_analysis': {
-                'recommended_odd': odds.get(prediction.lower(), odds.get(prediction, 0)),
+                'recommended_odd': recommended_odd,
                 'value_score': round(value, 3)
             },
             'factors': {
@@ -0,0 +1,283 @@
+# backtest.py
+"""Analizciler için akışlı walk-forward backtest
+
+Tarihsel maçlar zaman sırasıyla maç günü maç günü oynatılır: her gün önce
+maç öncesi özellikler hesaplanır, strateji tahmin yapar, tahminler oranlarla
+sonuçlandırılır ve ardından strateji o günün sonuçlarıyla güncellenir.
+Sonuçlar maç günü başına üretilir (generator), böylece bellek geçmişin
+uzunluğuyla büyümez. Farklı zaman dilimleri ve stratejiler paralel çalışır.
+"""
+import json
+import os
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+from api_integration import EnhancedKuponAnalyzer
+from ingest import MatchFeatureBuilder, iter_match_chunks
+from kupon_mvp import KuponAnalyzer
+from ml_algorithm import FeatureWindow, MLKuponAnalyzer, TrainingConfig
+from value_scanner import MARKET_LABELS, ODDS_COLUMNS
+
+# Market sütunları: 1, X, 2, Üst 2.5, Alt 2.5
+MARKET_INDEX = {label: i for i, label in enumerate(MARKET_LABELS)}
+
+def iter_matchdays(source, chunk_size=100_000):
+    """Kaynağı maç günü DataFrame'leri olarak sırayla üret
+
+    source: dosya yolu / yol listesi (CSV, JSON Lines, Parquet), DataFrame veya
+    DataFrame parçalarının iterable'ı. Maç günü 'matchday' sütunu varsa ondan,
+    yoksa match_date'in gün kısmından belirlenir. Kaynak eskiden yeniye sıralı olmalıdır.
+    """
+    if isinstance(source, pd.DataFrame):
+        chunks = [source]
+    elif isinstance(source, (str, os.PathLike)):
+        chunks = iter_match_chunks(source, chunk_size)
+    elif isinstance(source, (list, tuple)) and source and isinstance(source[0], (str, os.PathLike)):
+        chunks = (chunk for path in source for chunk in iter_match_chunks(path, chunk_size))
+    else:
+        chunks = source
+
+    pending = None
+    for chunk in chunks:
+        key = chunk['matchday'] if 'matchday' in chunk.columns else chunk['match_date'].astype(str).str[:10]
+        for day, day_frame in chunk.groupby(key, sort=False):
+            # Parça sınırında bölünen maç günü bir sonraki parçayla birleştirilir
+            if pending is not None and pending[0] == day:
+                pending = (day, pd.concat([pending[1], day_frame]))
+                continue
+            if pending is not None:
+                yield pending
+            pending = (day, day_frame)
+    if pending is not None:
+        yield pending
+
+class RuleBasedStrategy:
+    """KuponAnalyzer kurallarını güncel derecelendirmelerle uygular"""
+    name = 'rule_based'
+
+    def __init__(self, home_advantage=1.1):
+        self.analyzer = KuponAnalyzer()
+        self.home_advantage = home_advantage
+
+    def predict(self, day, X):
+        probs = np.full((len(day), len(MARKET_LABELS)), np.nan)
+        for i, (home, away) in enumerate(zip(day['home_team'], day['away_team'])):
+            self.analyzer.update_team(home, {
+                'attack': X[i, 0], 'defense': X[i, 1], 'form': X[i, 2], 'home_advantage': self.home_advantage
+            })
+            self.analyzer.update_team(away, {
+                'attack': X[i, 3], 'defense': X[i, 4], 'form': X[i, 5], 'home_advantage': self.home_advantage
+            })
+            for bet_type in ('1X2', 'O/U2.5'):
+                result = self.analyzer.analyze_match(home, away, bet_type)
+                probs[i, MARKET_INDEX[result['prediction']]] = result['confidence'] / 100
+        return probs
+
+    def update(self, day, X, labels_1x2, labels_goals):
+        pass
+
+class EnhancedStrategy:
+    """EnhancedKuponAnalyzer analizini derecelendirmeler, h2h ve oranlarla uygular"""
+    name = 'enhanced'
+
+    def __init__(self):
+        self.analyzer = EnhancedKuponAnalyzer()
+
+    def predict(self, day, X):
+        probs = np.full((len(day), len(MARKET_LABELS)), np.nan)
+        odds = _day_odds(day)
+        for i, (home, away) in enumerate(zip(day['home_team'], day['away_team'])):
+            home_stats = {'attack': X[i, 0], 'defense': X[i, 1], 'form': X[i, 2]}
+            away_stats = {'attack': X[i, 3], 'defense': X[i, 4], 'form': X[i, 5]}
+            h2h = {'team1_wins': X[i, 9], 'team2_wins': X[i, 10]}
+            match_odds = {'1': odds[i, 0], 'X': odds[i, 1], '2': odds[i, 2]}
+            if not np.isfinite(match_odds['1']):
+                match_odds['1'] = 2.1
+            result = self.analyzer.analyze_match_data(home, away, home_stats, away_stats, h2h, match_odds)
+            probs[i, MARKET_INDEX[result['prediction']]] = result['confidence'] / 100
+        return probs
+
+    def update(self, day, X, labels_1x2, labels_goals):
+        pass
+
+class MLStrategy:
+    """MLKuponAnalyzer'ı kayan pencerede biriken özelliklerle günceller
+
+    online=False ise her retrain_every maç gününde pencere üzerinde yeniden
+    eğitir; online=True ise ilk eğitimden sonra her maç günü update_models ile
+    ağaç ekleyerek günceller.
+    """
+    name = 'ml'
+
+    def __init__(self, config=None, window=20_000, retrain_every=10, min_train=500, online=False):
+        self.analyzer = MLKuponAnalyzer()
+        self.config = replace(config or TrainingConfig(n_jobs=1, backend='sequential'), online_window=window)
+        self.retrain_every = retrain_every
+        self.min_train = min_train
+        self.online = online
+        # Maç günü bazında önbelleğe alınmış özellikler; pencere dolunca eskiler düşer
+        self.window = FeatureWindow(window)
+        self.days_since_training = None
+
+    def predict(self, day, X):
+        probs = np.full((len(day), len(MARKET_LABELS)), np.nan)
+        if self.analyzer.is_trained:
+            probs_1x2, probs_goals = self.analyzer.predict_proba_features(X)
+            probs[:, 0:3] = probs_1x2
+            probs[:, 3] = probs_goals[:, 1]
+            probs[:, 4] = probs_goals[:, 0]
+        return probs
+
+    def update(self, day, X, labels_1x2, labels_goals):
+        if self.online and self.analyzer.is_trained:
+            self.analyzer.update_models((X, labels_1x2, labels_goals), save=False)
+            return
+
+        self.window.append(X, labels_1x2, labels_goals)
+        if self.days_since_training is not None:
+            self.days_since_training += 1
+        due = self.days_since_training is None or self.days_since_training >= self.retrain_every
+        if due and len(self.window) >= self.min_train:
+            self.analyzer.train_models(self.config, data=self.window.arrays(), save=False)
+            self.days_since_training = 0
+
+STRATEGIES = {cls.name: cls for cls in (RuleBasedStrategy, EnhancedStrategy, MLStrategy)}
+
+def _day_odds(day):
+    """Maç gününün (N, 5) oran dizisi; eksik sütunlar NaN"""
+    return np.column_stack([
+        day[column].to_numpy(dtype=float) if column in day.columns else np.full(len(day), np.nan)
+        for column in ODDS_COLUMNS
+    ])
+
+class Backtester:
+    """Tek bir stratejiyi maç günleri üzerinde oynatır"""
+
+    def __init__(self, strategy, coupon_size=3, min_probability=0.0, stake=1.0):
+        self.strategy = strategy
+        self.coupon_size = coupon_size
+        self.min_probability = min_probability
+        self.stake = stake
+        self.builder = MatchFeatureBuilder()
+
+    def run(self, source, start=None, end=None, chunk_size=100_000):
+        """Maç günü başına sonuç sözlüğü üreten generator
+
+        start öncesindeki günler yalnızca ısınma içindir (derecelendirme ve
+        model güncellenir, sonuç üretilmez); end ve sonrası işlenmez.
+        """
+        for day_key, day in iter_matchdays(source, chunk_size):
+            day_label = str(day_key)
+            if end is not None and day_label >= str(end):
+                break
+
+            day = day.sort_values('match_date', kind='stable')
+            X, labels_1x2, labels_goals = self.builder.transform(day)
+
+            if start is None or day_label >= str(start):
+                probs = self.strategy.predict(day, X)
+                yield self.settle(day_label, day, probs, labels_1x2, labels_goals)
+
+            self.strategy.update(day, X, labels_1x2, labels_goals)
+
+    def settle(self, day_label, day, probs, labels_1x2, labels_goals):
+        """Maç başına en olası tahmini seç; tekli bahisleri ve günün kuponunu sonuçlandır"""
+        n = len(day)
+        odds = _day_odds(day)
+        outcomes = np.zeros((n, len(MARKET_LABELS)), dtype=bool)
+        outcomes[np.arange(n), labels_1x2] = True
+        outcomes[:, 3] = labels_goals == 1
+        outcomes[:, 4] = labels_goals == 0
+
+        filled = np.where(np.isfinite(probs), probs, -1.0)
+        best = filled.argmax(axis=1)
+        best_prob = filled[np.arange(n), best]
+        picked = best_prob >= max(self.min_probability, 0.0)
+        rows = np.nonzero(picked)[0]
+        cols = best[rows]
+        hits = outcomes[rows, cols]
+        pick_odds = odds[rows, cols]
+        priced = np.isfinite(pick_odds)
+
+        result = {
+            'matchday': day_label,
+            'fixtures': n,
+            'picks': int(len(rows)),
+            'hits': int(hits.sum()),
+            'singles_stake': float(priced.sum() * self.stake),
+            'singles_return': float((pick_odds[priced] * hits[priced]).sum() * self.stake),
+            'coupon_stake': 0.0,
+            'coupon_return': 0.0,
+            'brier': float(((best_prob[rows] - hits) ** 2).sum())
+        }
+
+        # Günün kuponu: fiyatı olan en olası coupon_size tahmin
+        candidates = rows[priced]
+        if len(candidates) >= self.coupon_size:
+            chosen = np.argsort(-best_prob[candidates], kind='stable')[:self.coupon_size]
+            chosen_rows = candidates[chosen]
+            result['coupon_stake'] = self.stake
+            if outcomes[chosen_rows, best[chosen_rows]].all():
+                result['coupon_return'] = float(self.stake * np.prod(odds[chosen_rows, best[chosen_rows]]))
+        return result
+
+def summarize(results):
+    """Maç günü sonuçlarını akış halinde toplayıp özet döndür"""
+    totals = {
+        'matchdays': 0, 'fixtures': 0, 'picks': 0, 'hits': 0, 'brier': 0.0,
+        'singles_stake': 0.0, 'singles_return': 0.0, 'coupon_stake': 0.0, 'coupon_return': 0.0,
+        'coupons_won': 0
+    }
+    for result in results:
+        totals['matchdays'] += 1
+        totals['coupons_won'] += result['coupon_return'] > 0
+        for key in ('fixtures', 'picks', 'hits', 'brier', 'singles_stake', 'singles_return',
+                    'coupon_stake', 'coupon_return'):
+            totals[key] += result[key]
+
+    picks = totals['picks']
+    totals['accuracy'] = round(totals['hits'] / picks, 4) if picks else None
+    totals['brier'] = round(totals['brier'] / picks, 4) if picks else None
+    for kind in ('singles', 'coupon'):
+        stake = totals[f'{kind}_stake']
+        totals[f'{kind}_roi'] = round(totals[f'{kind}_return'] / stake - 1, 4) if stake else None
+    return totals
+
+def _run_fold(source, strategy_name, strategy_kwargs, start, end, backtest_kwargs, output_path):
+    """Tek bir (strateji, zaman dilimi) işi; ayrı süreçte çalışabilir"""
+    backtester = Backtester(STRATEGIES[strategy_name](**strategy_kwargs), **backtest_kwargs)
+    results = backtester.run(source, start, end)
+
+    if output_path:
+        def written(results):
+            with open(output_path, 'w', encoding='utf-8') as f:
+                for result in results:
+                    f.write(json.dumps(result) + '\n')
+                    yield result
+        results = written(results)
+
+    summary = summarize(results)
+    summary.update(strategy=strategy_name, start=start, end=end)
+    return summary
+
+def run_walk_forward(source, strategies, folds, n_jobs=-1, output_dir=None, **backtest_kwargs):
+    """Her (strateji, dilim) çiftini paralel çalıştırıp özetleri döndür
+
+    strategies: {ad: kwargs} (ad STRATEGIES içinden), folds: [(start, end), ...]
+    Her dilim verinin başından oynatılır; start öncesi ısınma olarak kullanılır.
+    output_dir verilirse maç günü sonuçları JSON Lines olarak yazılır.
+    """
+    if isinstance(source, pd.DataFrame):
+        raise TypeError("Paralel çalıştırma için kaynak dosya yolu olmalıdır")
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    jobs = []
+    for name, kwargs in strategies.items():
+        for start, end in folds:
+            output_path = os.path.join(output_dir, f"{name}_{start}_{end}.jsonl") if output_dir else None
+            jobs.append(delayed(_run_fold)(source, name, kwargs or {}, start, end, backtest_kwargs, output_path))
+    return Parallel(n_jobs=n_jobs)(jobs)
@@ -0,0 +1,188 @@
+# benchmarks.py
+"""Analizcilerin sıcak yolları için benchmark'lar
+
+Kullanım:
+    python benchmarks.py -o bench.json
+    python benchmarks.py --quick -o yeni.json --compare bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import sklearn
+
+from api_integration import EnhancedKuponAnalyzer, SportsDataCollector
+from kupon_mvp import KuponAnalyzer
+from ml_algorithm import MLKuponAnalyzer, TrainingConfig, load_model_bundle
+from stub_api import StubSportsAPI
+
+KUPON_SIZES = [1, 10, 100, 1000]
+QUICK_KUPON_SIZES = [1, 10, 100]
+GROUPS = ['mvp', 'ml', 'training', 'loading', 'api']
+
+def measure(func, repeat=5, number=1):
+    """func'ı repeat kez (her seferinde number çağrı) çalıştırıp çağrı başına süreleri döndür"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+    return {
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'mean': statistics.fmean(timings),
+        'repeat': repeat,
+        'number': number
+    }
+
+def _record(results, name, params, timing):
+    results.append(dict(name=name, params=params, **timing))
+    print(f"{name:<32} {json.dumps(params):<28} median {timing['median'] * 1000:10.3f} ms")
+
+def _sample_kupon(size, seed=0):
+    """Rastgele takım istatistikleriyle örnek kupon"""
+    rng = np.random.default_rng(seed)
+    teams = list(KuponAnalyzer().team_stats)
+    kupon = []
+    for i in range(size):
+        home, away = rng.choice(len(teams), size=2, replace=False)
+        stats = rng.uniform(3, 10, size=6)
+        kupon.append({
+            'home_team': teams[home],
+            'away_team': teams[away],
+            'bet_type': '1X2' if i % 2 == 0 else 'O/U2.5',
+            'home_stats': {'attack': stats[0], 'defense': stats[1], 'form': stats[2]},
+            'away_stats': {'attack': stats[3], 'defense': stats[4], 'form': stats[5]},
+        })
+    return kupon
+
+def bench_mvp(results, sizes, repeat):
+    analyzer = KuponAnalyzer()
+    for size in sizes:
+        kupon = _sample_kupon(size)
+        _record(results, 'KuponAnalyzer.analyze_kupon', {'size': size},
+                measure(lambda: analyzer.analyze_kupon(kupon), repeat))
+
+def bench_ml(results, sizes, repeat, analyzer):
+    match = _sample_kupon(1)[0]
+    _record(results, 'MLKuponAnalyzer.predict_match', {},
+            measure(lambda: analyzer.predict_match(match['home_stats'], match['away_stats']), repeat, 10))
+    for size in sizes:
+        kupon = _sample_kupon(size)
+        _record(results, 'MLKuponAnalyzer.analyze_kupon_ml', {'size': size},
+                measure(lambda: analyzer.analyze_kupon_ml(kupon), repeat))
+
+def bench_training(results, quick, workdir):
+    analyzer = MLKuponAnalyzer(model_path=os.path.join(workdir, 'bench_train.joblib'))
+    for num_samples in ([10_000, 100_000] if quick else [10_000, 100_000, 1_000_000]):
+        _record(results, 'generate_training_data', {'num_samples': num_samples},
+                measure(lambda: analyzer.generate_training_data(num_samples), 3))
+    for num_samples in ([1000, 5000] if quick else [2000, 10_000, 50_000]):
+        config = TrainingConfig(num_samples=num_samples)
+        _record(results, 'train_models', {'num_samples': num_samples},
+                measure(lambda: analyzer.train_models(config), 1))
+
+def bench_loading(results, repeat, bundle_path):
+    _record(results, 'load_model_bundle', {'cache': False},
+            measure(lambda: load_model_bundle(bundle_path, use_cache=False), repeat))
+    _record(results, 'load_model_bundle', {'cache': False, 'mmap_mode': 'r'},
+            measure(lambda: load_model_bundle(bundle_path, mmap_mode='r', use_cache=False), repeat))
+    load_model_bundle(bundle_path)
+    _record(results, 'load_model_bundle', {'cache': True},
+            measure(lambda: load_model_bundle(bundle_path), repeat, 100))
+
+def bench_api(results, sizes, repeat):
+    with StubSportsAPI(delay=0.005) as api:
+        def fresh_analyzer():
+            # Önbellek etkisini ölçmemek için her ölçümde yeni toplayıcı
+            return EnhancedKuponAnalyzer(data_collector=SportsDataCollector(base_url=api.base_url))
+
+        _record(results, 'EnhancedKuponAnalyzer.analyze_match_with_api', {},
+                measure(lambda: fresh_analyzer().analyze_match_with_api('Galatasaray', 'Fenerbahce'), repeat))
+        for size in sizes:
+            kupon = _sample_kupon(size)
+            _record(results, 'EnhancedKuponAnalyzer.analyze_kupon', {'size': size},
+                    measure(lambda: fresh_analyzer().analyze_kupon(kupon), repeat))
+
+def run_benchmarks(quick=False, groups=None, repeat=5):
+    """Seçilen grupları çalıştırıp sonuç sözlüğünü döndür"""
+    groups = groups or GROUPS
+    sizes = QUICK_KUPON_SIZES if quick else KUPON_SIZES
+    results = []
+
+    with tempfile.TemporaryDirectory() as workdir:
+        analyzer = None
+        if 'ml' in groups or 'loading' in groups:
+            analyzer = MLKuponAnalyzer(model_path=os.path.join(workdir, 'bench_models.joblib'))
+            analyzer.train_models(TrainingConfig(num_samples=2000))
+
+        if 'mvp' in groups:
+            bench_mvp(results, sizes, repeat)
+        if 'ml' in groups:
+            bench_ml(results, sizes, repeat, analyzer)
+        if 'training' in groups:
+            bench_training(results, quick, workdir)
+        if 'loading' in groups:
+            bench_loading(results, repeat, analyzer.model_path)
+        if 'api' in groups:
+            bench_api(results, sizes, repeat)
+
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'sklearn': sklearn.__version__,
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'quick': quick
+        },
+        'results': results
+    }
+
+def compare_results(current, baseline, threshold=1.2):
+    """Aynı ad ve parametreli ölçümleri karşılaştır; median oranı threshold'u aşanları döndür"""
+    def key(result):
+        return result['name'], json.dumps(result['params'], sort_keys=True)
+
+    baseline_by_key = {key(result): result for result in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        previous = baseline_by_key.get(key(result))
+        if previous is None:
+            continue
+        ratio = result['median'] / previous['median']
+        if ratio > threshold:
+            regressions.append({'name': result['name'], 'params': result['params'], 'ratio': round(ratio, 2)})
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kupon analizcileri benchmark'ı")
+    parser.add_argument('-o', '--output', default='bench_results.json')
+    parser.add_argument('--quick', action='store_true', help="Küçük boyutlarla hızlı çalıştır")
+    parser.add_argument('--groups', nargs='+', choices=GROUPS)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--compare', help="Karşılaştırılacak önceki JSON sonucu")
+    parser.add_argument('--threshold', type=float, default=1.2)
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.quick, args.groups, args.repeat)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Sonuçlar kaydedildi: {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare_results(report, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"YAVAŞLAMA: {regression['name']} {regression['params']} x{regression['ratio']}")
+        if regressions:
+            raise SystemExit(1)
+        print("Yavaşlama yok.")
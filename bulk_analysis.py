@@ -0,0 +1,166 @@
+# bulk_analysis.py
+"""Büyük kupon kümelerinin çok süreçli toplu analizi
+
+Kuponlar bloklar halinde okunur ve her blok kupon parçalarına bölünerek
+süreç havuzuna gönderilir. İşçi kendi parçasında özellikleri üretir, aynı
+maçları özellik satırlarına göre (np.unique) tekilleştirir, önbellekte
+olmayan satırları tahmin eder ve kupon özetlerini oluşturur; ana süreç
+yalnızca sonuçları sırayla iletir. İşçiler model paketini belleğe eşleyerek
+(mmap) yükler, böylece model sayfaları süreçler arasında paylaşılır. Tahmin
+önbellekleri LRU ile sınırlıdır, sonsuz kupon akışında bellek büyümez.
+"""
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from cachetools import LRUCache
+
+from fixtures import fixture_keys
+from kupon_mvp import KuponAnalyzer
+from ml_algorithm import DEFAULT_BUNDLE_PATH, MLKuponAnalyzer
+
+# İşçi sürecinde bir kez yüklenen analizci ve tahmin önbelleği
+_worker_analyzer = None
+_worker_cache = None
+
+def _init_worker(model_path, mmap_mode, cache_size):
+    global _worker_analyzer, _worker_cache
+    _worker_analyzer = MLKuponAnalyzer(model_path=model_path)
+    _worker_analyzer.load_models(mmap_mode=mmap_mode)
+    _worker_cache = LRUCache(cache_size)
+
+def _analyze_shard(coupons):
+    return _analyze_ml_coupons(_worker_analyzer, _worker_cache, coupons)
+
+def _analyze_ml_coupons(analyzer, cache, coupons):
+    """Kupon parçasını analiz et: (sonuçlar, maç sayısı, yeni tahmin edilen tekil maç sayısı)
+
+    cache: özellik satırı (bytes) -> biçimlendirilmiş tahmin; aynı maçın
+    sözlüğü kuponlar arasında paylaşılır.
+    """
+    matches = [match for coupon in coupons for match in coupon]
+    X = analyzer.create_features_batch(matches)
+    unique_rows, inverse = np.unique(X, axis=0, return_inverse=True)
+    keys = [row.tobytes() for row in unique_rows]
+
+    unique_predictions = [cache.get(key) for key in keys]
+    new = [i for i, prediction in enumerate(unique_predictions) if prediction is None]
+    if new:
+        probs_1x2, probs_goals = analyzer.predict_proba_features(unique_rows[new])
+        for i, prediction in zip(new, analyzer.format_predictions(probs_1x2, probs_goals)):
+            unique_predictions[i] = cache[keys[i]] = prediction
+
+    predictions = [unique_predictions[i] for i in inverse.ravel()]
+    results = []
+    start = 0
+    for coupon in coupons:
+        end = start + len(coupon)
+        results.append(analyzer.analyze_kupon_ml(coupon, predictions[start:end]))
+        start = end
+    return results, len(matches), len(new)
+
+class BulkKuponAnalyzer:
+    """Kupon listelerini parçalara bölüp paralel analiz eden toplu analizci
+
+    shard_size işçiye tek seferde gönderilen kupon sayısı, cache_size süreç
+    başına saklanan en fazla tekil tahmin sayısıdır.
+
+    Kullanım:
+        with BulkKuponAnalyzer(n_workers=8) as bulk:
+            for result in bulk.analyze(coupons):
+                ...
+    """
+
+    def __init__(self, model_path=DEFAULT_BUNDLE_PATH, n_workers=None, shard_size=1024,
+                 block_size=10_000, mmap_mode='r', cache_size=100_000):
+        self.model_path = model_path
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.shard_size = shard_size
+        self.block_size = block_size
+        self.mmap_mode = mmap_mode
+        self.cache_size = cache_size
+        self.ml = None
+        self.mvp = None
+        self._pool = None
+        # Tek süreçte kullanılan ML ve kural tabanlı tahmin önbelleği
+        self._predictions = LRUCache(cache_size)
+        self.stats = {'coupons': 0, 'fixtures': 0, 'unique_fixtures': 0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def analyze(self, coupons, analyzer='ml'):
+        """Her kupon için analyze_kupon_ml / analyze_kupon sonucunu sırayla üret
+
+        coupons: maç listelerinden oluşan (sonsuz da olabilen) iterable. 'ml' için
+        maçlar home_stats / away_stats içerir, 'mvp' için home_team / away_team / bet_type.
+        """
+        if analyzer not in ('ml', 'mvp'):
+            raise ValueError(f"Bilinmeyen analizci: {analyzer}")
+
+        coupons = iter(coupons)
+        while True:
+            block = list(itertools.islice(coupons, self.block_size))
+            if not block:
+                return
+            self.stats['coupons'] += len(block)
+            if analyzer == 'ml':
+                yield from self._analyze_ml_block(block)
+            else:
+                yield from self._analyze_mvp_block(block)
+
+    def _analyze_ml_block(self, block):
+        if self.ml is None:
+            self.ml = MLKuponAnalyzer(model_path=self.model_path)
+            self.ml.load_models(mmap_mode=self.mmap_mode)
+            if not self.ml.is_trained:
+                raise RuntimeError("Model yüklenmedi, önce train_models() çalıştırın")
+
+        if self.n_workers == 1 or len(block) <= self.shard_size:
+            shard_results = [_analyze_ml_coupons(self.ml, self._predictions, block)]
+        else:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    self.n_workers, initializer=_init_worker,
+                    initargs=(self.model_path, self.mmap_mode, self.cache_size)
+                )
+            # Parça boyutu işçiler arasında dengeli dağılacak şekilde küçültülür
+            shard_size = min(self.shard_size, -(-len(block) // self.n_workers))
+            shards = [block[start:start + shard_size] for start in range(0, len(block), shard_size)]
+            shard_results = self._pool.map(_analyze_shard, shards)
+
+        for results, fixtures, unique in shard_results:
+            self.stats['fixtures'] += fixtures
+            self.stats['unique_fixtures'] += unique
+            yield from results
+
+    def _analyze_mvp_block(self, block):
+        # Kural tabanlı analiz ucuzdur; kazanç tekilleştirmeden gelir, süreç havuzu kullanılmaz
+        if self.mvp is None:
+            self.mvp = KuponAnalyzer()
+
+        for coupon in block:
+            analyses = []
+            for match_key in fixture_keys(coupon):
+                key = ('mvp',) + match_key
+                analysis = self._predictions.get(key)
+                if analysis is None:
+                    analysis = self._predictions[key] = self.mvp.analyze_match(*match_key)
+                    self.stats['unique_fixtures'] += 1
+                analyses.append(analysis)
+            self.stats['fixtures'] += len(coupon)
+            yield self.mvp.summarize_kupon(analyses)
+
+def analyze_coupons_bulk(coupons, analyzer='ml', model_path=DEFAULT_BUNDLE_PATH, n_workers=None, **kwargs):
+    """BulkKuponAnalyzer için kısayol: sonuçları sırayla üreten iterator"""
+    with BulkKuponAnalyzer(model_path, n_workers, **kwargs) as bulk:
+        yield from bulk.analyze(coupons, analyzer)
@@ -0,0 +1,102 @@
+# calibration.py
+"""Model olasılıkları için kalibrasyon ve güvenilirlik raporu
+
+Ağaç modellerinin predict_proba çıktıları kalibre değildir; birçok maçın
+çarpımı alındığında (kupon güveni) hata katlanarak büyür. Kalibratörler
+eğitimde ayrılan doğrulama verisiyle sınıf başına (one-vs-rest) öğrenilir
+ve tahmin sırasında yalnızca numpy ile vektörel uygulanır.
+"""
+import numpy as np
+from sklearn.isotonic import IsotonicRegression
+from sklearn.linear_model import LogisticRegression
+
+CALIBRATION_METHODS = ('isotonic', 'sigmoid')
+# Log-olasılık ve logit hesapları için alt/üst sınır
+EPSILON = 1e-6
+
+def _logit(p):
+    p = np.clip(p, EPSILON, 1 - EPSILON)
+    return np.log(p / (1 - p))
+
+class ProbabilityCalibrator:
+    """Sınıf başına isotonic veya Platt (sigmoid) kalibrasyonu
+
+    Öğrenilen eğriler düz diziler olarak saklanır; transform sklearn
+    tahmincisi çağırmaz, np.interp / sigmoid ile (N, k) diziyi tek geçişte çevirir.
+    """
+
+    def __init__(self, method='isotonic'):
+        if method not in CALIBRATION_METHODS:
+            raise ValueError(f"Bilinmeyen kalibrasyon yöntemi: {method}")
+        self.method = method
+        self.curves = None
+
+    def fit(self, probs, labels):
+        """(N, k) ham olasılıklar ve 0..k-1 etiketlerle kalibratörü öğren"""
+        probs = np.asarray(probs, dtype=float)
+        labels = np.asarray(labels)
+        self.curves = []
+        for j in range(probs.shape[1]):
+            target = (labels == j).astype(float)
+            if self.method == 'isotonic':
+                iso = IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds='clip')
+                iso.fit(probs[:, j], target)
+                self.curves.append((iso.X_thresholds_, iso.y_thresholds_))
+            elif target.min() == target.max():
+                # Doğrulama verisinde tek sınıf: sabit olasılık
+                self.curves.append((0.0, _logit(target[0])))
+            else:
+                platt = LogisticRegression(C=1e6)
+                platt.fit(_logit(probs[:, j])[:, np.newaxis], target)
+                self.curves.append((float(platt.coef_[0, 0]), float(platt.intercept_[0])))
+        return self
+
+    def transform(self, probs):
+        """Kalibre edilmiş ve satır toplamı 1'e normalize edilmiş (N, k) olasılıklar"""
+        probs = np.asarray(probs, dtype=float)
+        calibrated = np.empty_like(probs)
+        for j, curve in enumerate(self.curves):
+            if self.method == 'isotonic':
+                calibrated[:, j] = np.interp(probs[:, j], curve[0], curve[1])
+            else:
+                calibrated[:, j] = 1 / (1 + np.exp(-(curve[0] * _logit(probs[:, j]) + curve[1])))
+
+        total = calibrated.sum(axis=1, keepdims=True)
+        # Tüm sınıflar 0'a eşlenirse ham olasılık korunur
+        return np.where(total > 0, calibrated / np.where(total > 0, total, 1), probs)
+
+def reliability_report(probs, labels, n_bins=10):
+    """Tahmin edilen en yüksek olasılığın (güven) gerçekleşme oranıyla karşılaştırması
+
+    Dönüş: Brier skoru, log kaybı, beklenen kalibrasyon hatası (ECE) ve
+    eşit genişlikli güven aralıkları için ortalama güven / isabet / örnek sayısı.
+    """
+    probs = np.asarray(probs, dtype=float)
+    labels = np.asarray(labels)
+    n, k = probs.shape
+    onehot = np.zeros((n, k))
+    onehot[np.arange(n), labels] = 1
+
+    confidence = probs.max(axis=1)
+    correct = probs.argmax(axis=1) == labels
+    bin_index = np.minimum((confidence * n_bins).astype(int), n_bins - 1)
+    counts = np.bincount(bin_index, minlength=n_bins)
+    confidence_sum = np.bincount(bin_index, weights=confidence, minlength=n_bins)
+    correct_sum = np.bincount(bin_index, weights=correct, minlength=n_bins)
+
+    bins = []
+    for b in np.nonzero(counts)[0]:
+        bins.append({
+            'range': (round(b / n_bins, 3), round((b + 1) / n_bins, 3)),
+            'mean_confidence': round(float(confidence_sum[b] / counts[b]), 4),
+            'accuracy': round(float(correct_sum[b] / counts[b]), 4),
+            'count': int(counts[b])
+        })
+
+    return {
+        'samples': int(n),
+        'brier': round(float(((probs - onehot) ** 2).sum(axis=1).mean()), 4),
+        'log_loss': round(float(-np.log(np.clip(probs[np.arange(n), labels], EPSILON, 1)).mean()), 4),
+        'ece': round(float(np.abs(correct_sum - confidence_sum).sum() / n), 4),
+        'bins': bins
+    }
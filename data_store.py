@@ -0,0 +1,251 @@
+# data_store.py
+"""Takım istatistikleri, maç sonuçları ve oran geçmişi için yerel SQLite deposu"""
+import sqlite3
+import threading
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    id INTEGER PRIMARY KEY,
+    league TEXT NOT NULL DEFAULT '',
+    match_date TEXT NOT NULL,
+    home_team TEXT NOT NULL,
+    away_team TEXT NOT NULL,
+    home_goals INTEGER NOT NULL,
+    away_goals INTEGER NOT NULL,
+    UNIQUE (league, match_date, home_team, away_team)
+);
+CREATE INDEX IF NOT EXISTS idx_matches_home ON matches (home_team, match_date);
+CREATE INDEX IF NOT EXISTS idx_matches_away ON matches (away_team, match_date);
+CREATE INDEX IF NOT EXISTS idx_matches_league ON matches (league, match_date);
+
+CREATE TABLE IF NOT EXISTS team_ratings (
+    team TEXT NOT NULL,
+    league TEXT NOT NULL DEFAULT '',
+    attack REAL NOT NULL,
+    defense REAL NOT NULL,
+    form REAL NOT NULL,
+    home_advantage REAL NOT NULL DEFAULT 1.0,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (team, league)
+);
+CREATE INDEX IF NOT EXISTS idx_ratings_league ON team_ratings (league, updated_at);
+
+CREATE TABLE IF NOT EXISTS odds_snapshots (
+    id INTEGER PRIMARY KEY,
+    home_team TEXT NOT NULL,
+    away_team TEXT NOT NULL,
+    match_date TEXT,
+    taken_at TEXT NOT NULL,
+    odd_1 REAL, odd_x REAL, odd_2 REAL,
+    over_2_5 REAL, under_2_5 REAL
+);
+CREATE INDEX IF NOT EXISTS idx_odds_fixture ON odds_snapshots (home_team, away_team, taken_at);
+CREATE INDEX IF NOT EXISTS idx_odds_date ON odds_snapshots (match_date);
+"""
+
+class KuponDataStore:
+    """Toplayıcıların ve analizcilerin önce okuduğu kalıcı veri deposu"""
+
+    def __init__(self, path='kupon_data.db'):
+        self.path = path
+        # Bağlantı, async toplayıcının iş parçacıkları arasında kilitle paylaşılır
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            if path != ':memory:':
+                self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # --- Maç sonuçları ---
+
+    def add_matches(self, matches):
+        """Bitmiş maçları ekle; aynı maç ikinci kez eklenmez"""
+        rows = [
+            (m.get('league', ''), str(m['match_date']), m['home_team'], m['away_team'],
+             int(m['home_goals']), int(m['away_goals']))
+            for m in matches
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO matches '
+                '(league, match_date, home_team, away_team, home_goals, away_goals) '
+                'VALUES (?, ?, ?, ?, ?, ?)', rows
+            )
+        return len(rows)
+
+    def get_team_matches(self, team, limit=10, league=None):
+        """Takımın en yeni maçları (yeniden eskiye)"""
+        league_filter = ' AND league = ?' if league is not None else ''
+        params = (team, team) + ((league,) if league is not None else ()) + (limit,)
+        rows = self._query(
+            'SELECT * FROM ('
+            ' SELECT * FROM matches WHERE home_team = ?'
+            ' UNION ALL SELECT * FROM matches WHERE away_team = ?'
+            f') WHERE 1 = 1{league_filter} ORDER BY match_date DESC LIMIT ?', params
+        )
+        return [dict(row) for row in rows]
+
+    def get_matches(self, league=None, since=None, until=None):
+        """Lig ve tarih aralığına göre maçlar (eskiden yeniye)"""
+        clauses, params = [], []
+        if league is not None:
+            clauses.append('league = ?')
+            params.append(league)
+        if since is not None:
+            clauses.append('match_date >= ?')
+            params.append(str(since))
+        if until is not None:
+            clauses.append('match_date < ?')
+            params.append(str(until))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+        rows = self._query(f'SELECT * FROM matches{where} ORDER BY match_date, id', params)
+        return [dict(row) for row in rows]
+
+    def head_to_head(self, team1, team2, limit=10):
+        """İki takım arasındaki son karşılaşmaların özeti; kayıt yoksa None"""
+        rows = self._query(
+            'SELECT * FROM ('
+            ' SELECT * FROM matches WHERE home_team = ? AND away_team = ?'
+            ' UNION ALL SELECT * FROM matches WHERE home_team = ? AND away_team = ?'
+            ') ORDER BY match_date DESC LIMIT ?', (team1, team2, team2, team1, limit)
+        )
+        if not rows:
+            return None
+
+        team1_wins = team2_wins = draws = goals = 0
+        for row in rows:
+            team1_goals, team2_goals = (
+                (row['home_goals'], row['away_goals']) if row['home_team'] == team1
+                else (row['away_goals'], row['home_goals'])
+            )
+            goals += team1_goals + team2_goals
+            if team1_goals > team2_goals:
+                team1_wins += 1
+            elif team1_goals < team2_goals:
+                team2_wins += 1
+            else:
+                draws += 1
+
+        return {
+            'total_matches': len(rows),
+            'team1_wins': team1_wins,
+            'team2_wins': team2_wins,
+            'draws': draws,
+            'avg_goals': round(goals / len(rows), 2)
+        }
+
+    # --- Takım derecelendirmeleri ---
+
+    def upsert_team_ratings(self, team, stats, league=''):
+        """Takımın türetilmiş atak/savunma/form değerlerini kaydet"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT INTO team_ratings '
+                '(team, league, attack, defense, form, home_advantage, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (team, league) DO UPDATE SET '
+                'attack = excluded.attack, defense = excluded.defense, form = excluded.form, '
+                'home_advantage = excluded.home_advantage, updated_at = excluded.updated_at',
+                (team, league, stats['attack'], stats['defense'], stats['form'],
+                 stats.get('home_advantage', 1.0), datetime.now().isoformat())
+            )
+
+    def get_team_ratings(self, team, league=None, max_age=None):
+        """Takımın kayıtlı değerleri; yoksa veya max_age saniyeden eskiyse None"""
+        league_filter = ' AND league = ?' if league is not None else ''
+        params = (team,) + ((league,) if league is not None else ())
+        rows = self._query(
+            f'SELECT * FROM team_ratings WHERE team = ?{league_filter} '
+            'ORDER BY updated_at DESC LIMIT 1', params
+        )
+        if not rows:
+            return None
+
+        row = rows[0]
+        if max_age is not None:
+            age = (datetime.now() - datetime.fromisoformat(row['updated_at'])).total_seconds()
+            if age > max_age:
+                return None
+
+        return {
+            'attack': row['attack'],
+            'defense': row['defense'],
+            'form': row['form'],
+            'home_advantage': row['home_advantage']
+        }
+
+    def all_team_ratings(self, league=None):
+        """Tüm takımların değerleri: {takım: istatistikler}"""
+        where = ' WHERE league = ?' if league is not None else ''
+        rows = self._query(
+            f'SELECT * FROM team_ratings{where} ORDER BY updated_at',
+            (league,) if league is not None else ()
+        )
+        # Aynı takım birden fazla ligde varsa en yeni kayıt kazanır
+        return {
+            row['team']: {
+                'attack': row['attack'],
+                'defense': row['defense'],
+                'form': row['form'],
+                'home_advantage': row['home_advantage']
+            }
+            for row in rows
+        }
+
+    def team_leagues(self, league=None):
+        """Takımların ligleri: {takım: lig} (all_team_ratings ile aynı öncelik)"""
+        where = ' WHERE league = ?' if league is not None else ''
+        rows = self._query(
+            f'SELECT team, league FROM team_ratings{where} ORDER BY updated_at',
+            (league,) if league is not None else ()
+        )
+        return {row['team']: row['league'] for row in rows}
+
+    # --- Oran geçmişi ---
+
+    def add_odds_snapshot(self, home_team, away_team, odds, match_date=None, taken_at=None):
+        """Bir maçın oranlarını zaman damgasıyla kaydet"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT INTO odds_snapshots '
+                '(home_team, away_team, match_date, taken_at, odd_1, odd_x, odd_2, over_2_5, under_2_5) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (home_team, away_team, match_date, taken_at or datetime.now().isoformat(),
+                 odds.get('1'), odds.get('X'), odds.get('2'),
+                 odds.get('over_2_5'), odds.get('under_2_5'))
+            )
+
+    def latest_odds(self, home_team, away_team):
+        """Maçın en son oranları; kayıt yoksa None"""
+        rows = self._query(
+            'SELECT * FROM odds_snapshots WHERE home_team = ? AND away_team = ? '
+            'ORDER BY taken_at DESC, id DESC LIMIT 1', (home_team, away_team)
+        )
+        if not rows:
+            return None
+
+        row = rows[0]
+        return {
+            '1': row['odd_1'],
+            'X': row['odd_x'],
+            '2': row['odd_2'],
+            'over_2_5': row['over_2_5'],
+            'under_2_5': row['under_2_5']
+        }
+
+    def odds_history(self, home_team, away_team):
+        """Maçın tüm oran kayıtları (eskiden yeniye)"""
+        rows = self._query(
+            'SELECT * FROM odds_snapshots WHERE home_team = ? AND away_team = ? '
+            'ORDER BY taken_at, id', (home_team, away_team)
+        )
+        return [dict(row) for row in rows]
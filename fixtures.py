@@ -0,0 +1,316 @@
+# fixtures.py
+"""Maç ve tahminler için sıkıştırılmış veri yapıları
+
+Tek maç için __slots__ kullanan dataclass'lar (TeamStats, Fixture), maç
+listeleri için sütun bazlı dizilerden oluşan FixtureBatch ve tahminler için
+PredictionBatch tanımlanır. Analizciler bu yapıları doğrudan kabul eder;
+eski sözlük biçimi from_dict / to_dict (ve Fixture üzerindeki sözlük
+erişimi) ile desteklenmeye devam eder.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+# Ek veri yoksa kullanılan varsayılan değerler (h2h ev, h2h deplasman, ort. gol,
+# ev sahibi avantajı, hava, hakem)
+DEFAULT_ADDITIONAL_FEATURES = [0.4, 0.3, 2.5, 1.2, 1.0, 1.0]
+NUM_FEATURES = 15
+
+FEATURE_NAMES = [
+    'home_attack', 'home_defense', 'home_form',
+    'away_attack', 'away_defense', 'away_form',
+    'attack_diff', 'defense_diff', 'form_diff',
+    'h2h_home_ratio', 'h2h_away_ratio', 'avg_goals_h2h',
+    'home_advantage', 'weather_factor', 'referee_factor'
+]
+
+LABELS_1X2 = ['1', 'X', '2']
+LABELS_GOALS = ['Alt 2.5', 'Üst 2.5']
+
+STAT_NAMES = ('attack', 'defense', 'form')
+# additional_data anahtarları (h2h oranları total_h2h'ye bölünür)
+ADDITIONAL_KEYS = ('h2h_home_wins', 'h2h_away_wins', 'avg_goals_h2h',
+                   'home_advantage', 'weather_factor', 'referee_factor')
+
+def additional_features(additional_data):
+    """additional_data sözlüğünden 6 ek özellik (yoksa varsayılanlar)"""
+    if not additional_data:
+        return tuple(DEFAULT_ADDITIONAL_FEATURES)
+    total_h2h = max(additional_data.get('total_h2h', 1), 1)
+    return (
+        additional_data.get('h2h_home_wins', 0) / total_h2h,
+        additional_data.get('h2h_away_wins', 0) / total_h2h,
+        additional_data.get('avg_goals_h2h', 2.5),
+        additional_data.get('home_advantage', 1.2),
+        additional_data.get('weather_factor', 1.0),
+        additional_data.get('referee_factor', 1.0)
+    )
+
+@dataclass(slots=True)
+class TeamStats:
+    """Takım atak / savunma / form değerleri; stats['attack'] erişimi de desteklenir"""
+    attack: float = 5.0
+    defense: float = 5.0
+    form: float = 5.0
+
+    @classmethod
+    def from_dict(cls, stats):
+        if stats is None or isinstance(stats, cls):
+            return stats
+        return cls(stats['attack'], stats['defense'], stats['form'])
+
+    def to_dict(self):
+        return {'attack': self.attack, 'defense': self.defense, 'form': self.form}
+
+    def __getitem__(self, key):
+        if key not in STAT_NAMES:
+            raise KeyError(key)
+        return getattr(self, key)
+
+@dataclass(slots=True)
+class Fixture:
+    """Tek maç. İstatistikler yalnızca ML analizi için gereklidir.
+
+    additional, hazır hesaplanmış 6 ek özelliktir (h2h oranları dahil).
+    Eski kodla uyum için match['home_team'] ve match.get('bet_type') çalışır.
+    """
+    home_team: str = ''
+    away_team: str = ''
+    home_stats: TeamStats = None
+    away_stats: TeamStats = None
+    additional: tuple = None
+    bet_type: str = '1X2'
+    league: str = ''
+
+    @classmethod
+    def from_dict(cls, match):
+        if isinstance(match, cls):
+            return match
+        additional_data = match.get('additional_data')
+        return cls(
+            match.get('home_team', ''),
+            match.get('away_team', ''),
+            TeamStats.from_dict(match.get('home_stats')),
+            TeamStats.from_dict(match.get('away_stats')),
+            additional_features(additional_data) if additional_data else None,
+            match.get('bet_type', '1X2'),
+            match.get('league', '')
+        )
+
+    @property
+    def additional_data(self):
+        # Oranlar total_h2h=1 ile yazılır, böylece aynı özellikler geri üretilir
+        if self.additional is None:
+            return None
+        return dict(zip(ADDITIONAL_KEYS, self.additional), total_h2h=1)
+
+    def features(self):
+        """(15,) özellik vektörü"""
+        home, away = self.home_stats, self.away_stats
+        if home is None or away is None:
+            raise ValueError(f"ML analizi için home_stats / away_stats gerekli: {self.home_team} - {self.away_team}")
+        stats = (home.attack, home.defense, home.form, away.attack, away.defense, away.form)
+        additional = self.additional if self.additional is not None else DEFAULT_ADDITIONAL_FEATURES
+        return np.array(stats + (stats[0] - stats[3], stats[1] - stats[4], stats[2] - stats[5]) + tuple(additional))
+
+    def to_dict(self):
+        match = {'home_team': self.home_team, 'away_team': self.away_team, 'bet_type': self.bet_type}
+        if self.league:
+            match['league'] = self.league
+        if self.home_stats is not None:
+            match['home_stats'] = self.home_stats.to_dict()
+        if self.away_stats is not None:
+            match['away_stats'] = self.away_stats.to_dict()
+        if self.additional is not None:
+            match['additional_data'] = self.additional_data
+        return match
+
+    def __getitem__(self, key):
+        if key == 'additional_data':
+            return self.additional_data
+        if key in _FIXTURE_KEYS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        return default if value is None else value
+
+_FIXTURE_KEYS = ('home_team', 'away_team', 'home_stats', 'away_stats', 'bet_type', 'league')
+
+class FixtureBatch:
+    """Maç listesinin sütun bazlı (structure-of-arrays) gösterimi
+
+    stats: (N, 6) ev atak/savunma/form + deplasman atak/savunma/form, istatistiği
+    olmayan maçlarda NaN. additional: (N, 6) ek özellikler. Takım adları, bahis
+    türü ve lig object dizileridir. Özellik matrisi satır satır sözlük
+    okumadan sütun işlemleriyle üretilir.
+    """
+    __slots__ = ('home_team', 'away_team', 'bet_type', 'league', 'stats', 'additional')
+
+    def __init__(self, home_team, away_team, stats=None, additional=None, bet_type=None, league=None):
+        n = len(home_team)
+        self.home_team = np.asarray(home_team, dtype=object)
+        self.away_team = np.asarray(away_team, dtype=object)
+        self.stats = (np.full((n, 6), np.nan) if stats is None
+                      else np.asarray(stats, dtype=float).reshape(n, 6))
+        self.additional = (np.tile(np.asarray(DEFAULT_ADDITIONAL_FEATURES, dtype=float), (n, 1))
+                           if additional is None else np.asarray(additional, dtype=float).reshape(n, 6))
+        self.bet_type = (np.full(n, '1X2', dtype=object) if bet_type is None
+                         else np.asarray(bet_type, dtype=object))
+        self.league = np.full(n, '', dtype=object) if league is None else np.asarray(league, dtype=object)
+
+    @classmethod
+    def from_fixtures(cls, matches):
+        """Fixture nesneleri veya maç sözlüklerinden (karışık olabilir) oluştur"""
+        n = len(matches)
+        home_team = np.empty(n, dtype=object)
+        away_team = np.empty(n, dtype=object)
+        bet_type = np.empty(n, dtype=object)
+        league = np.empty(n, dtype=object)
+        stats = np.full((n, 6), np.nan)
+        additional = np.empty((n, 6))
+
+        for i, match in enumerate(matches):
+            if isinstance(match, Fixture):
+                home, away, extra = match.home_stats, match.away_stats, match.additional
+                home_team[i], away_team[i] = match.home_team, match.away_team
+                bet_type[i], league[i] = match.bet_type, match.league
+            else:
+                home, away = match.get('home_stats'), match.get('away_stats')
+                extra = match.get('additional_data')
+                extra = additional_features(extra) if extra else None
+                home_team[i], away_team[i] = match.get('home_team', ''), match.get('away_team', '')
+                bet_type[i], league[i] = match.get('bet_type', '1X2'), match.get('league', '')
+            if home is not None:
+                stats[i, 0:3] = home['attack'], home['defense'], home['form']
+            if away is not None:
+                stats[i, 3:6] = away['attack'], away['defense'], away['form']
+            additional[i] = extra if extra is not None else DEFAULT_ADDITIONAL_FEATURES
+
+        return cls(home_team, away_team, stats, additional, bet_type, league)
+
+    from_dicts = from_fixtures
+
+    @classmethod
+    def from_frame(cls, frame):
+        """FEATURE_NAMES sütunlarını (ve varsa takım / bahis / lig) içeren DataFrame'den oluştur"""
+        n = len(frame)
+        columns = frame.columns
+
+        def column(name, default):
+            return frame[name].to_numpy() if name in columns else np.full(n, default, dtype=object)
+
+        stats = frame[FEATURE_NAMES[0:6]].to_numpy(dtype=float)
+        additional = (frame[FEATURE_NAMES[9:15]].to_numpy(dtype=float)
+                      if all(name in columns for name in FEATURE_NAMES[9:15]) else None)
+        return cls(column('home_team', ''), column('away_team', ''), stats, additional,
+                   column('bet_type', '1X2'), column('league', ''))
+
+    @classmethod
+    def from_arrow(cls, table):
+        """to_arrow ile yazılmış pyarrow.Table'dan oluştur"""
+        return cls.from_frame(table.to_pandas())
+
+    def to_arrow(self):
+        """Sütunları pyarrow.Table olarak döndür (Parquet / IPC için)"""
+        import pyarrow as pa
+        columns = {
+            'home_team': pa.array(self.home_team, type=pa.string()),
+            'away_team': pa.array(self.away_team, type=pa.string()),
+            'bet_type': pa.array(self.bet_type, type=pa.string()),
+            'league': pa.array(self.league, type=pa.string()),
+        }
+        for j, name in enumerate(FEATURE_NAMES[0:6]):
+            columns[name] = pa.array(self.stats[:, j])
+        for j, name in enumerate(FEATURE_NAMES[9:15]):
+            columns[name] = pa.array(self.additional[:, j])
+        return pa.table(columns)
+
+    def features(self):
+        """(N, 15) özellik matrisi; istatistiği eksik maç varsa ValueError
+
+        Eksik değerler NaN olarak modele verilmez: NaN kabul eden modeller
+        (hist, RandomForest) hiçbir bilgi olmayan maç için yüksek güven döndürebilir.
+        """
+        missing = np.isnan(self.stats).any(axis=1)
+        if missing.any():
+            i = int(np.argmax(missing))
+            raise ValueError(
+                f"ML analizi için home_stats / away_stats gerekli: "
+                f"{self.home_team[i]} - {self.away_team[i]} ({int(missing.sum())} maç eksik)"
+            )
+        n = len(self)
+        X = np.empty((n, NUM_FEATURES))
+        X[:, 0:6] = self.stats
+        X[:, 6:9] = self.stats[:, 0:3] - self.stats[:, 3:6]
+        X[:, 9:15] = self.additional
+        return X
+
+    def keys(self):
+        """(ev, deplasman, bahis türü) demetleri; tekilleştirme ve önbellek anahtarı"""
+        return list(zip(self.home_team.tolist(), self.away_team.tolist(), self.bet_type.tolist()))
+
+    def __len__(self):
+        return len(self.home_team)
+
+    def __getitem__(self, i):
+        if not isinstance(i, (int, np.integer)):
+            return FixtureBatch(self.home_team[i], self.away_team[i], self.stats[i],
+                                self.additional[i], self.bet_type[i], self.league[i])
+        stats = self.stats[i]
+        has_home = not np.isnan(stats[0:3]).any()
+        has_away = not np.isnan(stats[3:6]).any()
+        return Fixture(
+            self.home_team[i], self.away_team[i],
+            TeamStats(*stats[0:3].tolist()) if has_home else None,
+            TeamStats(*stats[3:6].tolist()) if has_away else None,
+            tuple(self.additional[i].tolist()),
+            self.bet_type[i], self.league[i]
+        )
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def to_fixtures(self):
+        return list(self)
+
+    def to_dicts(self):
+        return [fixture.to_dict() for fixture in self]
+
+def as_fixture_batch(matches):
+    """FixtureBatch, Fixture listesi veya maç sözlükleri listesini FixtureBatch'e çevir"""
+    if isinstance(matches, FixtureBatch):
+        return matches
+    return FixtureBatch.from_fixtures(list(matches))
+
+def fixture_keys(matches):
+    """Her maç için (ev, deplasman, bahis türü); FixtureBatch'te sütunlardan okunur"""
+    if isinstance(matches, FixtureBatch):
+        return matches.keys()
+    return [(match['home_team'], match['away_team'], match.get('bet_type', '1X2')) for match in matches]
+
+@dataclass(slots=True)
+class PredictionBatch:
+    """(N, 3) 1X2 ve (N, 2) gol olasılıkları; sözlükler yalnızca istenirse üretilir"""
+    probs_1x2: np.ndarray
+    probs_goals: np.ndarray
+
+    def __len__(self):
+        return len(self.probs_1x2)
+
+    def labels_1x2(self):
+        return np.asarray(LABELS_1X2, dtype=object)[self.probs_1x2.argmax(axis=1)]
+
+    def labels_goals(self):
+        return np.asarray(LABELS_GOALS, dtype=object)[self.probs_goals.argmax(axis=1)]
+
+    def best_confidence(self):
+        """Maç başına 1X2 ve gol güvenlerinin büyüğü (0-1)"""
+        return np.maximum(self.probs_1x2.max(axis=1), self.probs_goals.max(axis=1))
+
+    def __getitem__(self, i):
+        return PredictionBatch(self.probs_1x2[i], self.probs_goals[i])
@@ -0,0 +1,147 @@
+# ingest.py
+"""Tarihsel maç verisini parça parça okuyup eğitime hazır özellik matrisine çeviren akış"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from fixtures import DEFAULT_ADDITIONAL_FEATURES, FEATURE_NAMES, NUM_FEATURES
+from rating_engine import TeamRatingEngine
+
+REQUIRED_COLUMNS = ['match_date', 'home_team', 'away_team', 'home_goals', 'away_goals']
+LABEL_COLUMNS = ['y_1x2', 'y_goals']
+
+def iter_match_chunks(path, chunk_size=100_000):
+    """CSV, JSON Lines veya Parquet dosyasını DataFrame parçaları halinde oku"""
+    ext = os.path.splitext(path)[1].lower()
+
+    if ext == '.csv':
+        yield from pd.read_csv(path, chunksize=chunk_size)
+    elif ext in ('.json', '.jsonl', '.ndjson'):
+        # Parça parça okuma için her satırda bir maç (JSON Lines) beklenir
+        yield from pd.read_json(path, lines=True, chunksize=chunk_size)
+    elif ext == '.parquet':
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        raise ValueError(f"Desteklenmeyen dosya türü: {path}")
+
+class MatchFeatureBuilder:
+    """Maçları zaman sırasıyla işleyip maç öncesi 15 özelliği üretir
+
+    Her maçın özellikleri yalnızca o maçtan önceki sonuçlardan hesaplanır,
+    ardından maç sonucu derecelendirmelere ve h2h geçmişine işlenir. Durum
+    takım ve eşleşme sayısıyla sınırlıdır, geçmişin uzunluğuyla büyümez.
+    """
+
+    def __init__(self, rating_engine=None):
+        self.rating_engine = rating_engine or TeamRatingEngine()
+        # Sıralı takım çifti -> [ilk takım galibiyeti, ikinci takım galibiyeti, maç, gol]
+        self.h2h = {}
+
+    def transform(self, chunk):
+        """Bir maç parçası için (X, y_1x2, y_goals) döndür ve durumu güncelle"""
+        missing = [column for column in REQUIRED_COLUMNS if column not in chunk.columns]
+        if missing:
+            raise ValueError(f"Eksik sütunlar: {missing}")
+
+        chunk = chunk.sort_values('match_date', kind='stable')
+        home_teams = chunk['home_team'].astype(str).to_numpy()
+        away_teams = chunk['away_team'].astype(str).to_numpy()
+        home_goals = chunk['home_goals'].to_numpy(dtype=np.int64)
+        away_goals = chunk['away_goals'].to_numpy(dtype=np.int64)
+
+        n = len(chunk)
+        X = np.empty((n, NUM_FEATURES))
+        X[:, 9:15] = DEFAULT_ADDITIONAL_FEATURES
+
+        # Takım durumu sıralı olduğundan bu döngü satır satır ilerler
+        engine = self.rating_engine
+        for i in range(n):
+            home, away = home_teams[i], away_teams[i]
+            home_stats = engine.ratings(home)
+            away_stats = engine.ratings(away)
+            X[i, 0:6] = (
+                home_stats['attack'], home_stats['defense'], home_stats['form'],
+                away_stats['attack'], away_stats['defense'], away_stats['form']
+            )
+
+            key = (home, away) if home <= away else (away, home)
+            record = self.h2h.get(key)
+            if record is not None:
+                home_wins, away_wins = (record[0], record[1]) if key[0] == home else (record[1], record[0])
+                X[i, 9] = home_wins / record[2]
+                X[i, 10] = away_wins / record[2]
+                X[i, 11] = record[3] / record[2]
+            else:
+                record = self.h2h[key] = [0, 0, 0, 0]
+
+            hg, ag = home_goals[i], away_goals[i]
+            if hg != ag:
+                winner_is_first = (hg > ag) == (key[0] == home)
+                record[0 if winner_is_first else 1] += 1
+            record[2] += 1
+            record[3] += hg + ag
+
+            engine.update({'home_team': home, 'away_team': away, 'home_goals': hg, 'away_goals': ag})
+
+        # Türetilmiş özellikler ve isteğe bağlı sütunlar vektörel doldurulur
+        X[:, 6:9] = X[:, 0:3] - X[:, 3:6]
+        for column, index in (('home_advantage', 12), ('weather_factor', 13), ('referee_factor', 14)):
+            if column in chunk.columns:
+                X[:, index] = chunk[column].fillna(DEFAULT_ADDITIONAL_FEATURES[index - 9]).to_numpy(dtype=float)
+
+        labels_1x2 = np.where(home_goals > away_goals, 0, np.where(home_goals < away_goals, 2, 1))
+        labels_goals = (home_goals + away_goals > 2.5).astype(np.int64)
+
+        return X, labels_1x2, labels_goals
+
+def ingest_matches(paths, output_path, chunk_size=100_000, builder=None):
+    """Maç dosyalarını akış halinde işleyip özellik matrisini Parquet'e yaz
+
+    Dosyalar (ve her dosyanın içi) eskiden yeniye sıralı olmalıdır; bellekte
+    her an yalnızca bir parça ve takım durumu tutulur. Yazılan satır sayısını döndürür.
+    """
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    builder = builder or MatchFeatureBuilder()
+
+    schema = pa.schema(
+        [(name, pa.float64()) for name in FEATURE_NAMES] +
+        [(name, pa.int8()) for name in LABEL_COLUMNS]
+    )
+
+    total = 0
+    with pq.ParquetWriter(output_path, schema) as writer:
+        for path in paths:
+            for chunk in iter_match_chunks(path, chunk_size):
+                X, labels_1x2, labels_goals = builder.transform(chunk)
+                columns = [pa.array(X[:, j]) for j in range(NUM_FEATURES)]
+                columns += [pa.array(labels_1x2.astype(np.int8)), pa.array(labels_goals.astype(np.int8))]
+                writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+                total += len(X)
+
+    return total
+
+def load_feature_matrix(path, mmap=True):
+    """ingest_matches çıktısını train_models'in beklediği (X, y_1x2, y_goals) olarak oku"""
+    table = pq.read_table(path, memory_map=mmap)
+    X = np.column_stack([table.column(name).to_numpy() for name in FEATURE_NAMES])
+    return (
+        X,
+        table.column('y_1x2').to_numpy().astype(np.int64),
+        table.column('y_goals').to_numpy().astype(np.int64)
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tarihsel maçlardan eğitim matrisi oluştur")
+    parser.add_argument('inputs', nargs='+', help="CSV / JSON Lines / Parquet maç dosyaları (eskiden yeniye)")
+    parser.add_argument('-o', '--output', default='training_features.parquet')
+    parser.add_argument('--chunk-size', type=int, default=100_000)
+    args = parser.parse_args()
+
+    rows = ingest_matches(args.inputs, args.output, args.chunk_size)
+    print(f"{rows} maç işlendi -> {args.output}")
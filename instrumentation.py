@@ -0,0 +1,185 @@
+# instrumentation.py
+"""Aşama süreleri, sayaçlar ve isteğe bağlı profil çıkarma
+
+Süreler histogramlarda, olaylar sayaçlarda toplanır; export_prometheus()
+Prometheus metin formatını üretir. 'kupon' logger'ı INFO seviyesinde
+açıksa her aşama tek satır JSON olarak loglanır.
+"""
+import bisect
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+logger = logging.getLogger('kupon')
+
+# Saniye cinsinden; tek maç çıkarımı milisaniye altında olduğundan alt sınır düşük tutulur
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+STAGE_HISTOGRAM = 'kupon_stage_duration_seconds'
+EVENT_COUNTER = 'kupon_events_total'
+
+class MetricsRegistry:
+    """İş parçacığı güvenli histogram ve sayaç deposu"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.help = {
+            STAGE_HISTOGRAM: "Analiz aşamalarının süresi",
+            EVENT_COUNTER: "Önbellek ve benzeri olayların sayısı"
+        }
+        # ad -> {etiketler: [kova sayıları, toplam, adet]}
+        self.histograms = {}
+        # ad -> {etiketler: değer}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, value, labels=()):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.histograms.setdefault(name, {}).get(labels)
+            if series is None:
+                series = self.histograms[name][labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def inc(self, name, labels=(), amount=1):
+        with self._lock:
+            family = self.counters.setdefault(name, {})
+            family[labels] = family.get(labels, 0) + amount
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def snapshot(self):
+        """Aşama başına adet/toplam/ortalama ve sayaçlar"""
+        with self._lock:
+            stages = {
+                _format_labels(labels): {'count': count, 'sum': total, 'mean': total / count}
+                for labels, (_, total, count) in self.histograms.get(STAGE_HISTOGRAM, {}).items()
+            }
+            events = {
+                _format_labels(labels): value
+                for labels, value in self.counters.get(EVENT_COUNTER, {}).items()
+            }
+        return {'stages': stages, 'events': events}
+
+    def export_prometheus(self):
+        """Tüm metrikleri Prometheus metin formatında döndür"""
+        lines = []
+        with self._lock:
+            for name, family in self.histograms.items():
+                lines.append(f"# HELP {name} {self.help.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+                for labels, (bucket_counts, total, count) in family.items():
+                    cumulative = itertools.accumulate(bucket_counts)
+                    bounds = [_format_float(bound) for bound in self.buckets] + ['+Inf']
+                    for bound, value in zip(bounds, cumulative):
+                        lines.append(f"{name}_bucket{_format_labels(labels + (('le', bound),))} {value}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {total!r}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {count}")
+            for name, family in self.counters.items():
+                lines.append(f"# HELP {name} {self.help.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in family.items():
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+        return '\n'.join(lines) + '\n'
+
+def _format_float(value):
+    return repr(float(value))
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+# Süreç genelindeki varsayılan kayıt
+metrics = MetricsRegistry()
+
+@contextmanager
+def timed(stage, **labels):
+    """Bloğun süresini stage etiketiyle histograma yaz"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        label_items = (('stage', stage),) + tuple(sorted(labels.items()))
+        metrics.observe(STAGE_HISTOGRAM, elapsed, label_items)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({'event': 'stage', 'stage': stage, 'duration_ms': round(elapsed * 1000, 3), **labels}))
+
+def count(event, amount=1, **labels):
+    """Olay sayacını artır"""
+    metrics.inc(EVENT_COUNTER, (('event', event),) + tuple(sorted(labels.items())), amount)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(json.dumps({'event': event, 'amount': amount, **labels}))
+
+def export_prometheus():
+    return metrics.export_prometheus()
+
+# --- Profil çıkarma (isteğe bağlı) ---
+
+_profiling = {
+    'enabled': os.environ.get('KUPON_PROFILE', '') not in ('', '0'),
+    'output_dir': os.environ.get('KUPON_PROFILE_DIR', 'profiles'),
+    'engine': os.environ.get('KUPON_PROFILER', 'cprofile')
+}
+_profile_counter = itertools.count()
+_profile_state = threading.local()
+
+def enable_profiling(output_dir='profiles', engine='cprofile'):
+    """Her analiz için profil dosyası yazmayı aç ('cprofile' veya 'pyinstrument')"""
+    if engine not in ('cprofile', 'pyinstrument'):
+        raise ValueError(f"Bilinmeyen profil motoru: {engine}")
+    _profiling.update(enabled=True, output_dir=output_dir, engine=engine)
+
+def disable_profiling():
+    _profiling['enabled'] = False
+
+@contextmanager
+def profile_analysis(name):
+    """Profil açıksa bloğu profille ve dosyaya yaz; iç içe çağrılar dıştakine dahil olur"""
+    if not _profiling['enabled'] or getattr(_profile_state, 'active', False):
+        yield None
+        return
+
+    os.makedirs(_profiling['output_dir'], exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    base = os.path.join(_profiling['output_dir'], f"{name}-{stamp}-{os.getpid()}-{next(_profile_counter)}")
+
+    _profile_state.active = True
+    try:
+        if _profiling['engine'] == 'pyinstrument':
+            from pyinstrument import Profiler
+
+            profiler = Profiler()
+            profiler.start()
+            try:
+                yield base + '.html'
+            finally:
+                profiler.stop()
+                with open(base + '.html', 'w', encoding='utf-8') as f:
+                    f.write(profiler.output_html())
+        else:
+            import cProfile
+
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield base + '.prof'
+            finally:
+                profiler.disable()
+                profiler.dump_stats(base + '.prof')
+    finally:
+        _profile_state.active = False
@@ -0,0 +1,125 @@
+# kupon_engine.py
+"""Kombine ve sistem kuponları için kesin olasılık ve beklenen ödeme hesabı
+
+Maçların bağımsız olduğu varsayılır. Tutan maç sayısının dağılımı
+Poisson-binom evrişimiyle, "k / n" sistemin beklenen ödemesi ise
+p_i * oran_i değerlerinin k. elementer simetrik polinomuyla O(n * k)
+dinamik programlamayla hesaplanır; alt kümeler tek tek sayılmaz.
+Tüm fonksiyonlar (kupon sayısı, maç sayısı) boyutlu dizilerle çalışır,
+böylece binlerce aday kupon tek seferde değerlendirilir.
+"""
+from math import comb
+
+import numpy as np
+
+def _as_2d(values):
+    values = np.asarray(values, dtype=float)
+    return values[np.newaxis, :] if values.ndim == 1 else values
+
+def _check_mask(probs, mask):
+    if mask is None:
+        return np.ones(probs.shape, dtype=bool)
+    mask = np.broadcast_to(np.asarray(mask, dtype=bool), probs.shape)
+    return mask
+
+def hit_distribution(probs, mask=None):
+    """Tutan maç sayısının kesin dağılımı (Poisson-binom)
+
+    probs: (n,) veya (kupon, n) maç başına tutma olasılıkları.
+    mask: farklı uzunluktaki kuponlar için geçerli maçları gösteren aynı boyutlu dizi.
+    Dönüş: (kupon, n + 1); [c, j] = c kuponunda tam j maçın tutma olasılığı.
+    """
+    probs = _as_2d(probs)
+    mask = _check_mask(probs, mask)
+    num_coupons, n = probs.shape
+
+    dist = np.zeros((num_coupons, n + 1))
+    dist[:, 0] = 1.0
+    for i in range(n):
+        # Maskelenen maç olasılığı 0 alınır: dağılımı değiştirmez
+        p = np.where(mask[:, i], probs[:, i], 0.0)[:, np.newaxis]
+        dist[:, 1:i + 2] = dist[:, 1:i + 2] * (1 - p) + dist[:, 0:i + 1] * p
+        dist[:, 0:1] *= 1 - p
+    return dist
+
+def elementary_symmetric(values, max_order=None, mask=None):
+    """e_0..e_k elementer simetrik polinomları: e_k = tüm k'lı alt kümelerin çarpım toplamı
+
+    Dönüş: (kupon, k + 1)
+    """
+    values = _as_2d(values)
+    mask = _check_mask(values, mask)
+    num_coupons, n = values.shape
+    k = n if max_order is None else min(max_order, n)
+
+    e = np.zeros((num_coupons, k + 1))
+    e[:, 0] = 1.0
+    for i in range(n):
+        v = np.where(mask[:, i], values[:, i], 0.0)[:, np.newaxis]
+        top = min(i + 1, k)
+        # Yukarıdan aşağı güncelleme: e_j += e_{j-1} * v
+        e[:, 1:top + 1] += e[:, 0:top] * v
+    return e
+
+def system_bet(probs, odds, sizes=None, stake_per_combination=1.0, mask=None):
+    """Sistem kuponu ("k / n") için her k değerinde kesin sonuçlar
+
+    Her k için:
+      combinations     : C(n, k) kombinasyon sayısı
+      stake            : toplam yatırılan tutar
+      hit_probability  : en az bir kombinasyonun tutma olasılığı = P(tutan >= k)
+      expected_payout  : beklenen toplam ödeme = stake_per_combination * e_k(p * oran)
+      expected_value   : beklenen ödeme / yatırılan tutar - 1
+    Dönüş: {k: {...}}; her değer kupon başına bir dizi.
+    """
+    probs = _as_2d(probs)
+    odds = _as_2d(odds)
+    mask = _check_mask(probs, mask)
+    n_per_coupon = mask.sum(axis=1)
+    n = probs.shape[1]
+    sizes = list(range(1, n + 1)) if sizes is None else list(sizes)
+    if not sizes:
+        raise ValueError("Sistem boyutu listesi boş olamaz")
+    invalid = [k for k in sizes if not 1 <= k <= n]
+    if invalid:
+        raise ValueError(f"Sistem boyutları 1 ile maç sayısı ({n}) arasında olmalı: {invalid}")
+
+    dist = hit_distribution(probs, mask)
+    # P(tutan >= k): dağılımın sağdan kümülatif toplamı
+    at_least = np.cumsum(dist[:, ::-1], axis=1)[:, ::-1]
+    e = elementary_symmetric(probs * odds, max(sizes), mask)
+
+    results = {}
+    for k in sizes:
+        combinations = np.array([comb(int(m), k) for m in n_per_coupon], dtype=float)
+        stake = combinations * stake_per_combination
+        expected_payout = e[:, k] * stake_per_combination
+        with np.errstate(divide='ignore', invalid='ignore'):
+            expected_value = np.where(stake > 0, expected_payout / stake - 1, 0.0)
+        results[k] = {
+            'combinations': combinations,
+            'stake': stake,
+            'hit_probability': at_least[:, k],
+            'expected_payout': expected_payout,
+            'expected_value': expected_value
+        }
+    return results
+
+def analyze_system_kupon(probs, odds, sizes=None, stake_per_combination=1.0):
+    """Tek bir kupon için okunabilir özet: {k: {...}} yüzde ve yuvarlanmış değerlerle"""
+    results = system_bet(np.asarray(probs)[np.newaxis, :], np.asarray(odds)[np.newaxis, :],
+                         sizes, stake_per_combination)
+    dist = hit_distribution(probs)[0]
+    return {
+        'hit_distribution': [round(float(p) * 100, 2) for p in dist],
+        'systems': {
+            f"{k}/{len(probs)}": {
+                'combinations': int(result['combinations'][0]),
+                'stake': round(float(result['stake'][0]), 2),
+                'hit_probability': round(float(result['hit_probability'][0]) * 100, 2),
+                'expected_payout': round(float(result['expected_payout'][0]), 2),
+                'expected_value': round(float(result['expected_value'][0]), 4)
+            }
+            for k, result in results.items()
+        }
+    }
@@ -1,9 +1,68 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from fixtures import fixture_keys
+from instrumentation import profile_analysis, timed
+
+class TeamStrengthIndex:
+    """Bir ligdeki takım güçlerinin dizi tabanlı önbelleği
+
+    0. konum bilinmeyen takımlar içindir (güç 5.0, ev avantajı yok). Ev ve
+    deplasman güç vektörleri ile N×N fark matrisi (diff[i, j] = ev_i - deplasman_j)
+    bir kez hesaplanır; tek takımın değerleri değişince yalnızca o takımın
+    konumu, satırı ve sütunu güncellenir.
+    """
+
+    def __init__(self, team_stats=()):
+        self.rebuild(team_stats)
+
+    def rebuild(self, team_stats):
+        """İndeksi baştan kur"""
+        self.positions = {}
+        self.size = 1
+        self._allocate(max(len(team_stats) + 1, 8))
+        for team, stats in dict(team_stats).items():
+            self.update(team, stats)
+
+    def _allocate(self, capacity):
+        # Diziler kapasiteyle ayrılır; takım eklendikçe ikiye katlanır
+        old = getattr(self, 'home_strength', None)
+        attack = np.full(capacity, 5.0)
+        home_strength = np.full(capacity, 5.0)
+        away_strength = np.full(capacity, 5.0)
+        diff = np.zeros((capacity, capacity))
+        if old is not None:
+            n = self.size
+            attack[:n] = self.attack[:n]
+            home_strength[:n] = self.home_strength[:n]
+            away_strength[:n] = self.away_strength[:n]
+            diff[:n, :n] = self.diff[:n, :n]
+        self.attack, self.home_strength, self.away_strength, self.diff = attack, home_strength, away_strength, diff
+
+    def update(self, team, stats):
+        """Tek takımın değerlerini yaz, fark matrisinde yalnızca satır ve sütununu yenile"""
+        i = self.positions.get(team)
+        if i is None:
+            if self.size == len(self.home_strength):
+                self._allocate(2 * self.size)
+            i = self.positions[team] = self.size
+            self.size += 1
+
+        strength = (stats['attack'] + stats['defense'] + stats['form']) / 3
+        self.attack[i] = stats['attack']
+        self.away_strength[i] = strength
+        self.home_strength[i] = strength * stats.get('home_advantage', 1.0)
+
+        n = self.size
+        self.diff[i, :n] = self.home_strength[i] - self.away_strength[:n]
+        self.diff[:n, i] = self.home_strength[:n] - self.away_strength[i]
+
+    def strength_matrix(self):
+        """(takımlar, N×N fark matrisi); bilinmeyen takım satırı hariç"""
+        return list(self.positions), self.diff[1:self.size, 1:self.size]
 
 class KuponAnalyzer:
-    def __init__(self):
+    def __init__(self, store=None, league=None):
         # Basit takım verileri (gerçek API'den gelecek)
         self.team_stats = {
             'Galatasaray': {'attack': 8.5, 'defense': 7.0, 'form': 8.0, 'home_advantage': 1.2},
@@ -11,27 +70,89 @@ class KuponAnalyzer:
             'Besiktas': {'attack': 7.5, 'defense': 6.5, 'form': 6.0, 'home_advantage': 1.0},
             'Trabzonspor': {'attack': 7.0, 'defense': 6.0, 'form': 6.5, 'home_advantage': 1.1}
         }
-    
-    def calculate_team_strength(self, team_name, is_home=False):
-        """Takım gücünü hesapla"""
-        if team_name not in self.team_stats:
-            return 5.0  # Varsayılan değer
+        # Takım -> lig; güç indeksleri ve fark matrisleri lig başına tutulur
+        self.team_leagues = dict.fromkeys(self.team_stats, '')
         
-        stats = self.team_stats[team_name]
-        strength = (stats['attack'] + stats['defense'] + stats['form']) / 3
+        # Yerel depodaki değerler varsayılanların üzerine yazılır
+        self.store = store
+        if store is not None:
+            self.team_stats.update(store.all_team_ratings(league))
+            self.team_leagues.update(store.team_leagues(league))
         
-        if is_home:
-            strength *= stats['home_advantage']
+        self.refresh_index()
+    
+    def refresh_index(self):
+        """Lig indekslerini team_stats'tan baştan kur
+
+        team_stats doğrudan (ör. yerinde) değiştirildiyse çağrılmalıdır; tek
+        takımın değişikliği için update_team yeterlidir.
+        """
+        by_league = {}
+        for team, stats in self.team_stats.items():
+            by_league.setdefault(self.team_leagues.get(team, ''), {})[team] = stats
+        self.team_indexes = {league: TeamStrengthIndex(stats) for league, stats in by_league.items()}
+        # Hiçbir ligde olmayan takımlar için yalnızca varsayılan konumu olan indeks
+        self._unknown_index = TeamStrengthIndex()
+    
+    def update_team(self, team, stats, league=None):
+        """Tek takımın değerlerini yaz; yalnızca kendi lig indeksinde konumu, satırı ve sütunu yenilenir
+
+        league verilmezse takımın mevcut ligi (yeni takımda '') kullanılır.
+        """
+        old_league = self.team_leagues.get(team)
+        if league is None:
+            league = old_league if old_league is not None else ''
+        self.team_stats[team] = stats
+        self.team_leagues[team] = league
         
-        return strength
+        if old_league is not None and old_league != league and old_league in self.team_indexes:
+            # Lig değişti: eski ligin indeksi takımsız yeniden kurulur
+            self.team_indexes[old_league] = TeamStrengthIndex({
+                name: values for name, values in self.team_stats.items()
+                if self.team_leagues.get(name, '') == old_league
+            })
+        self.team_indexes.setdefault(league, TeamStrengthIndex()).update(team, stats)
+    
+    def strength_matrix(self, league=''):
+        """Ligin (takımlar, N×N ev - deplasman güç farkı matrisi)"""
+        return self.team_indexes[league].strength_matrix()
+    
+    def _locate(self, team):
+        """Takımın (lig, indeks içi konum); bilinmeyen takım (None, 0)"""
+        league = self.team_leagues.get(team)
+        index = self.team_indexes.get(league)
+        if index is None or team not in index.positions:
+            return None, 0
+        return league, index.positions[team]
+    
+    def _pair_indexes(self, home_league, away_league):
+        # Bilinmeyen takım rakibin indeksindeki varsayılan konumu (0) kullanır
+        home_league = away_league if home_league is None else home_league
+        away_league = home_league if away_league is None else away_league
+        if home_league is None:
+            return self._unknown_index, self._unknown_index
+        return self.team_indexes[home_league], self.team_indexes[away_league]
+    
+    def calculate_team_strength(self, team_name, is_home=False):
+        """Takım gücünü lig indeksinden oku (bilinmeyen takım 5.0)"""
+        league, i = self._locate(team_name)
+        index = self._unknown_index if league is None else self.team_indexes[league]
+        strengths = index.home_strength if is_home else index.away_strength
+        return float(strengths[i])
     
     def analyze_match(self, home_team, away_team, bet_type="1X2"):
         """Maç analizi yap"""
-        home_strength = self.calculate_team_strength(home_team, is_home=True)
-        away_strength = self.calculate_team_strength(away_team, is_home=False)
+        home_league, home = self._locate(home_team)
+        away_league, away = self._locate(away_team)
+        home_index, away_index = self._pair_indexes(home_league, away_league)
+        home_strength = float(home_index.home_strength[home])
+        away_strength = float(away_index.away_strength[away])
         
-        # Basit tahmin algoritması
-        strength_diff = home_strength - away_strength
+        # Basit tahmin algoritması (aynı ligde fark matrisinden okunur)
+        if home_index is away_index:
+            strength_diff = float(home_index.diff[home, away])
+        else:
+            strength_diff = home_strength - away_strength
         
         # 1X2 analizi
         if bet_type == "1X2":
@@ -47,8 +168,7 @@ class KuponAnalyzer:
         
         # Alt/Üst 2.5 gol analizi
         elif bet_type == "O/U2.5":
-            total_attack = (self.team_stats.get(home_team, {}).get('attack', 5) + 
-                          self.team_stats.get(away_team, {}).get('attack', 5)) / 2
+            total_attack = float(home_index.attack[home] + away_index.attack[away]) / 2
             if total_attack > 7.5:
                 prediction = "Üst 2.5"
                 confidence = min(75, 50 + (total_attack - 7.5) * 10)
@@ -56,6 +176,9 @@ class KuponAnalyzer:
                 prediction = "Alt 2.5"
                 confidence = min(75, 50 + (7.5 - total_attack) * 10)
         
+        else:
+            raise ValueError(f"Bilinmeyen bahis türü: {bet_type}")
+        
         return {
             'home_team': home_team,
             'away_team': away_team,
@@ -66,6 +189,78 @@ class KuponAnalyzer:
             'risk_level': self.calculate_risk(confidence)
         }
     
+    def analyze_round(self, matches):
+        """Maç listesini (ör. bir haftanın tamamı) lig indeksleri üzerinde vektörel analiz et
+
+        matches: maç sözlükleri, Fixture listesi veya FixtureBatch. Maçlar lig
+        çiftine göre gruplanır, her grup tek dizi okumasıyla işlenir. Sonuçlar
+        analyze_match ile aynıdır.
+        """
+        keys = fixture_keys(matches)
+        if not keys:
+            return []
+        home_teams, away_teams, bet_types = zip(*keys)
+        unknown = set(bet_types) - {'1X2', 'O/U2.5'}
+        if unknown:
+            raise ValueError(f"Bilinmeyen bahis türü: {unknown.pop()}")
+        
+        n = len(keys)
+        home = np.empty(n, dtype=np.intp)
+        away = np.empty(n, dtype=np.intp)
+        groups = {}
+        for row, (home_team, away_team) in enumerate(zip(home_teams, away_teams)):
+            home_league, home[row] = self._locate(home_team)
+            away_league, away[row] = self._locate(away_team)
+            groups.setdefault((home_league, away_league), []).append(row)
+        
+        home_strength = np.empty(n)
+        away_strength = np.empty(n)
+        strength_diff = np.empty(n)
+        attack_sum = np.empty(n)
+        for leagues, rows in groups.items():
+            home_index, away_index = self._pair_indexes(*leagues)
+            rows = np.asarray(rows)
+            h, a = home[rows], away[rows]
+            home_strength[rows] = home_index.home_strength[h]
+            away_strength[rows] = away_index.away_strength[a]
+            attack_sum[rows] = home_index.attack[h] + away_index.attack[a]
+            if home_index is away_index:
+                strength_diff[rows] = home_index.diff[h, a]
+            else:
+                strength_diff[rows] = home_strength[rows] - away_strength[rows]
+        
+        abs_diff = np.abs(strength_diff)
+        total_attack = attack_sum / 2
+        
+        is_1x2 = np.array(bet_types) == '1X2'
+        prediction = np.where(
+            is_1x2,
+            np.where(strength_diff > 1.5, '1', np.where(strength_diff < -1.5, '2', 'X')),
+            np.where(total_attack > 7.5, 'Üst 2.5', 'Alt 2.5')
+        )
+        confidence = np.where(
+            is_1x2,
+            np.where(abs_diff > 1.5, np.minimum(80, 60 + abs_diff * 10), 50 + (10 - abs_diff * 5)),
+            np.minimum(75, 50 + np.abs(total_attack - 7.5) * 10)
+        )
+        risk_level = np.where(confidence >= 70, 'Düşük', np.where(confidence >= 55, 'Orta', 'Yüksek'))
+        
+        return [
+            {
+                'home_team': home_team,
+                'away_team': away_team,
+                'prediction': pred,
+                'confidence': round(conf, 1),
+                'home_strength': round(home_str, 2),
+                'away_strength': round(away_str, 2),
+                'risk_level': risk
+            }
+            for home_team, away_team, pred, conf, home_str, away_str, risk in zip(
+                home_teams, away_teams, prediction.tolist(), confidence.tolist(),
+                home_strength.tolist(), away_strength.tolist(), risk_level.tolist()
+            )
+        ]
+    
     def calculate_risk(self, confidence):
         """Risk seviyesi hesapla"""
         if confidence >= 70:
@@ -77,16 +272,17 @@ class KuponAnalyzer:
     
     def analyze_kupon(self, matches):
         """Tüm kuponu analiz et"""
-        kupon_analizi = []
+        with profile_analysis('analyze_kupon'), timed('analyze_kupon', analyzer='mvp'):
+            return self._analyze_kupon(matches)
+    
+    def _analyze_kupon(self, matches):
+        # matches: maç sözlükleri, Fixture listesi veya FixtureBatch
+        return self.summarize_kupon(self.analyze_round(matches))
+    
+    def summarize_kupon(self, kupon_analizi):
+        """Maç analizlerinden kupon özetini oluştur"""
         total_confidence = 1.0
-        
-        for match in matches:
-            analiz = self.analyze_match(
-                match['home_team'], 
-                match['away_team'], 
-                match.get('bet_type', '1X2')
-            )
-            kupon_analizi.append(analiz)
+        for analiz in kupon_analizi:
             total_confidence *= (analiz['confidence'] / 100)
         
         kupon_confidence = total_confidence * 100
@@ -95,7 +291,7 @@ class KuponAnalyzer:
             'matches': kupon_analizi,
             'kupon_confidence': round(kupon_confidence, 2),
             'recommendation': self.get_recommendation(kupon_confidence),
-            'total_matches': len(matches)
+            'total_matches': len(kupon_analizi)
         }
     
     def get_recommendation(self, confidence):
@@ -0,0 +1,138 @@
+# kupon_optimizer.py
+"""Maç havuzundan en iyi K kuponu seçen dal-sınır (branch and bound) arama"""
+import heapq
+import itertools
+import math
+
+# Pazar -> (olasılık tablosu, olasılık anahtarı, oran anahtarı)
+MARKETS = {
+    '1': ('1x2_probabilities', '1', '1'),
+    'X': ('1x2_probabilities', 'X', 'X'),
+    '2': ('1x2_probabilities', '2', '2'),
+    'Üst 2.5': ('goals_probabilities', 'Üst 2.5', 'over_2_5'),
+    'Alt 2.5': ('goals_probabilities', 'Alt 2.5', 'under_2_5'),
+}
+
+def build_pick_pool(fixtures, markets=None, min_probability=0.0):
+    """Maçları seçilebilir tahminlere çevir
+
+    Her maç {'home_team', 'away_team', 'prediction', 'odds', ['league']} içerir;
+    prediction MLKuponAnalyzer çıktısı, odds get_current_odds çıktısıdır.
+    """
+    markets = markets or list(MARKETS)
+    pool = []
+    for index, fixture in enumerate(fixtures):
+        picks = []
+        for market in markets:
+            table, prob_key, odds_key = MARKETS[market]
+            probability = fixture['prediction'][table][prob_key] / 100
+            odd = fixture['odds'].get(odds_key)
+            if not odd or odd <= 1 or probability <= min_probability:
+                continue
+            picks.append({
+                'fixture': index,
+                'home_team': fixture['home_team'],
+                'away_team': fixture['away_team'],
+                'league': fixture.get('league', ''),
+                'market': market,
+                'probability': probability,
+                'odds': odd
+            })
+        if picks:
+            pool.append(picks)
+    return pool
+
+def fixture_pool_from_analyzer(analyzer, fixtures, data_collector):
+    """Maçları MLKuponAnalyzer ile toplu tahmin edip oranlarla birleştir"""
+    predictions = analyzer.predict_matches_batch(fixtures) or []
+    return [
+        dict(fixture, prediction=prediction,
+             odds=fixture.get('odds') or data_collector.get_current_odds(
+                 {'home': fixture['home_team'], 'away': fixture['away_team']}))
+        for fixture, prediction in zip(fixtures, predictions)
+    ]
+
+def optimize_kupon(fixtures, size=4, top_k=10, objective='ev', min_total_odds=None,
+                   max_correlated=None, group_key='league', markets=None, min_probability=0.0):
+    """Kısıtlara uyan en iyi top_k kuponu döndür
+
+    objective: 'ev' (p * oran çarpımı, beklenen getiri) veya 'hit' (tutma olasılığı)
+    min_total_odds: kuponun toplam oranı için alt sınır
+    max_correlated: aynı gruptan (varsayılan: lig) en fazla kaç tahmin seçilebileceği
+    Maç başına en fazla bir tahmin seçilir.
+    """
+    if objective not in ('ev', 'hit'):
+        raise ValueError(f"Bilinmeyen amaç: {objective}")
+
+    pool = build_pick_pool(fixtures, markets, min_probability)
+
+    def score(pick):
+        value = pick['probability'] * pick['odds'] if objective == 'ev' else pick['probability']
+        return math.log(value)
+
+    # Maçlar en iyi tahmin puanına göre azalan sırada: kalan r maç için üst sınır
+    # sıradaki r maçın en iyi puanlarının toplamıdır (önek toplamıyla O(1))
+    for picks in pool:
+        for pick in picks:
+            pick['_score'] = score(pick)
+        picks.sort(key=lambda pick: pick['_score'], reverse=True)
+    pool.sort(key=lambda picks: picks[0]['_score'], reverse=True)
+
+    best = [picks[0]['_score'] for picks in pool]
+    prefix = [0.0] + list(itertools.accumulate(best))
+    n = len(pool)
+
+    heap = []
+    tie = itertools.count()
+    group_counts = {}
+    chosen = []
+    log_min_odds = math.log(min_total_odds) if min_total_odds else None
+
+    def threshold():
+        return heap[0][0] if len(heap) >= top_k else -math.inf
+
+    def search(start, total_score, total_log_odds):
+        remaining = size - len(chosen)
+        if remaining == 0:
+            if log_min_odds is not None and total_log_odds < log_min_odds:
+                return
+            entry = (total_score, next(tie), list(chosen))
+            if len(heap) < top_k:
+                heapq.heappush(heap, entry)
+            elif total_score > heap[0][0]:
+                heapq.heapreplace(heap, entry)
+            return
+
+        for j in range(start, n - remaining + 1):
+            # Sıralama sayesinde sınır j arttıkça azalır: aşılamıyorsa döngü biter
+            if total_score + prefix[j + remaining] - prefix[j] <= threshold():
+                break
+            for pick in pool[j]:
+                if total_score + pick['_score'] + prefix[j + remaining] - prefix[j + 1] <= threshold():
+                    break
+                group = pick.get(group_key) if max_correlated is not None else None
+                if group is not None and group_counts.get(group, 0) >= max_correlated:
+                    continue
+                if group is not None:
+                    group_counts[group] = group_counts.get(group, 0) + 1
+                chosen.append(pick)
+                search(j + 1, total_score + pick['_score'], total_log_odds + math.log(pick['odds']))
+                chosen.pop()
+                if group is not None:
+                    group_counts[group] -= 1
+
+    if n >= size:
+        search(0, 0.0, 0.0)
+
+    results = []
+    for total_score, _, picks in sorted(heap, reverse=True):
+        hit_probability = math.prod(pick['probability'] for pick in picks)
+        total_odds = math.prod(pick['odds'] for pick in picks)
+        results.append({
+            'picks': [{key: value for key, value in pick.items() if key != '_score'} for pick in picks],
+            'size': len(picks),
+            'total_odds': round(total_odds, 2),
+            'hit_probability': round(hit_probability * 100, 2),
+            'expected_value': round(hit_probability * total_odds - 1, 4)
+        })
+    return results
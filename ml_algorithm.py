@@ -1,18 +1,241 @@
-import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+import copy
+from collections import deque
+from dataclasses import dataclass, asdict
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, HistGradientBoostingClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import accuracy_score, classification_report
+from sklearn.metrics import accuracy_score
 import joblib
-from datetime import datetime, timedelta
+import os
+import threading
+from datetime import datetime
+from calibration import ProbabilityCalibrator, reliability_report
+from fixtures import (FEATURE_NAMES, LABELS_1X2, LABELS_GOALS, NUM_FEATURES, Fixture,
+                      PredictionBatch, as_fixture_batch)
+from instrumentation import count, profile_analysis, timed
+
+# Model paketi: iki model, scaler ve özellik şeması tek dosyada tutulur
+MODEL_BUNDLE_VERSION = 1
+DEFAULT_BUNDLE_PATH = 'kupon_models.joblib'
+
+@dataclass
+class TrainingConfig:
+    """Model eğitim ayarları"""
+    num_samples: int = 2000
+    test_size: float = 0.2
+    random_state: int = 42
+    # 1X2 motoru: 'gbm' (GradientBoosting) veya 'hist' (HistGradientBoosting)
+    engine_1x2: str = 'gbm'
+    n_estimators_1x2: int = 100
+    max_depth_1x2: int = 6
+    learning_rate_1x2: float = 0.1
+    n_estimators_goals: int = 100
+    max_depth_goals: int = 8
+    # Kullanılacak toplam çekirdek sayısı (-1 = hepsi) ve joblib backend'i
+    n_jobs: int = -1
+    backend: str = 'loky'
+    # Olasılık kalibrasyonu: 'isotonic', 'sigmoid' (Platt) veya None; eğitim
+    # verisinin calibration_size kadarı modellerden ayrılıp kalibratörlere verilir
+    calibration: str = 'isotonic'
+    calibration_size: float = 0.2
+    # Çevrimiçi güncelleme: her güncellemede eklenen ağaç sayısı, tam yeniden
+    # eğitimden önce izin verilen en fazla ağaç sayısı ve özellik penceresi (maç)
+    online_estimators: int = 10
+    online_max_estimators: int = 300
+    online_window: int = 50_000
+    # True: 1X2 ve gol pazarları tek bir çok çıktılı RandomForest ile tek geçişte tahmin edilir
+    multi_output: bool = False
+    n_estimators_multi: int = 150
+    max_depth_multi: int = 10
+
+def build_model_1x2(config):
+    """Ayarlara göre 1X2 modelini oluştur"""
+    if config.engine_1x2 == 'hist':
+        return HistGradientBoostingClassifier(
+            max_iter=config.n_estimators_1x2,
+            max_depth=config.max_depth_1x2,
+            learning_rate=config.learning_rate_1x2,
+            random_state=config.random_state
+        )
+    if config.engine_1x2 == 'gbm':
+        return GradientBoostingClassifier(
+            n_estimators=config.n_estimators_1x2,
+            max_depth=config.max_depth_1x2,
+            learning_rate=config.learning_rate_1x2,
+            random_state=config.random_state
+        )
+    raise ValueError(f"Bilinmeyen 1X2 motoru: {config.engine_1x2}")
+
+def build_model_goals(config):
+    """Ayarlara göre gol modelini oluştur"""
+    return RandomForestClassifier(
+        n_estimators=config.n_estimators_goals,
+        max_depth=config.max_depth_goals,
+        random_state=config.random_state,
+        n_jobs=config.n_jobs
+    )
+
+class FeatureWindow:
+    """Son max_rows maçın özellik ve etiketlerini tutan kayan pencere
+
+    Parçalar (ör. maç günleri) eklendikçe tutulur; pencere taşınca en eski
+    parçalar düşer. Özellikler bir kez hesaplanır, yeniden eğitimlerde tekrar kullanılır.
+    base ile verilen (ör. pakette kayıtlı, belleğe eşlenmiş) diziler kopyalanmadan
+    tutulur; birleştirme ancak yeni parça eklenip arrays() çağrılınca olur.
+    """
+
+    def __init__(self, max_rows=50_000, base=None):
+        self.max_rows = max_rows
+        self.chunks = deque()
+        self.rows = 0
+        if base is not None:
+            X, y_1x2, y_goals = base
+            start = max(len(X) - max_rows, 0)
+            self.chunks.append((X[start:], y_1x2[start:], y_goals[start:]))
+            self.rows = len(X) - start
+
+    def __len__(self):
+        return self.rows
+
+    def append(self, X, y_1x2, y_goals):
+        # Yalnızca son max_rows satırın kopyası tutulur; çağıranın (ör. tüm eğitim
+        # matrisi veya belleğe eşlenmiş paket) dizisi pencerede canlı kalmaz
+        start = max(len(X) - self.max_rows, 0)
+        self.chunks.append((np.array(X[start:], dtype=float), np.array(y_1x2[start:]), np.array(y_goals[start:])))
+        self.rows += len(X) - start
+        while len(self.chunks) > 1 and self.rows - len(self.chunks[0][0]) >= self.max_rows:
+            self.rows -= len(self.chunks.popleft()[0])
+
+    def arrays(self):
+        """Penceredeki son max_rows satır: (X, y_1x2, y_goals)"""
+        if len(self.chunks) == 1:
+            X, y_1x2, y_goals = self.chunks[0]
+        else:
+            X, y_1x2, y_goals = (np.concatenate(parts) for parts in zip(*self.chunks))
+        start = max(len(X) - self.max_rows, 0)
+        return X[start:], y_1x2[start:], y_goals[start:]
+
+def _match_labels(home_goals, away_goals):
+    """Skorlardan 1X2 (0 ev, 1 beraberlik, 2 deplasman) ve 2.5 üst/alt etiketleri"""
+    home_goals = np.asarray(home_goals)
+    away_goals = np.asarray(away_goals)
+    labels_1x2 = np.where(home_goals > away_goals, 0, np.where(home_goals < away_goals, 2, 1))
+    return labels_1x2, (home_goals + away_goals > 2.5).astype(np.int64)
+
+def _can_warm_start(model, y, extra, max_estimators):
+    """Modele ağaç eklenerek güncellenebilir mi?
+
+    HistGradientBoosting her fit'te kutulamayı yeniden öğrendiği için eski
+    ağaçlarla uyumsuz olur; sınıf kümesi değişince de warm_start kullanılamaz.
+    """
+    if not isinstance(model, (GradientBoostingClassifier, RandomForestClassifier)):
+        return False
+    # Çok çıktılı modelde her çıktının sınıf kümesi ayrı kontrol edilir
+    columns = y.T if y.ndim == 2 else [y]
+    classes = model.classes_ if isinstance(model.classes_, list) else [model.classes_]
+    return (
+        model.n_estimators + extra <= max_estimators
+        and all(np.array_equal(np.unique(column), known) for column, known in zip(columns, classes))
+    )
+
+def build_model_multi(config):
+    """Tüm pazarları (1X2, gol) ortak ağaçlarla tahmin eden çok çıktılı model
+
+    Ağaç yapısı pazarlar arasında paylaşılır; yeni bir pazar yalnızca yapraklara
+    bir olasılık vektörü ekler, ayrı bir model gerektirmez.
+    """
+    return RandomForestClassifier(
+        n_estimators=config.n_estimators_multi,
+        max_depth=config.max_depth_multi,
+        random_state=config.random_state,
+        n_jobs=config.n_jobs
+    )
+
+def _fit_model(model, X, y):
+    """Tek bir modeli eğit (paralel işçide çalışabilir)"""
+    model.fit(X, y)
+    # n_jobs yalnızca eğitim için; küçük tahmin çağrılarında iş parçacığı maliyeti baskın olur
+    if hasattr(model, 'n_jobs'):
+        model.n_jobs = None
+    return model
+
+# Süreç genelinde yüklenmiş paketler: (mutlak yol, mtime, mmap_mode) -> paket
+_bundle_cache = {}
+_bundle_cache_lock = threading.Lock()
+
+def save_model_bundle(bundle, path=DEFAULT_BUNDLE_PATH, compress=0):
+    """Model paketini diske yaz
+
+    compress=0 dosyayı sıkıştırmadan yazar ve mmap_mode ile yüklenebilir kılar;
+    sıkıştırılmış paketler (ör. 3 veya ('lz4', 3)) daha küçüktür ama belleğe eşlenemez.
+    """
+    bundle = dict(bundle, version=MODEL_BUNDLE_VERSION, feature_names=list(FEATURE_NAMES))
+    
+    # Yarım yazılmış dosya okunmasın diye önce geçici dosyaya yazılır
+    tmp_path = f"{path}.tmp"
+    joblib.dump(bundle, tmp_path, compress=compress)
+    os.replace(tmp_path, path)
+    return path
+
+def load_model_bundle(path=DEFAULT_BUNDLE_PATH, mmap_mode=None, use_cache=True):
+    """Model paketini yükle; aynı yol ve mtime için önbellekteki paketi döndür"""
+    path = os.path.abspath(path)
+    key = (path, os.stat(path).st_mtime_ns, mmap_mode)
+    
+    if use_cache:
+        with _bundle_cache_lock:
+            if key in _bundle_cache:
+                count('model_cache', result='hit')
+                return _bundle_cache[key]
+        count('model_cache', result='miss')
+    
+    bundle = joblib.load(path, mmap_mode=mmap_mode)
+    
+    if bundle.get('version') != MODEL_BUNDLE_VERSION:
+        raise ValueError(f"Desteklenmeyen model paketi sürümü: {bundle.get('version')}")
+    if bundle.get('feature_names') != FEATURE_NAMES:
+        raise ValueError("Model paketinin özellik şeması bu sürümle uyumsuz")
+    
+    if use_cache:
+        with _bundle_cache_lock:
+            # Aynı dosyanın eski sürümlerini bellekten at
+            for old_key in [k for k in _bundle_cache if k[0] == path]:
+                del _bundle_cache[old_key]
+            _bundle_cache[key] = bundle
+    
+    return bundle
+
+def clear_model_cache():
+    """Süreç genelindeki model önbelleğini temizle"""
+    with _bundle_cache_lock:
+        _bundle_cache.clear()
+
+def _align_proba(probs, classes, n_classes):
+    """predict_proba sütunlarını etiket sırasına yerleştir (eğitimde görülmeyen sınıf = 0)"""
+    if probs.shape[1] == n_classes:
+        return probs
+    full = np.zeros((len(probs), n_classes))
+    full[:, classes] = probs
+    return full
+
+def _full_proba(model, X, n_classes):
+    return _align_proba(model.predict_proba(X), model.classes_, n_classes)
 
 class MLKuponAnalyzer:
-    def __init__(self):
+    def __init__(self, model_path=DEFAULT_BUNDLE_PATH):
         self.model_1x2 = None
         self.model_goals = None
+        self.model_multi = None
         self.scaler = StandardScaler()
         self.is_trained = False
+        self.model_path = model_path
+        self.training_config = None
+        self.calibrator_1x2 = None
+        self.calibrator_goals = None
+        self.calibration_report = None
+        self.feature_window = None
         
     def create_features(self, home_team_stats, away_team_stats, additional_data=None):
         """Makine öğrenmesi için özellik vektörü oluştur"""
@@ -50,172 +273,410 @@ class MLKuponAnalyzer:
         
         return np.array(features).reshape(1, -1)
     
-    def generate_training_data(self, num_samples=1000):
+    def generate_training_chunks(self, num_samples=1000, chunk_size=100_000, seed=42):
+        """Eğitim verisini parça parça üret, bellek kullanımı chunk_size ile sınırlı kalır"""
+        rng = np.random.default_rng(seed)
+        
+        for start in range(0, num_samples, chunk_size):
+            yield self._generate_training_chunk(rng, min(chunk_size, num_samples - start))
+    
+    def _generate_training_chunk(self, rng, n):
+        """Tek bir parça için özellikleri ve etiketleri sütun bazında üret"""
+        X = np.empty((n, NUM_FEATURES))
+        
+        # Rastgele takım istatistikleri (ev atak/savunma/form, deplasman atak/savunma/form)
+        X[:, 0:6] = rng.uniform(3, 10, size=(n, 6))
+        X[:, 6:9] = X[:, 0:3] - X[:, 3:6]
+        
+        # Ek faktörler
+        X[:, 9] = rng.uniform(0, 1, size=n)
+        X[:, 10] = rng.uniform(0, 1, size=n) * (1 - X[:, 9])
+        X[:, 11] = rng.uniform(1.5, 4.0, size=n)
+        X[:, 12] = rng.uniform(1.0, 1.5, size=n)
+        X[:, 13:15] = 1.0
+        
+        # Basit hedef değişken hesaplama (gerçekte maç sonuçları olur)
+        home_strength = X[:, 0:3].sum(axis=1) * X[:, 12]
+        away_strength = X[:, 3:6].sum(axis=1)
+        strength_diff = home_strength - away_strength
+        
+        # 1X2 etiketi: 0 ev sahibi, 1 beraberlik, 2 deplasman
+        labels_1x2 = np.where(strength_diff > 3, 0, np.where(strength_diff < -3, 2, 1))
+        
+        # Gol etiketi (2.5 üst/alt)
+        expected_goals = (X[:, 0] + X[:, 3]) / 4 + X[:, 11] / 3
+        labels_goals = (expected_goals > 2.5).astype(np.int64)
+        
+        return X, labels_1x2, labels_goals
+    
+    def generate_training_data(self, num_samples=1000, chunk_size=100_000, seed=42):
         """Eğitim verisi oluştur (gerçek projede tarihsel veriler kullanılır)"""
-        np.random.seed(42)
+        X = np.empty((num_samples, NUM_FEATURES))
+        labels_1x2 = np.empty(num_samples, dtype=np.int64)
+        labels_goals = np.empty(num_samples, dtype=np.int64)
         
-        training_data = []
-        labels_1x2 = []
-        labels_goals = []
+        # Parçalar doğrudan hedef dizilere yazılır, ara liste tutulmaz
+        start = 0
+        for X_chunk, y_1x2_chunk, y_goals_chunk in self.generate_training_chunks(num_samples, chunk_size, seed):
+            end = start + len(X_chunk)
+            X[start:end] = X_chunk
+            labels_1x2[start:end] = y_1x2_chunk
+            labels_goals[start:end] = y_goals_chunk
+            start = end
         
-        for _ in range(num_samples):
-            # Rastgele takım istatistikleri
-            home_attack = np.random.uniform(3, 10)
-            home_defense = np.random.uniform(3, 10)
-            home_form = np.random.uniform(3, 10)
-            
-            away_attack = np.random.uniform(3, 10)
-            away_defense = np.random.uniform(3, 10)
-            away_form = np.random.uniform(3, 10)
-            
-            # Ek faktörler
-            h2h_home = np.random.uniform(0, 1)
-            h2h_away = np.random.uniform(0, 1-h2h_home)
-            avg_goals = np.random.uniform(1.5, 4.0)
-            home_advantage = np.random.uniform(1.0, 1.5)
-            
-            features = [
-                home_attack, home_defense, home_form,
-                away_attack, away_defense, away_form,
-                home_attack - away_attack,
-                home_defense - away_defense,
-                home_form - away_form,
-                h2h_home, h2h_away, avg_goals, home_advantage, 1.0, 1.0
-            ]
-            
-            # Basit hedef değişken hesaplama (gerçekte maç sonuçları olur)
-            home_strength = (home_attack + home_defense + home_form) * home_advantage
-            away_strength = away_attack + away_defense + away_form
-            
-            strength_diff = home_strength - away_strength
-            
-            # 1X2 etiketi
-            if strength_diff > 3:
-                label_1x2 = 0  # Home win
-            elif strength_diff < -3:
-                label_1x2 = 2  # Away win
+        return X, labels_1x2, labels_goals
+    
+    def train_models(self, config=None, data=None, save=True):
+        """Modelleri eğit
+
+        data verilmezse sentetik veri üretilir; (X, y_1x2, y_goals) üçlüsü veya
+        ingest.ingest_matches ile yazılmış bir Parquet dosyasının yolu verilebilir.
+        save=False modelleri yalnızca bellekte tutar (ör. backtest sırasında).
+        """
+        config = config or TrainingConfig()
+        
+        with timed('training', phase='data'):
+            if data is None:
+                print("Eğitim verisi oluşturuluyor...")
+                X, y_1x2, y_goals = self.generate_training_data(config.num_samples, seed=config.random_state)
+            elif isinstance(data, (str, os.PathLike)):
+                from ingest import load_feature_matrix
+                print("Eğitim verisi yükleniyor...")
+                X, y_1x2, y_goals = load_feature_matrix(data)
             else:
-                label_1x2 = 1  # Draw
-            
-            # Gol etiketi (2.5 üst/alt)
-            expected_goals = (home_attack + away_attack) / 4 + avg_goals / 3
-            label_goals = 1 if expected_goals > 2.5 else 0
-            
-            training_data.append(features)
-            labels_1x2.append(label_1x2)
-            labels_goals.append(label_goals)
+                X, y_1x2, y_goals = data
         
-        return np.array(training_data), np.array(labels_1x2), np.array(labels_goals)
-    
-    def train_models(self):
-        """Modelleri eğit"""
-        print("Eğitim verisi oluşturuluyor...")
-        X, y_1x2, y_goals = self.generate_training_data(2000)
+        # Çevrimiçi güncellemeler için son maçların özellikleri saklanır
+        self.feature_window = FeatureWindow(config.online_window)
+        self.feature_window.append(X, y_1x2, y_goals)
         
         # Veriyi böl
-        X_train, X_test, y_1x2_train, y_1x2_test = train_test_split(X, y_1x2, test_size=0.2, random_state=42)
-        _, _, y_goals_train, y_goals_test = train_test_split(X, y_goals, test_size=0.2, random_state=42)
+        X_train, X_test, y_1x2_train, y_1x2_test, y_goals_train, y_goals_test = train_test_split(
+            X, y_1x2, y_goals, test_size=config.test_size, random_state=config.random_state
+        )
+        
+        # Kalibrasyon verisi modellerin görmediği ayrı bir dilimden gelir
+        if config.calibration:
+            X_train, X_calib, y_1x2_train, y_1x2_calib, y_goals_train, y_goals_calib = train_test_split(
+                X_train, y_1x2_train, y_goals_train,
+                test_size=config.calibration_size, random_state=config.random_state
+            )
         
-        # Veriyi standartlaştır
+        # Veriyi standartlaştır (önbellekteki paylaşılan scaler değiştirilmesin diye yenisi oluşturulur)
+        self.scaler = StandardScaler()
         X_train_scaled = self.scaler.fit_transform(X_train)
         X_test_scaled = self.scaler.transform(X_test)
         
-        print("1X2 modeli eğitiliyor...")
-        # 1X2 modeli
-        self.model_1x2 = GradientBoostingClassifier(
-            n_estimators=100,
-            max_depth=6,
-            learning_rate=0.1,
-            random_state=42
-        )
-        self.model_1x2.fit(X_train_scaled, y_1x2_train)
-        
-        print("Gol modeli eğitiliyor...")
-        # Gol modeli
-        self.model_goals = RandomForestClassifier(
-            n_estimators=100,
-            max_depth=8,
-            random_state=42
-        )
-        self.model_goals.fit(X_train_scaled, y_goals_train)
+        print("1X2 ve gol modelleri eğitiliyor...")
+        # İki model aynı anda eğitilir; n_jobs=1 veya 'sequential' backend ile sıralı çalışır
+        n_workers = 1 if config.n_jobs == 1 or config.backend == 'sequential' else 2
+        with timed('training', phase='fit'):
+            if config.multi_output:
+                self.model_1x2 = self.model_goals = None
+                self.model_multi = _fit_model(
+                    build_model_multi(config), X_train_scaled, np.column_stack([y_1x2_train, y_goals_train])
+                )
+            else:
+                self.model_multi = None
+                self.model_1x2, self.model_goals = Parallel(n_jobs=n_workers, backend=config.backend)([
+                    delayed(_fit_model)(build_model_1x2(config), X_train_scaled, y_1x2_train),
+                    delayed(_fit_model)(build_model_goals(config), X_train_scaled, y_goals_train)
+                ])
+        
+        self.calibrator_1x2 = self.calibrator_goals = None
+        if config.calibration:
+            with timed('training', phase='calibrate'):
+                calib_1x2, calib_goals = self._raw_proba(self.scaler.transform(X_calib))
+                self.calibrator_1x2 = ProbabilityCalibrator(config.calibration).fit(calib_1x2, y_1x2_calib)
+                self.calibrator_goals = ProbabilityCalibrator(config.calibration).fit(calib_goals, y_goals_calib)
         
         # Test et
-        y_1x2_pred = self.model_1x2.predict(X_test_scaled)
-        y_goals_pred = self.model_goals.predict(X_test_scaled)
+        with timed('training', phase='evaluate'):
+            raw_1x2, raw_goals = self._raw_proba(X_test_scaled)
+            probs_1x2, probs_goals = self._calibrate(raw_1x2, raw_goals)
+            self.calibration_report = {
+                '1x2': {'raw': reliability_report(raw_1x2, y_1x2_test),
+                        'calibrated': reliability_report(probs_1x2, y_1x2_test)},
+                'goals': {'raw': reliability_report(raw_goals, y_goals_test),
+                          'calibrated': reliability_report(probs_goals, y_goals_test)}
+            }
         
-        print(f"1X2 Model Doğruluğu: {accuracy_score(y_1x2_test, y_1x2_pred):.2f}")
-        print(f"Gol Model Doğruluğu: {accuracy_score(y_goals_test, y_goals_pred):.2f}")
+        print(f"1X2 Model Doğruluğu: {accuracy_score(y_1x2_test, probs_1x2.argmax(axis=1)):.2f}")
+        print(f"Gol Model Doğruluğu: {accuracy_score(y_goals_test, probs_goals.argmax(axis=1)):.2f}")
+        if config.calibration:
+            for name, report in self.calibration_report.items():
+                print(f"{name} kalibrasyon hatası (ECE): {report['raw']['ece']:.3f} -> {report['calibrated']['ece']:.3f}")
         
         self.is_trained = True
+        self.training_config = config
         
         # Modelleri kaydet
-        joblib.dump(self.model_1x2, 'model_1x2.pkl')
-        joblib.dump(self.model_goals, 'model_goals.pkl')
-        joblib.dump(self.scaler, 'scaler.pkl')
+        if save:
+            with timed('training', phase='save'):
+                self.save_models()
+            
+            print("Modeller kaydedildi!")
+    
+    def update_models(self, data, save=True):
+        """Biten maçlarla modelleri sıfırdan eğitmeden güncelle
+
+        data: (X, y_1x2, y_goals) üçlüsü veya home_stats, away_stats,
+        [additional_data], home_goals ve away_goals içeren maç sözlükleri.
+        Yeni maçlar özellik penceresine eklenir ve GradientBoosting /
+        RandomForest modellerine pencere üzerinde eğitilen online_estimators
+        kadar ağaç eklenir (warm_start). Ağaç sınırı aşılırsa, sınıf kümesi
+        değişirse veya motor warm_start desteklemiyorsa pencere üzerinde tam
+        yeniden eğitim yapılır. Scaler ve kalibratörler yalnızca tam eğitimde yenilenir.
+        """
+        config = self.training_config or TrainingConfig()
         
-        print("Modeller kaydedildi!")
+        if len(data) == 0:
+            raise ValueError("Güncelleme için maç yok")
+        if isinstance(data[0], dict):
+            X = self.create_features_batch(data)
+            y_1x2, y_goals = _match_labels([m['home_goals'] for m in data], [m['away_goals'] for m in data])
+        elif isinstance(data, tuple) and len(data) == 3 and not isinstance(data[0], Fixture):
+            X, y_1x2, y_goals = data
+            if len(X) == 0:
+                raise ValueError("Güncelleme için maç yok")
+        else:
+            raise TypeError(
+                "update_models sonuç gerektirir: home_goals / away_goals içeren maç sözlükleri "
+                "veya (X, y_1x2, y_goals) üçlüsü verin (Fixture nesneleri skor içermez)"
+            )
+        
+        if self.feature_window is None:
+            self.feature_window = FeatureWindow(config.online_window)
+        self.feature_window.append(X, y_1x2, y_goals)
+        X_window, y_1x2_window, y_goals_window = self.feature_window.arrays()
+        
+        if self.model_multi is not None:
+            targets = ((self.model_multi, np.column_stack([y_1x2_window, y_goals_window])),)
+        else:
+            targets = ((self.model_1x2, y_1x2_window), (self.model_goals, y_goals_window))
+        warm = self.is_trained and all(
+            _can_warm_start(model, y, config.online_estimators, config.online_max_estimators)
+            for model, y in targets
+        )
+        mode = 'warm' if warm else 'refit'
+        
+        with timed('model_update', mode=mode):
+            if warm:
+                X_scaled = self.scaler.transform(X_window)
+                # Önbellekteki paylaşılan modeller değişmesin diye kopyası güncellenir
+                updated = []
+                for model, y in targets:
+                    model = copy.deepcopy(model)
+                    model.set_params(warm_start=True, n_estimators=model.n_estimators + config.online_estimators)
+                    if isinstance(model, RandomForestClassifier):
+                        model.set_params(n_jobs=config.n_jobs)
+                    updated.append(_fit_model(model, X_scaled, y))
+                if self.model_multi is not None:
+                    self.model_multi, = updated
+                else:
+                    self.model_1x2, self.model_goals = updated
+            else:
+                window = self.feature_window
+                self.train_models(config, data=(X_window, y_1x2_window, y_goals_window), save=False)
+                # train_models pencereyi yalnızca verilen satırlarla yeniden kurar; parçalar korunur
+                self.feature_window = window
+        count('model_update', mode=mode)
+        
+        if save:
+            with timed('training', phase='save'):
+                self.save_models()
+        
+        multi = self.model_multi is not None
+        model_1x2 = self.model_multi if multi else self.model_1x2
+        return {
+            'mode': mode,
+            'rows': len(X_window),
+            'n_estimators_1x2': getattr(model_1x2, 'n_estimators', getattr(model_1x2, 'max_iter', None)),
+            'n_estimators_goals': (self.model_multi if multi else self.model_goals).n_estimators
+        }
+    
+    def save_models(self, path=None, compress=0):
+        """Modelleri, scaler'ı ve özellik şemasını tek pakete kaydet"""
+        return save_model_bundle({
+            'model_1x2': self.model_1x2,
+            'model_goals': self.model_goals,
+            'model_multi': self.model_multi,
+            'scaler': self.scaler,
+            'calibrator_1x2': self.calibrator_1x2,
+            'calibrator_goals': self.calibrator_goals,
+            'calibration_report': self.calibration_report,
+            'feature_window': self.feature_window.arrays() if self.feature_window else None,
+            'training_config': asdict(self.training_config) if self.training_config else None,
+            'created_at': datetime.now().isoformat()
+        }, path or self.model_path, compress=compress)
     
-    def load_models(self):
-        """Kaydedilmiş modelleri yükle"""
+    def load_models(self, path=None, mmap_mode=None):
+        """Kaydedilmiş modelleri yükle (özel yoldaki paket yoksa FileNotFoundError)"""
         try:
-            self.model_1x2 = joblib.load('model_1x2.pkl')
-            self.model_goals = joblib.load('model_goals.pkl')
-            self.scaler = joblib.load('scaler.pkl')
-            self.is_trained = True
-            print("Modeller yüklendi!")
+            with timed('model_load'):
+                bundle = load_model_bundle(path or self.model_path, mmap_mode=mmap_mode)
+            self.model_1x2 = bundle['model_1x2']
+            self.model_goals = bundle['model_goals']
+            self.model_multi = bundle.get('model_multi')
+            self.scaler = bundle['scaler']
+            # Kalibrasyondan önce kaydedilmiş paketlerde bu anahtarlar yoktur
+            self.calibrator_1x2 = bundle.get('calibrator_1x2')
+            self.calibrator_goals = bundle.get('calibrator_goals')
+            self.calibration_report = bundle.get('calibration_report')
+            config = bundle.get('training_config')
+            self.training_config = TrainingConfig(**config) if config else None
+            self.feature_window = None
+            if bundle.get('feature_window') is not None:
+                # Pencere paketteki dizilere başvurur; kopya yalnızca update_models'te alınır
+                self.feature_window = FeatureWindow((self.training_config or TrainingConfig()).online_window,
+                                                    base=bundle['feature_window'])
         except FileNotFoundError:
-            print("Model dosyaları bulunamadı. Önce train_models() çalıştırın.")
+            # Eski sürümün ayrı ayrı kaydettiği dosyalar yalnızca varsayılan yolda denenir;
+            # özel yol verilmişse çalışma dizinindeki ilgisiz modeller yüklenmez
+            if (path or self.model_path) != DEFAULT_BUNDLE_PATH:
+                raise
+            try:
+                self.model_1x2 = joblib.load('model_1x2.pkl')
+                self.model_goals = joblib.load('model_goals.pkl')
+                self.model_multi = None
+                self.scaler = joblib.load('scaler.pkl')
+                self.calibrator_1x2 = self.calibrator_goals = self.calibration_report = None
+                self.training_config = self.feature_window = None
+            except FileNotFoundError:
+                print("Model dosyaları bulunamadı. Önce train_models() çalıştırın.")
+                return
+        
+        self.is_trained = True
+        print("Modeller yüklendi!")
     
-    def predict_match(self, home_team_stats, away_team_stats, additional_data=None):
-        """ML ile maç tahmini"""
+    def create_features_batch(self, matches):
+        """Birden fazla maç için tek seferde (N, 15) özellik matrisi oluştur
+
+        matches: maç sözlükleri, Fixture listesi veya FixtureBatch.
+        """
+        return as_fixture_batch(matches).features()
+    
+    def predict_matches_batch(self, matches):
+        """Birden fazla maçı tek ölçekleme ve model başına tek çağrı ile tahmin et"""
         if not self.is_trained:
             print("Model eğitilmemiş! Önce train_models() veya load_models() çalıştırın.")
             return None
         
-        # Özellik vektörü oluştur
-        features = self.create_features(home_team_stats, away_team_stats, additional_data)
-        features_scaled = self.scaler.transform(features)
+        if not matches:
+            return []
         
-        # 1X2 tahmini
-        prob_1x2 = self.model_1x2.predict_proba(features_scaled)[0]
-        pred_1x2 = self.model_1x2.predict(features_scaled)[0]
+        with timed('features'):
+            features = self.create_features_batch(matches)
+        return self.format_predictions(*self.predict_proba_features(features))
+    
+    def predict_batch(self, matches):
+        """Maçları tahmin edip sözlük üretmeden PredictionBatch döndür"""
+        if not self.is_trained:
+            print("Model eğitilmemiş! Önce train_models() veya load_models() çalıştırın.")
+            return None
         
-        # Gol tahmini
-        prob_goals = self.model_goals.predict_proba(features_scaled)[0]
-        pred_goals = self.model_goals.predict(features_scaled)[0]
+        with timed('features'):
+            features = self.create_features_batch(matches)
+        return PredictionBatch(*self.predict_proba_features(features))
+    
+    def format_predictions(self, probs_1x2, probs_goals):
+        """(N, 3) ve (N, 2) olasılık dizilerini tahmin sözlüklerine çevir"""
+        # Etiketler olasılıkların argmax'ından türetilir, predict() ayrıca çağrılmaz
+        preds_1x2 = probs_1x2.argmax(axis=1)
+        preds_goals = probs_goals.argmax(axis=1)
         
-        # Sonuçları yorumla
-        labels_1x2 = ['1', 'X', '2']
-        labels_goals = ['Alt 2.5', 'Üst 2.5']
+        return [
+            self._format_prediction(prob_1x2, pred_1x2, prob_goals, pred_goals)
+            for prob_1x2, pred_1x2, prob_goals, pred_goals
+            in zip(probs_1x2, preds_1x2, probs_goals, preds_goals)
+        ]
+    
+    def predict_proba_features(self, features):
+        """Hazır (N, 15) özellik matrisinden (N, 3) 1X2 ve (N, 2) gol olasılıkları (varsa kalibre edilmiş)"""
+        with timed('scaling'):
+            features_scaled = self.scaler.transform(features)
+        return self._calibrate(*self._raw_proba(features_scaled))
+    
+    def _raw_proba(self, features_scaled):
+        """Ölçeklenmiş özelliklerden kalibre edilmemiş (1X2, gol) olasılıkları"""
+        if self.model_multi is not None:
+            # Tek geçiş: predict_proba her pazar için bir dizi döndürür
+            with timed('inference', model='multi'):
+                probs_1x2, probs_goals = self.model_multi.predict_proba(features_scaled)
+            classes_1x2, classes_goals = self.model_multi.classes_
+            return (_align_proba(probs_1x2, classes_1x2, len(LABELS_1X2)),
+                    _align_proba(probs_goals, classes_goals, len(LABELS_GOALS)))
         
+        with timed('inference', model='1x2'):
+            probs_1x2 = _full_proba(self.model_1x2, features_scaled, len(LABELS_1X2))
+        with timed('inference', model='goals'):
+            probs_goals = _full_proba(self.model_goals, features_scaled, len(LABELS_GOALS))
+        return probs_1x2, probs_goals
+    
+    def _calibrate(self, probs_1x2, probs_goals):
+        """Kalibratör varsa ham olasılıklara uygula"""
+        if self.calibrator_1x2 is None and self.calibrator_goals is None:
+            return probs_1x2, probs_goals
+        with timed('calibration'):
+            if self.calibrator_1x2 is not None:
+                probs_1x2 = self.calibrator_1x2.transform(probs_1x2)
+            if self.calibrator_goals is not None:
+                probs_goals = self.calibrator_goals.transform(probs_goals)
+        return probs_1x2, probs_goals
+    
+    def _format_prediction(self, prob_1x2, pred_1x2, prob_goals, pred_goals):
+        """Model çıktılarını sonuç sözlüğüne dönüştür"""
         return {
-            '1x2_prediction': labels_1x2[pred_1x2],
-            '1x2_confidence': round(max(prob_1x2) * 100, 1),
+            '1x2_prediction': LABELS_1X2[pred_1x2],
+            '1x2_confidence': round(float(prob_1x2.max()) * 100, 1),
             '1x2_probabilities': {
-                '1': round(prob_1x2[0] * 100, 1),
-                'X': round(prob_1x2[1] * 100, 1),
-                '2': round(prob_1x2[2] * 100, 1)
+                '1': round(float(prob_1x2[0]) * 100, 1),
+                'X': round(float(prob_1x2[1]) * 100, 1),
+                '2': round(float(prob_1x2[2]) * 100, 1)
             },
-            'goals_prediction': labels_goals[pred_goals],
-            'goals_confidence': round(max(prob_goals) * 100, 1),
+            'goals_prediction': LABELS_GOALS[pred_goals],
+            'goals_confidence': round(float(prob_goals.max()) * 100, 1),
             'goals_probabilities': {
-                'Alt 2.5': round(prob_goals[0] * 100, 1),
-                'Üst 2.5': round(prob_goals[1] * 100, 1)
+                'Alt 2.5': round(float(prob_goals[0]) * 100, 1),
+                'Üst 2.5': round(float(prob_goals[1]) * 100, 1)
+            },
+            # Çifte şans ayrı model gerektirmez, 1X2 olasılıklarından türetilir
+            'double_chance_probabilities': {
+                '1X': round(float(prob_1x2[0] + prob_1x2[1]) * 100, 1),
+                '12': round(float(prob_1x2[0] + prob_1x2[2]) * 100, 1),
+                'X2': round(float(prob_1x2[1] + prob_1x2[2]) * 100, 1)
             }
         }
     
-    def analyze_kupon_ml(self, matches_data):
-        """Tüm kuponu ML ile analiz et"""
+    def predict_match(self, home_team_stats, away_team_stats, additional_data=None):
+        """ML ile maç tahmini"""
+        predictions = self.predict_matches_batch([{
+            'home_stats': home_team_stats,
+            'away_stats': away_team_stats,
+            'additional_data': additional_data
+        }])
+        
+        return predictions[0] if predictions else None
+    
+    def analyze_kupon_ml(self, matches_data, predictions=None):
+        """Tüm kuponu ML ile analiz et
+
+        matches_data: maç sözlükleri, Fixture listesi veya FixtureBatch.
+        predictions (sözlük listesi veya PredictionBatch) verilirse (ör. başka isteklerle toplu hesaplanmış) modeller tekrar çağrılmaz.
+        """
+        with profile_analysis('analyze_kupon_ml'), timed('analyze_kupon', analyzer='ml'):
+            return self._analyze_kupon_ml(matches_data, predictions)
+    
+    def _analyze_kupon_ml(self, matches_data, predictions=None):
         results = []
         total_confidence = 1.0
         
-        for match in matches_data:
-            prediction = self.predict_match(
-                match['home_stats'],
-                match['away_stats'],
-                match.get('additional_data')
-            )
-            
+        if predictions is None:
+            predictions = self.predict_matches_batch(matches_data) or []
+        elif isinstance(predictions, PredictionBatch):
+            predictions = self.format_predictions(predictions.probs_1x2, predictions.probs_goals)
+        
+        for match, prediction in zip(matches_data, predictions):
             if prediction:
                 results.append({
                     'home_team': match['home_team'],
@@ -0,0 +1,297 @@
+# prediction_service.py
+"""Modelleri bellekte tutan HTTP tahmin servisi
+
+Birkaç milisaniye içinde gelen tekli tahmin istekleri MicroBatcher ile tek
+bir predict_matches_batch çağrısında birleştirilir. Çok çekirdekli
+makinelerde birden fazla işçi süreç aynı portu SO_REUSEPORT ile paylaşır;
+her işçi model paketini belleğe eşleyerek (mmap) yükler, sayfalar süreçler
+arasında paylaşılır.
+
+Uç noktalar:
+    POST /predict        {"home_stats": {...}, "away_stats": {...}, "additional_data": {...}}
+    POST /predict/batch  {"matches": [...]}
+    POST /kupon          {"matches": [...], "analyzer": "ml" | "mvp" | "api"}
+    GET  /health, GET /metrics
+
+Kullanım:
+    python prediction_service.py --port 8000 --workers 4
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from api_integration import EnhancedKuponAnalyzer
+from instrumentation import count, export_prometheus, timed
+from kupon_mvp import KuponAnalyzer
+from ml_algorithm import DEFAULT_BUNDLE_PATH, MLKuponAnalyzer
+
+class MicroBatcher:
+    """Eşzamanlı gelen öğeleri toplayıp tek çağrıda işleyen arka plan iş parçacığı
+
+    İlk öğe geldikten sonra en fazla max_wait saniye veya max_batch_size öğe
+    beklenir; predict_fn öğe listesini alıp aynı sırada sonuç listesi döndürür.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=256, max_wait=0.002):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batch_count = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def submit_many(self, items):
+        return [self.submit(item) for item in items]
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is None:
+                    self._queue.put(None)
+                    break
+                batch.append(entry)
+            self._process(batch)
+
+    def _process(self, batch):
+        self.batch_count += 1
+        count('service_batched_requests', amount=len(batch))
+        try:
+            with timed('service_batch'):
+                results = self.predict_fn([item for item, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            # Hatalı öğe aynı pencereye düşen diğer istekleri düşürmesin: tek tek yeniden dene
+            count('service_batch_retries')
+            for entry in batch:
+                self._process([entry])
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+class ServiceUnavailable(Exception):
+    """Model yüklenmediği için istek karşılanamıyor (HTTP 503)"""
+
+class PredictionService:
+    """Analizcileri bir kez yükleyip istekler arasında paylaşan servis katmanı"""
+
+    def __init__(self, model_path=DEFAULT_BUNDLE_PATH, max_batch_size=256, max_wait=0.002, mmap_mode='r'):
+        self.ml = MLKuponAnalyzer(model_path=model_path)
+        if os.path.exists(model_path):
+            self.ml.load_models(mmap_mode=mmap_mode)
+        self.mvp = KuponAnalyzer()
+        self.api = EnhancedKuponAnalyzer()
+        self.batcher = MicroBatcher(self._predict_batch, max_batch_size, max_wait)
+
+    def _predict_batch(self, matches):
+        return self.ml.predict_matches_batch(matches)
+
+    def _require_model(self):
+        if not self.ml.is_trained:
+            raise ServiceUnavailable("Model yüklenmedi")
+
+    def predict(self, match, timeout=None):
+        self._require_model()
+        return self.batcher.submit(match).result(timeout)
+
+    def predict_batch(self, matches, timeout=None):
+        self._require_model()
+        return [future.result(timeout) for future in self.batcher.submit_many(matches)]
+
+    def analyze_kupon(self, matches, analyzer='ml'):
+        if analyzer == 'ml':
+            return self.ml.analyze_kupon_ml(matches, self.predict_batch(matches))
+        if analyzer == 'mvp':
+            return self.mvp.analyze_kupon(matches)
+        if analyzer == 'api':
+            return self.api.analyze_kupon(matches)
+        raise ValueError(f"Bilinmeyen analizci: {analyzer}")
+
+    def health(self):
+        return {'status': 'ok', 'model_loaded': self.ml.is_trained, 'pid': os.getpid()}
+
+    def close(self):
+        self.batcher.close()
+
+def _make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._send_json(200, service.health())
+            elif self.path == '/metrics':
+                self._send(200, export_prometheus().encode('utf-8'), 'text/plain; version=0.0.4')
+            else:
+                self._send_json(404, {'error': 'Bulunamadı'})
+
+        def do_POST(self):
+            routes = {
+                '/predict': lambda body: service.predict(body),
+                '/predict/batch': lambda body: {'predictions': service.predict_batch(body['matches'])},
+                '/kupon': lambda body: service.analyze_kupon(body['matches'], body.get('analyzer', 'ml')),
+            }
+            route = routes.get(self.path)
+            if route is None:
+                self._send_json(404, {'error': 'Bulunamadı'})
+                return
+
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                body = json.loads(self.rfile.read(length) or b'{}')
+                _validate_body(self.path, body)
+                with timed('service_request', endpoint=self.path):
+                    result = route(body)
+            except ServiceUnavailable as e:
+                self._send_json(503, {'error': str(e)})
+            except (ValueError, KeyError, TypeError) as e:
+                self._send_json(400, {'error': f"Geçersiz istek: {e}"})
+            except Exception as e:
+                self._send_json(500, {'error': f"Sunucu hatası: {e}"})
+            else:
+                self._send_json(200, result)
+
+        def _send_json(self, status, payload):
+            self._send(status, json.dumps(payload, ensure_ascii=False).encode('utf-8'), 'application/json')
+
+        def _send(self, status, body, content_type):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+def _validate_body(path, body):
+    """İstek gövdesinin uç noktanın beklediği biçimde olduğunu doğrula"""
+    if not isinstance(body, dict):
+        raise ValueError("gövde bir JSON nesnesi olmalı")
+    if path != '/predict':
+        matches = body.get('matches')
+        if not isinstance(matches, list) or not all(isinstance(match, dict) for match in matches):
+            raise ValueError("'matches' maç nesnelerinden oluşan bir liste olmalı")
+
+class _ReusePortServer(ThreadingHTTPServer):
+    # Aynı portu dinleyen işçi süreçler arasında çekirdek bağlantıları dağıtır
+    allow_reuse_port = True
+    daemon_threads = True
+    # Varsayılan dinleme kuyruğu (5) eşzamanlı bağlantı patlamalarında bağlantı sıfırlatır
+    request_queue_size = 128
+
+class PredictionServer:
+    """Servisi arka plan iş parçacığında çalıştıran HTTP sunucusu
+
+    Kullanım:
+        with PredictionServer(model_path) as server:
+            requests.post(server.base_url + 'predict', json=match)
+    """
+
+    def __init__(self, model_path=DEFAULT_BUNDLE_PATH, host='127.0.0.1', port=0, **service_kwargs):
+        self.model_path = model_path
+        self.host = host
+        self.port = port
+        self.service_kwargs = service_kwargs
+        self.service = None
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def _bind(self):
+        self.service = PredictionService(self.model_path, **self.service_kwargs)
+        self._server = _ReusePortServer((self.host, self.port), _make_handler(self.service))
+
+    def start(self):
+        self._bind()
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._bind()
+        self._server.serve_forever()
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self.service:
+            self.service.close()
+            self.service = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def _worker(model_path, host, port, service_kwargs):
+    PredictionServer(model_path, host, port, **service_kwargs).serve_forever()
+
+def serve(model_path=DEFAULT_BUNDLE_PATH, host='127.0.0.1', port=8000, workers=1, **service_kwargs):
+    """Servisi workers kadar süreçte aynı port üzerinde çalıştır"""
+    if workers == 1:
+        _worker(model_path, host, port, service_kwargs)
+        return
+
+    processes = [
+        multiprocessing.Process(target=_worker, args=(model_path, host, port, service_kwargs), daemon=True)
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kupon tahmin servisi")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--model-path', default=DEFAULT_BUNDLE_PATH)
+    parser.add_argument('--max-batch-size', type=int, default=256)
+    parser.add_argument('--max-wait-ms', type=float, default=2.0)
+    args = parser.parse_args()
+
+    print(f"Tahmin servisi: http://{args.host}:{args.port}/ ({args.workers} işçi)")
+    serve(args.model_path, args.host, args.port, args.workers,
+          max_batch_size=args.max_batch_size, max_wait=args.max_wait_ms / 1000)
@@ -0,0 +1,116 @@
+# rating_engine.py
+"""Takım atak/savunma/form değerlerini artımlı olarak güncelleyen motor"""
+from collections import deque
+
+import numpy as np
+
+DEFAULT_RATING = 5.0
+
+def _clip(value):
+    return min(10, max(1, value))
+
+class TeamState:
+    """Bir takımın kayan pencere toplamları ve üstel azalan form değeri"""
+    __slots__ = ('window', 'scored_sum', 'conceded_sum', 'form_num', 'form_den', 'played')
+
+    def __init__(self, window_size):
+        self.window = deque(maxlen=window_size)
+        self.scored_sum = 0
+        self.conceded_sum = 0
+        self.form_num = 0.0
+        self.form_den = 0.0
+        self.played = 0
+
+class TeamRatingEngine:
+    """Her yeni maçta O(1) güncellenen takım derecelendirmeleri
+
+    attack  = son `window` maçta atılan gol ortalaması * 2
+    defense = 10 - son `window` maçta yenilen gol ortalaması * 2
+    form    = üstel azalan (decay) puan oranı * 10
+    """
+
+    def __init__(self, window=10, form_decay=0.7):
+        self.window_size = window
+        self.form_decay = form_decay
+        self.teams = {}
+
+    def _state(self, team):
+        state = self.teams.get(team)
+        if state is None:
+            state = self.teams[team] = TeamState(self.window_size)
+        return state
+
+    def _push(self, state, scored, conceded):
+        """Pencereye bir maç ekle, taşan en eski maçı toplamlardan düş"""
+        if len(state.window) == self.window_size:
+            old_scored, old_conceded = state.window[0]
+            state.scored_sum -= old_scored
+            state.conceded_sum -= old_conceded
+        state.window.append((scored, conceded))
+        state.scored_sum += scored
+        state.conceded_sum += conceded
+
+        points = 3 if scored > conceded else 1 if scored == conceded else 0
+        state.form_num = state.form_num * self.form_decay + points
+        state.form_den = state.form_den * self.form_decay + 3
+        state.played += 1
+
+    def update(self, match):
+        """Bitmiş tek bir maçı iki takımın değerlerine işle"""
+        home_goals = match['home_goals']
+        away_goals = match['away_goals']
+        self._push(self._state(match['home_team']), home_goals, away_goals)
+        self._push(self._state(match['away_team']), away_goals, home_goals)
+
+    def update_many(self, matches):
+        """Toplu geçmiş yükleme; maçlar eskiden yeniye sıralı olmalı
+
+        Her takımın maçları önce gruplanır; kayan pencere yalnızca son `window`
+        maçla, form ise azalma katsayılarının vektör çarpımıyla hesaplanır.
+        """
+        per_team = {}
+        for match in matches:
+            home_goals = match['home_goals']
+            away_goals = match['away_goals']
+            per_team.setdefault(match['home_team'], []).append((home_goals, away_goals))
+            per_team.setdefault(match['away_team'], []).append((away_goals, home_goals))
+
+        for team, games in per_team.items():
+            state = self._state(team)
+            goals = np.asarray(games, dtype=np.int64)
+            scored, conceded = goals[:, 0], goals[:, 1]
+            points = np.where(scored > conceded, 3, np.where(scored == conceded, 1, 0))
+
+            # form: eski toplam decay^k ile azalır, yeni maçlar ağırlıklı eklenir
+            k = len(games)
+            weights = self.form_decay ** np.arange(k - 1, -1, -1)
+            decay_k = self.form_decay ** k
+            state.form_num = state.form_num * decay_k + float(points @ weights)
+            state.form_den = state.form_den * decay_k + 3 * float(weights.sum())
+            state.played += k
+
+            state.window.extend(map(tuple, goals[-self.window_size:].tolist()))
+            state.scored_sum = sum(s for s, _ in state.window)
+            state.conceded_sum = sum(c for _, c in state.window)
+
+    def has_ratings(self, team):
+        """Takım için işlenmiş en az bir maç var mı"""
+        state = self.teams.get(team)
+        return state is not None and bool(state.window)
+
+    def ratings(self, team):
+        """Takımın güncel değerleri; maç kaydı yoksa varsayılanlar"""
+        state = self.teams.get(team)
+        if state is None or not state.window:
+            return {'attack': DEFAULT_RATING, 'defense': DEFAULT_RATING, 'form': DEFAULT_RATING}
+
+        n = len(state.window)
+        return {
+            'attack': _clip(state.scored_sum / n * 2),
+            'defense': _clip(10 - state.conceded_sum / n * 2),
+            'form': _clip(state.form_num / state.form_den * 10)
+        }
+
+    def all_ratings(self):
+        """Tüm takımların değerleri: {takım: istatistikler}"""
+        return {team: self.ratings(team) for team in self.teams}
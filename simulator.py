@@ -0,0 +1,199 @@
+# simulator.py
+"""Skor bazlı Monte Carlo maç ve kupon simülatörü
+
+Her maçın gol beklentileri atak/savunma değerlerinden türetilir ve skorlar
+Poisson dağılımından vektörel olarak örneklenir. Simülasyonlar sabit boyutlu
+parçalar halinde çalışır; bellek parça boyutuyla sınırlıdır ve parçalar
+isteğe bağlı olarak süreçlere dağıtılır. Her parçanın tohumu SeedSequence ile
+türetildiğinden sonuçlar n_jobs değerinden bağımsızdır.
+"""
+import math
+import re
+from collections import Counter
+
+import numpy as np
+from joblib import Parallel, delayed
+
+from kupon_engine import elementary_symmetric
+
+DEFAULT_LINES = (0.5, 1.5, 2.5, 3.5, 4.5)
+# 'Üst 2.5', 'over_3.5', 'under_2_5'
+_TOTAL_MARKET = re.compile(r'(Üst|Alt|over|under)[ _](\d+)(?:[._](\d+))?')
+
+def match_rates(home_stats, away_stats, home_advantage=1.1):
+    """Ev ve deplasman gol beklentileri (lambda)
+
+    attack = atılan gol ortalaması * 2, defense = 10 - yenilen gol ortalaması * 2
+    olduğundan (bkz. TeamRatingEngine), beklenti takımın gol atma hızı ile
+    rakibin gol yeme hızının ortalamasıdır.
+    """
+    home_rate = (home_stats['attack'] / 2 + (10 - away_stats['defense']) / 2) / 2 * home_advantage
+    away_rate = (away_stats['attack'] / 2 + (10 - home_stats['defense']) / 2) / 2
+    return max(home_rate, 0.05), max(away_rate, 0.05)
+
+def _rates_for(matches, home_advantage):
+    rates = np.array([
+        match_rates(match['home_stats'], match['away_stats'], match.get('home_advantage', home_advantage))
+        for match in matches
+    ])
+    return rates[:, 0], rates[:, 1]
+
+def pick_hits(home_goals, away_goals, market):
+    """Tahminin tuttuğu simülasyonları gösteren boolean dizi
+
+    market: '1', 'X', '2', 'Üst 2.5' / 'Alt 2.5', 'over_3.5' / 'under_1.5' veya 'over_2_5'
+    """
+    if market == '1':
+        return home_goals > away_goals
+    if market == 'X':
+        return home_goals == away_goals
+    if market == '2':
+        return home_goals < away_goals
+
+    kind, line = parse_total_market(market)
+    total = home_goals + away_goals
+    return total > line if kind == 'over' else total < line
+
+def parse_total_market(market):
+    """Alt/üst pazarını ('over' | 'under', çizgi) olarak çöz
+
+    'Üst 2.5', 'over_3.5' ve oran anahtarlarındaki 'over_2_5' / 'under_2_5'
+    biçimleri kabul edilir; '2_5' çizgisi 2.5 olarak okunur.
+    """
+    match = _TOTAL_MARKET.fullmatch(market)
+    if match is None:
+        raise ValueError(f"Bilinmeyen pazar: {market}")
+    kind, whole, fraction = match.groups()
+    line = float(f"{whole}.{fraction}" if fraction else whole)
+    return ('over' if kind in ('Üst', 'over') else 'under'), line
+
+def _round_chunk(home_rates, away_rates, max_goals, n, seed):
+    """Bir parça için maç başına skor sayım matrisi: (maç, max_goals + 1, max_goals + 1)"""
+    rng = np.random.default_rng(seed)
+    m = len(home_rates)
+    home_goals = np.minimum(rng.poisson(home_rates, size=(n, m)), max_goals)
+    away_goals = np.minimum(rng.poisson(away_rates, size=(n, m)), max_goals)
+
+    size = max_goals + 1
+    index = np.arange(m) * size * size + home_goals * size + away_goals
+    return np.bincount(index.ravel(), minlength=m * size * size).reshape(m, size, size)
+
+def _coupon_chunk(home_rates, away_rates, markets, odds, system_size, stake, n, seed):
+    """Bir parça için kupon getirilerinin (değer, adet) sayımı ve tutan maç histogramı"""
+    rng = np.random.default_rng(seed)
+    m = len(home_rates)
+    home_goals = rng.poisson(home_rates, size=(n, m))
+    away_goals = rng.poisson(away_rates, size=(n, m))
+
+    hits = np.column_stack([pick_hits(home_goals[:, i], away_goals[:, i], markets[i]) for i in range(m)])
+    if system_size is None or system_size == m:
+        returns = np.where(hits.all(axis=1), stake * np.prod(odds), 0.0)
+    else:
+        # Tutan her k'lı kombinasyon oranlarının çarpımını öder: e_k(tutan * oran)
+        returns = stake * elementary_symmetric(hits * odds, system_size)[:, system_size]
+
+    values, counts = np.unique(np.round(returns, 6), return_counts=True)
+    hit_histogram = np.bincount(hits.sum(axis=1), minlength=m + 1)
+    return values, counts, hit_histogram
+
+class MonteCarloSimulator:
+    """Parça parça, isteğe bağlı paralel Monte Carlo simülasyonu"""
+
+    def __init__(self, seed=42, chunk_size=100_000, n_jobs=1, max_goals=10, home_advantage=1.1):
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.n_jobs = n_jobs
+        self.max_goals = max_goals
+        self.home_advantage = home_advantage
+
+    def _chunks(self, n_sims):
+        """Parça boyutları ve her parçanın bağımsız tohumu"""
+        sizes = [min(self.chunk_size, n_sims - start) for start in range(0, n_sims, self.chunk_size)]
+        return list(zip(sizes, np.random.SeedSequence(self.seed).spawn(len(sizes))))
+
+    def _run(self, func, args, n_sims):
+        chunks = self._chunks(n_sims)
+        if self.n_jobs == 1:
+            return [func(*args, n, seed) for n, seed in chunks]
+        return Parallel(n_jobs=self.n_jobs)(delayed(func)(*args, n, seed) for n, seed in chunks)
+
+    def simulate_round(self, matches, n_sims=100_000, lines=DEFAULT_LINES, top_scores=5):
+        """Bir maç listesini (ör. lig haftası) simüle edip maç başına dağılımları döndür
+
+        Her maç için 1X2 olasılıkları, her alt/üst çizgisi için olasılıklar, en olası
+        skorlar ve tam skor matrisi (max_goals ve üstü tek hücrede) döner.
+        """
+        home_rates, away_rates = _rates_for(matches, self.home_advantage)
+        counts = np.sum(self._run(_round_chunk, (home_rates, away_rates, self.max_goals), n_sims), axis=0)
+
+        size = self.max_goals + 1
+        goals = np.arange(size)
+        totals = goals[:, np.newaxis] + goals[np.newaxis, :]
+
+        results = []
+        for match, score_counts in zip(matches, counts):
+            dist = score_counts / n_sims
+            top = np.argsort(dist, axis=None)[::-1][:top_scores]
+            results.append({
+                'home_team': match.get('home_team'),
+                'away_team': match.get('away_team'),
+                'expected_goals': {
+                    'home': round(float((dist.sum(axis=1) * goals).sum()), 3),
+                    'away': round(float((dist.sum(axis=0) * goals).sum()), 3)
+                },
+                '1x2_probabilities': {
+                    '1': round(float(np.tril(dist, -1).sum()) * 100, 2),
+                    'X': round(float(np.trace(dist)) * 100, 2),
+                    '2': round(float(np.triu(dist, 1).sum()) * 100, 2)
+                },
+                'over_under': {
+                    line: {
+                        'Üst': round(float(dist[totals > line].sum()) * 100, 2),
+                        'Alt': round(float(dist[totals < line].sum()) * 100, 2)
+                    }
+                    for line in lines
+                },
+                'top_scores': [
+                    (f"{i // size}-{i % size}", round(float(dist.flat[i]) * 100, 2)) for i in top
+                ],
+                'score_matrix': dist
+            })
+        return results
+
+    def simulate_coupon(self, picks, n_sims=1_000_000, system_size=None, stake=1.0):
+        """Kuponu simüle edip getiri dağılımını döndür
+
+        picks: {'home_stats', 'away_stats', 'market', 'odds'} listesi.
+        system_size verilirse "k / n" sistem kupon, aksi halde kombine kupon
+        (her kombinasyona stake yatırılır).
+        """
+        home_rates, away_rates = _rates_for(picks, self.home_advantage)
+        markets = [pick['market'] for pick in picks]
+        odds = np.array([pick['odds'] for pick in picks], dtype=float)
+
+        returns = Counter()
+        hit_histogram = np.zeros(len(picks) + 1, dtype=np.int64)
+        for values, counts, hits in self._run(
+                _coupon_chunk, (home_rates, away_rates, markets, odds, system_size, stake), n_sims):
+            returns.update(dict(zip(values.tolist(), counts.tolist())))
+            hit_histogram += hits
+
+        values = np.array(sorted(returns))
+        probs = np.array([returns[value] for value in values]) / n_sims
+        mean = float(values @ probs)
+        total_stake = stake * (math.comb(len(picks), system_size) if system_size else 1)
+        cumulative = np.cumsum(probs)
+
+        return {
+            'stake': total_stake,
+            'expected_return': round(mean, 4),
+            'expected_profit': round(mean - total_stake, 4),
+            'std_return': round(float(np.sqrt(((values - mean) ** 2) @ probs)), 4),
+            'profit_probability': round(float(probs[values > total_stake].sum()) * 100, 3),
+            'zero_return_probability': round(float(probs[values == 0].sum()) * 100, 3),
+            'return_quantiles': {
+                q: float(values[np.searchsorted(cumulative, q)]) for q in (0.05, 0.5, 0.95)
+            },
+            'return_distribution': dict(zip(values.tolist(), probs.tolist())),
+            'hit_distribution': (hit_histogram / n_sims).tolist()
+        }
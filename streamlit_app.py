@@ -1,17 +1,84 @@
 # streamlit_app.py
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
 import sys
 import os
 
 # Mevcut kodlarınızı import edin
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from kupon_mvp import KuponAnalyzer
-from api_integration import EnhancedKuponAnalyzer
-from ml_algorithm import MLKuponAnalyzer
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(APP_DIR)
+
+# Streamlit her etkileşimde betiği baştan çalıştırır. Ağır modüller (pandas,
+# plotly, sklearn) yalnızca onları kullanan sayfada içe aktarılır; analizciler
+# ve modeller tüm oturumlar arasında paylaşılır, analiz sonuçları önbelleğe alınır.
+MODEL_PATH = os.path.join(APP_DIR, 'kupon_models.joblib')
+
+def data_version():
+    """Model paketinin değişme zamanı; model yeniden eğitilince önbellekteki sonuçlar geçersiz olur"""
+    try:
+        return os.stat(MODEL_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+@st.cache_resource
+def get_mvp_analyzer():
+    from kupon_mvp import KuponAnalyzer
+    return KuponAnalyzer()
+
+@st.cache_resource
+def get_api_analyzer():
+    from api_integration import EnhancedKuponAnalyzer
+    return EnhancedKuponAnalyzer()
+
+# Yalnızca güncel model sürümü bellekte tutulur
+@st.cache_resource(max_entries=1)
+def get_ml_analyzer(version):
+    """Modeli bir kez (belleğe eşleyerek) yükle; version değişince yeniden yüklenir"""
+    from ml_algorithm import MLKuponAnalyzer
+    analyzer = MLKuponAnalyzer(model_path=MODEL_PATH)
+    analyzer.load_models(mmap_mode='r')
+    return analyzer if analyzer.is_trained else None
+
+# API verisi toplayıcının önbellek süresiyle (300 sn) aynı sürede yenilenir
+@st.cache_data(show_spinner=False, ttl=300)
+def analyze_single_match(home_team, away_team, bet_type, version):
+    """Üç analizcinin sonuçları (takımlar, bahis tipi ve model sürümüne göre önbellekli)"""
+    result_mvp = get_mvp_analyzer().analyze_match(home_team, away_team, bet_type)
+    result_api = get_api_analyzer().analyze_match_with_api(home_team, away_team)
+    
+    result_ml = None
+    try:
+        analyzer_ml = get_ml_analyzer(version)
+        if analyzer_ml is not None:
+            home_stats = {'attack': 8.0, 'defense': 7.0, 'form': 7.5}
+            away_stats = {'attack': 7.5, 'defense': 6.5, 'form': 6.0}
+            result_ml = analyzer_ml.predict_match(home_stats, away_stats)
+    except Exception:
+        result_ml = None
+    
+    return result_mvp, result_api, result_ml
+
+@st.cache_data(show_spinner=False)
+def analyze_kupon_matches(matches, version):
+    """matches: (ev, deplasman, bahis tipi) demetleri; aynı kupon tekrar hesaplanmaz"""
+    return get_mvp_analyzer().analyze_kupon([
+        {'home_team': home, 'away_team': away, 'bet_type': bet_type} for home, away, bet_type in matches
+    ])
+
+@st.cache_data
+def simulated_performance(team):
+    import numpy as np
+    import pandas as pd
+    
+    # Simüle edilmiş geçmiş veriler
+    dates = pd.date_range(start='2024-01-01', end='2024-12-31', freq='W')
+    rng = np.random.RandomState(42)
+    
+    return pd.DataFrame({
+        'Tarih': dates[:20],
+        'Form': rng.uniform(3, 9, 20),
+        'Atak Gücü': rng.uniform(4, 10, 20),
+        'Savunma Gücü': rng.uniform(3, 9, 20)
+    })
 
 # Sayfa konfigürasyonu
 st.set_page_config(
@@ -103,26 +170,11 @@ if analysis_type == "Tekli Maç Analizi":
     # Analiz butonu
     if st.button("🔍 Analiz Et", type="primary"):
         if home_team != away_team:
+            import plotly.graph_objects as go
+            
             # Tüm analizleri yap
             col1, col2, col3 = st.columns(3)
-            
-            # MVP Analizi
-            analyzer_mvp = KuponAnalyzer()
-            result_mvp = analyzer_mvp.analyze_match(home_team, away_team, bet_type)
-            
-            # API Analizi
-            analyzer_api = EnhancedKuponAnalyzer()
-            result_api = analyzer_api.analyze_match_with_api(home_team, away_team)
-            
-            # ML Analizi
-            analyzer_ml = MLKuponAnalyzer()
-            try:
-                analyzer_ml.load_models()
-                home_stats = {'attack': 8.0, 'defense': 7.0, 'form': 7.5}
-                away_stats = {'attack': 7.5, 'defense': 6.5, 'form': 6.0}
-                result_ml = analyzer_ml.predict_match(home_stats, away_stats)
-            except:
-                result_ml = None
+            result_mvp, result_api, result_ml = analyze_single_match(home_team, away_team, bet_type, data_version())
             
             # Sonuçları göster
             with col1:
@@ -253,8 +305,13 @@ elif analysis_type == "Kupon Analizi":
         
         # Kupon analizi
         if st.button("🔍 Kuponu Analiz Et", type="primary"):
-            analyzer = KuponAnalyzer()
-            result = analyzer.analyze_kupon(st.session_state.kupon_matches)
+            import pandas as pd
+            import plotly.express as px
+            
+            result = analyze_kupon_matches(
+                tuple((m['home_team'], m['away_team'], m['bet_type']) for m in st.session_state.kupon_matches),
+                data_version()
+            )
             
             # Kupon özeti
             col1, col2, col3 = st.columns(3)
@@ -310,7 +367,10 @@ elif analysis_type == "Takım Karşılaştırması":
         team2 = st.selectbox("2. Takım", all_teams, key="compare2")
     
     if st.button("📊 Karşılaştır"):
-        analyzer = KuponAnalyzer()
+        import pandas as pd
+        import plotly.express as px
+        
+        analyzer = get_mvp_analyzer()
         
         team1_strength = analyzer.calculate_team_strength(team1)
         team2_strength = analyzer.calculate_team_strength(team2)
@@ -361,20 +421,10 @@ elif analysis_type == "Takım Karşılaştırması":
 elif analysis_type == "Geçmiş Performans":
     st.header("📈 Geçmiş Performans Analizi")
     
-    selected_team = st.selectbox("Takım Seçin", all_teams)
+    import plotly.express as px
     
-    # Simüle edilmiş geçmiş veriler
-    dates = pd.date_range(start='2024-01-01', end='2024-12-31', freq='W')
-    np.random.seed(42)
-    
-    performance_data = {
-        'Tarih': dates[:20],
-        'Form': np.random.uniform(3, 9, 20),
-        'Atak Gücü': np.random.uniform(4, 10, 20),
-        'Savunma Gücü': np.random.uniform(3, 9, 20)
-    }
-    
-    df_performance = pd.DataFrame(performance_data)
+    selected_team = st.selectbox("Takım Seçin", all_teams)
+    df_performance = simulated_performance(selected_team)
     
     # Performans grafiği
     fig = px.line(
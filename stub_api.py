@@ -0,0 +1,116 @@
+# stub_api.py
+"""Testler ve benchmark'lar için yerel sahte spor verisi API'si"""
+import json
+import threading
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, unquote
+
+class StubSportsAPI:
+    """football-data.org benzeri yanıtlar veren yerel HTTP sunucusu
+
+    Kullanım:
+        with StubSportsAPI() as api:
+            collector = SportsDataCollector(base_url=api.base_url)
+    """
+
+    def __init__(self, matches_by_team=None, etag=True, fail_first=0, delay=0.0):
+        self.matches_by_team = matches_by_team or {}
+        self.etag = etag
+        # İlk N isteğe 503 döner (tekrar deneme testleri için)
+        self.fail_first = fail_first
+        self.delay = delay
+        self.request_count = 0
+        self.not_modified_count = 0
+        # Yol başına istek sayısı ve aynı anda işlenen en fazla istek
+        self.path_counts = {}
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def payload_for(self, path):
+        """İstenen yol için JSON gövdesi"""
+        parts = [unquote(p) for p in path.strip('/').split('/')]
+        if len(parts) == 3 and parts[0] == 'teams' and parts[2] == 'matches':
+            return {'matches': self.matches_by_team.get(parts[1], [])}
+        return None
+
+    def start(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = unquote(urlparse(self.path).path)
+                with stub._lock:
+                    stub.request_count += 1
+                    stub.path_counts[path] = stub.path_counts.get(path, 0) + 1
+                    stub.in_flight += 1
+                    stub.peak_in_flight = max(stub.peak_in_flight, stub.in_flight)
+                    should_fail = stub.request_count <= stub.fail_first
+                try:
+                    self._respond(should_fail)
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+
+            def _respond(self, should_fail):
+                if stub.delay:
+                    threading.Event().wait(stub.delay)
+
+                if should_fail:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+
+                payload = stub.payload_for(urlparse(self.path).path)
+                if payload is None:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+
+                body = json.dumps(payload).encode('utf-8')
+                etag = f'"{zlib.crc32(body):08x}"'
+
+                if stub.etag and self.headers.get('If-None-Match') == etag:
+                    with stub._lock:
+                        stub.not_modified_count += 1
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                if stub.etag:
+                    self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
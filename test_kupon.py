@@ -1,7 +1,30 @@
 # test_kupon.py
-from kupon_mvp import KuponAnalyzer
-from api_integration import EnhancedKuponAnalyzer
-from ml_algorithm import MLKuponAnalyzer
+import asyncio
+import itertools
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from kupon_mvp import KuponAnalyzer, TeamStrengthIndex
+from api_integration import AsyncSportsDataCollector, EnhancedKuponAnalyzer, SportsDataCollector
+from ml_algorithm import FeatureWindow, MLKuponAnalyzer, TrainingConfig, load_model_bundle
+from fixtures import Fixture, FixtureBatch
+from stub_api import StubSportsAPI
+from data_store import KuponDataStore
+from rating_engine import TeamRatingEngine
+from ingest import ingest_matches, load_feature_matrix
+from benchmarks import run_benchmarks, compare_results
+from backtest import Backtester, MLStrategy, RuleBasedStrategy, run_walk_forward, summarize
+import instrumentation
+from kupon_engine import hit_distribution, system_bet, analyze_system_kupon
+from kupon_optimizer import optimize_kupon, build_pick_pool
+from value_scanner import scan_value_bets, fixtures_to_table, remove_margin
+from simulator import MonteCarloSimulator, match_rates, pick_hits
+from calibration import ProbabilityCalibrator, reliability_report
+from tuning import tune_models, save_tuning_result, load_tuned_config, tuning_path
+from prediction_service import MicroBatcher, PredictionServer
+from bulk_analysis import BulkKuponAnalyzer, analyze_coupons_bulk
 
 def test_mvp():
     """Basit MVP testi"""
@@ -44,7 +67,7 @@ def test_ml_algorithm():
     
     # Modeli eğit
     print("Model eğitiliyor...")
-    analyzer.train_models()
+    analyzer.train_models(save=False)
     
     # Test verisi
     home_stats = {'attack': 8.5, 'defense': 7.0, 'form': 8.0}
@@ -57,10 +80,941 @@ def test_ml_algorithm():
         print(f"Gol Tahmini: {prediction['goals_prediction']} (%{prediction['goals_confidence']})")
         print("1X2 Olasılıkları:", prediction['1x2_probabilities'])
 
+def test_ml_batch_prediction():
+    """Toplu tahmin tekli tahminle aynı sonucu vermeli"""
+    print("\n=== ML BATCH TEST ===")
+    
+    analyzer = MLKuponAnalyzer()
+    analyzer.train_models(save=False)
+    
+    matches = [
+        {'home_stats': {'attack': 8.5, 'defense': 7.0, 'form': 8.0},
+         'away_stats': {'attack': 7.0, 'defense': 6.5, 'form': 6.0}},
+        {'home_stats': {'attack': 4.0, 'defense': 5.0, 'form': 3.5},
+         'away_stats': {'attack': 9.0, 'defense': 8.5, 'form': 9.0},
+         'additional_data': {'h2h_home_wins': 2, 'h2h_away_wins': 5, 'total_h2h': 10}},
+    ]
+    
+    X = analyzer.create_features_batch(matches)
+    assert X.shape == (2, 15)
+    for i, match in enumerate(matches):
+        single = analyzer.create_features(match['home_stats'], match['away_stats'], match.get('additional_data'))
+        assert (X[i] == single[0]).all()
+    
+    batch = analyzer.predict_matches_batch(matches)
+    for match, prediction in zip(matches, batch):
+        single = analyzer.predict_match(match['home_stats'], match['away_stats'], match.get('additional_data'))
+        assert prediction == single
+        print(f"1X2: {prediction['1x2_prediction']} (%{prediction['1x2_confidence']})")
+
+def test_training_data_generator():
+    """Vektörel eğitim verisi üretimi etiket kurallarına uymalı"""
+    print("\n=== TRAINING DATA TEST ===")
+    
+    analyzer = MLKuponAnalyzer()
+    X, y_1x2, y_goals = analyzer.generate_training_data(5000, chunk_size=1024)
+    
+    assert X.shape == (5000, 15)
+    assert (X[:, 6:9] == X[:, 0:3] - X[:, 3:6]).all()
+    assert (X[:, 9] + X[:, 10] <= 1).all()
+    
+    strength_diff = X[:, 0:3].sum(axis=1) * X[:, 12] - X[:, 3:6].sum(axis=1)
+    assert (y_1x2[strength_diff > 3] == 0).all()
+    assert (y_1x2[strength_diff < -3] == 2).all()
+    assert (y_goals == ((X[:, 0] + X[:, 3]) / 4 + X[:, 11] / 3 > 2.5)).all()
+    
+    chunks = list(analyzer.generate_training_chunks(5000, chunk_size=1024))
+    assert len(chunks) == 5 and len(chunks[-1][0]) == 5000 - 4 * 1024
+    print(f"Sınıf dağılımı: {np.bincount(y_1x2)}")
+
+def test_training_config():
+    """Yapılandırılabilir eğitim: hist motoru ve farklı backend'ler"""
+    print("\n=== TRAINING CONFIG TEST ===")
+    
+    home_stats = {'attack': 8.5, 'defense': 7.0, 'form': 8.0}
+    away_stats = {'attack': 7.0, 'defense': 6.5, 'form': 6.0}
+    
+    for config in [
+        TrainingConfig(num_samples=1000, engine_1x2='hist', n_jobs=2, backend='loky'),
+        TrainingConfig(num_samples=1000, n_estimators_1x2=20, n_estimators_goals=20, n_jobs=1, backend='sequential'),
+    ]:
+        analyzer = MLKuponAnalyzer()
+        analyzer.train_models(config, save=False)
+        prediction = analyzer.predict_match(home_stats, away_stats)
+        assert prediction['1x2_prediction'] in ('1', 'X', '2')
+        print(f"{config.engine_1x2}/{config.backend}: {prediction['1x2_prediction']} (%{prediction['1x2_confidence']})")
+
+def test_model_bundle(tmp_path):
+    """Model paketi kaydedilip önbellekten tekrar yüklenebilmeli"""
+    print("\n=== MODEL BUNDLE TEST ===")
+    
+    bundle_path = str(tmp_path / "models.joblib")
+    analyzer = MLKuponAnalyzer(model_path=bundle_path)
+    analyzer.train_models(TrainingConfig(num_samples=500, n_estimators_1x2=10, n_estimators_goals=10))
+    
+    home_stats = {'attack': 8.5, 'defense': 7.0, 'form': 8.0}
+    away_stats = {'attack': 7.0, 'defense': 6.5, 'form': 6.0}
+    expected = analyzer.predict_match(home_stats, away_stats)
+    
+    # Sıkıştırılmamış paket belleğe eşlenerek yüklenir, ikinci yükleme önbellekten gelir
+    loaded = MLKuponAnalyzer(model_path=bundle_path)
+    loaded.load_models(mmap_mode='r')
+    assert loaded.predict_match(home_stats, away_stats) == expected
+    assert load_model_bundle(bundle_path, mmap_mode='r')['model_goals'] is loaded.model_goals
+    
+    # Dosya değişince (mtime) paket yeniden okunur
+    compressed_path = str(tmp_path / "models_lz.joblib")
+    analyzer.save_models(compressed_path, compress=3)
+    bundle = load_model_bundle(compressed_path)
+    os.utime(compressed_path, ns=(0, 0))
+    assert load_model_bundle(compressed_path) is not bundle
+    assert bundle['training_config']['num_samples'] == 500
+    
+    # Özel yoldaki paket yoksa eski .pkl dosyalarına düşülmez
+    missing = MLKuponAnalyzer(model_path=str(tmp_path / "yok.joblib"))
+    try:
+        missing.load_models()
+        assert False, "eksik paket sessizce yüklendi"
+    except FileNotFoundError:
+        assert not missing.is_trained
+
+def test_http_cache_and_retry():
+    """Veri toplayıcı önbellek, ETag ve tekrar denemeyi yerel sunucuyla kullanmalı"""
+    print("\n=== HTTP LAYER TEST ===")
+    
+    with StubSportsAPI(fail_first=1) as api:
+        collector = SportsDataCollector(base_url=api.base_url, retry_backoff=0.01, cache_ttl=60)
+        
+        # İlk istek 503 alır ve tekrar denenir, ikincisi önbellekten gelir
+        stats = collector.get_team_stats("Galatasaray")
+        assert set(stats) == {'attack', 'defense', 'form'}
+        collector.get_team_stats("Galatasaray")
+        assert api.request_count == 2
+        assert collector.cache_stats['hits'] == 1
+        
+        # TTL dolunca koşullu istek atılır ve 304 ile eski veri kullanılır
+        collector._cache.clear()
+        collector.get_team_stats("Galatasaray")
+        assert api.not_modified_count == 1
+        assert collector.cache_stats['not_modified'] == 1
+        print(f"Önbellek: {collector.cache_stats}")
+
+def test_async_kupon_fetch():
+    """Asenkron kupon analizi takımları bir kez ve eşzamanlı çekmeli"""
+    print("\n=== ASYNC KUPON TEST ===")
+    
+    kupon = [
+        {'home_team': 'Galatasaray', 'away_team': 'Fenerbahçe'},
+        {'home_team': 'Beşiktaş', 'away_team': 'Galatasaray', 'bet_type': 'O/U2.5'},
+        {'home_team': 'Trabzonspor', 'away_team': 'Başakşehir', 'bet_type': '1X2'},
+        {'home_team': 'Fenerbahçe', 'away_team': 'Trabzonspor', 'bet_type': 'O/U2.5'},
+    ]
+    
+    with StubSportsAPI(delay=0.2) as api:
+        collector = SportsDataCollector(base_url=api.base_url)
+        analyzer = EnhancedKuponAnalyzer(data_collector=collector)
+        result = analyzer.analyze_kupon(kupon)
+        
+        # Birden fazla maçta geçen takımlar bir kez çekilir (5 farklı takım)
+        assert api.request_count == 5
+        assert all(n == 1 for n in api.path_counts.values())
+        assert api.peak_in_flight > 1
+        
+        for match, analysis in zip(kupon, result['matches']):
+            bet_type = match.get('bet_type', '1X2')
+            assert analysis == analyzer.analyze_match_with_api(match['home_team'], match['away_team'], bet_type)
+            assert analysis['prediction'] in (('1', 'X', '2') if bet_type == '1X2' else ('Üst 2.5', 'Alt 2.5'))
+        try:
+            analyzer.analyze_kupon([{'home_team': 'Galatasaray', 'away_team': 'Fenerbahçe', 'bet_type': 'KG'}])
+            assert False, "bilinmeyen bahis türü kabul edildi"
+        except ValueError:
+            pass
+    
+    # Eşzamanlılık varsayılan havuzla değil max_concurrency ile sınırlıdır
+    async def fetch_all(async_collector, teams):
+        return await asyncio.gather(*(async_collector.get_team_stats(team) for team in teams))
+    teams = [f"Takım {i}" for i in range(12)]
+    with StubSportsAPI(delay=0.2) as api:
+        collector = SportsDataCollector(base_url=api.base_url)
+        with AsyncSportsDataCollector(collector, max_concurrency=4) as async_collector:
+            asyncio.run(fetch_all(async_collector, teams))
+        assert api.request_count == 12
+        assert 1 < api.peak_in_flight <= 4
+    print(f"Kupon güveni: %{result['kupon_confidence']} (en fazla {api.peak_in_flight} eşzamanlı istek)")
+
+def test_data_store(tmp_path):
+    """Yerel depo: toplayıcı ve analizciler önce depodan okumalı"""
+    print("\n=== DATA STORE TEST ===")
+    
+    db_path = str(tmp_path / "kupon.db")
+    store = KuponDataStore(db_path)
+    store.add_matches([
+        {'league': 'Süper Lig', 'match_date': '2025-01-10', 'home_team': 'Galatasaray',
+         'away_team': 'Fenerbahçe', 'home_goals': 2, 'away_goals': 1},
+        {'league': 'Süper Lig', 'match_date': '2025-05-20', 'home_team': 'Fenerbahçe',
+         'away_team': 'Galatasaray', 'home_goals': 0, 'away_goals': 0},
+    ])
+    store.add_odds_snapshot('Galatasaray', 'Fenerbahçe', {'1': 2.0, 'X': 3.4, '2': 3.9}, taken_at='2025-06-01T10:00')
+    store.add_odds_snapshot('Galatasaray', 'Fenerbahçe', {'1': 1.9, 'X': 3.5, '2': 4.1}, taken_at='2025-06-01T12:00')
+    
+    # API takımı farklı yazar: değerler yanıttaki takımdan hesaplanır
+    api_matches = [
+        {'utcDate': '2025-05-27T17:00:00Z', 'homeTeam': {'name': 'Galatasaray SK'}, 'awayTeam': {'name': 'Konyaspor'},
+         'score': {'fullTime': {'home': 3, 'away': 0}}},
+        {'utcDate': '2025-05-20T17:00:00Z', 'homeTeam': {'name': 'Fenerbahçe'}, 'awayTeam': {'name': 'Galatasaray SK'},
+         'score': {'fullTime': {'home': 0, 'away': 0}}},
+    ]
+    with StubSportsAPI(matches_by_team={'Galatasaray': api_matches}) as api:
+        collector = SportsDataCollector(base_url=api.base_url, store=store)
+        galatasaray = collector.get_team_stats('Galatasaray')
+        assert galatasaray == collector.process_team_data({'matches': api_matches}, 'Galatasaray SK')
+        assert galatasaray != {'attack': 5.0, 'defense': 5.0, 'form': 5.0}
+        assert api.request_count == 1
+        collector.get_team_stats('Galatasaray')
+        assert api.request_count == 1
+        
+        # Boş yanıt varsayılanlara düşer ama depoya yazılmaz
+        assert collector.get_team_stats('Kasımpaşa') == collector.get_default_stats('Kasımpaşa')
+        assert not store.get_team_ratings('Kasımpaşa')
+    store.close()
+    
+    # Yeniden başlatma: ağ olmadan depodaki verilerle çalışır
+    store = KuponDataStore(db_path)
+    collector = SportsDataCollector(base_url='http://127.0.0.1:9/', store=store, max_retries=1)
+    assert collector.get_team_stats('Galatasaray') == galatasaray
+    h2h = collector.get_head_to_head('Galatasaray', 'Fenerbahçe')
+    assert (h2h['total_matches'], h2h['team1_wins'], h2h['draws'], h2h['avg_goals']) == (2, 1, 1, 1.5)
+    assert collector.get_current_odds({'home': 'Galatasaray', 'away': 'Fenerbahçe'})['1'] == 1.9
+    assert len(store.get_team_matches('Galatasaray')) == 2
+    
+    store.upsert_team_ratings('Besiktas', {'attack': 9.0, 'defense': 8.0, 'form': 9.5})
+    analyzer = KuponAnalyzer(store=store)
+    assert analyzer.team_stats['Besiktas']['attack'] == 9.0
+    store.close()
+
+def test_rating_engine():
+    """Artımlı güncelleme ile toplu yükleme aynı değerleri üretmeli"""
+    print("\n=== RATING ENGINE TEST ===")
+    
+    rng = np.random.default_rng(7)
+    teams = [f"Takım {i}" for i in range(6)]
+    matches = []
+    for _ in range(200):
+        home, away = rng.choice(teams, size=2, replace=False)
+        matches.append({'home_team': str(home), 'away_team': str(away),
+                        'home_goals': int(rng.poisson(1.5)), 'away_goals': int(rng.poisson(1.1))})
+    
+    incremental = TeamRatingEngine()
+    for match in matches:
+        incremental.update(match)
+    
+    bulk = TeamRatingEngine()
+    bulk.update_many(matches[:120])
+    bulk.update_many(matches[120:])
+    
+    for team in teams:
+        for key, value in incremental.ratings(team).items():
+            assert abs(value - bulk.ratings(team)[key]) < 1e-9
+    
+    # API formatındaki yanıt takım adıyla işlenir
+    collector = SportsDataCollector()
+    raw = {'matches': [
+        {'utcDate': '2025-03-01T17:00:00Z', 'homeTeam': {'name': 'Galatasaray'}, 'awayTeam': {'name': 'Konyaspor'},
+         'score': {'fullTime': {'home': 3, 'away': 0}}},
+        {'utcDate': '2025-03-08T17:00:00Z', 'homeTeam': {'name': 'Sivasspor'}, 'awayTeam': {'name': 'Galatasaray'},
+         'score': {'fullTime': {'home': 1, 'away': 1}}},
+    ]}
+    stats = collector.process_team_data(raw)
+    assert collector.process_team_data(raw, 'Galatasaray SK') == stats
+    assert stats == {'attack': 4.0, 'defense': 9.0, 'form': min(10, max(1, (3 * 0.7 + 1) / (3 * 0.7 + 3) * 10))}
+    
+    # record_results ile işlenen sonuçlar get_team_stats'a yansır (API'ye gidilmez)
+    collector = SportsDataCollector(base_url='http://127.0.0.1:9/', max_retries=1)
+    collector.record_results(matches[:120])
+    assert collector.get_team_stats('Takım 0') == collector.rating_engine.ratings('Takım 0')
+    collector.record_results(matches[120:])
+    for key, value in collector.get_team_stats('Takım 0').items():
+        assert abs(value - incremental.ratings('Takım 0')[key]) < 1e-9
+    print(f"Galatasaray: {stats}")
+
+def test_bulk_ingest(tmp_path):
+    """Tarihsel maçlar parça parça işlenip train_models'e verilebilmeli"""
+    print("\n=== BULK INGEST TEST ===")
+    
+    rng = np.random.default_rng(3)
+    teams = [f"Takım {i}" for i in range(18)]
+    n = 3000
+    pairs = np.array([rng.choice(len(teams), size=2, replace=False) for _ in range(n)])
+    history = pd.DataFrame({
+        'match_date': pd.date_range('2018-08-01', periods=n, freq='6h').strftime('%Y-%m-%d %H:%M'),
+        'home_team': [teams[i] for i in pairs[:, 0]],
+        'away_team': [teams[i] for i in pairs[:, 1]],
+        'home_goals': rng.poisson(1.5, n),
+        'away_goals': rng.poisson(1.1, n),
+    })
+    
+    csv_path = tmp_path / "history.csv"
+    history.iloc[:2000].to_csv(csv_path, index=False)
+    parquet_path = tmp_path / "history.parquet"
+    history.iloc[2000:].to_parquet(parquet_path)
+    
+    output_path = str(tmp_path / "features.parquet")
+    assert ingest_matches([str(csv_path), str(parquet_path)], output_path, chunk_size=256) == n
+    
+    X, y_1x2, y_goals = load_feature_matrix(output_path)
+    assert X.shape == (n, 15)
+    assert (y_goals == (history['home_goals'] + history['away_goals'] > 2.5)).all()
+    # İlk maçta geçmiş yok: varsayılan değerler kullanılır
+    assert list(X[0, :6]) == [5.0] * 6 and list(X[0, 9:12]) == [0.4, 0.3, 2.5]
+    
+    analyzer = MLKuponAnalyzer(model_path=str(tmp_path / "models.joblib"))
+    analyzer.train_models(TrainingConfig(n_estimators_1x2=20, n_estimators_goals=20), data=output_path)
+    assert analyzer.is_trained
+
+def test_benchmarks():
+    """Benchmark raporu JSON'a yazılabilir olmalı ve yavaşlamaları bulmalı"""
+    print("\n=== BENCHMARK TEST ===")
+    
+    report = run_benchmarks(quick=True, groups=['mvp', 'api'], repeat=1)
+    names = {result['name'] for result in report['results']}
+    assert {'KuponAnalyzer.analyze_kupon', 'EnhancedKuponAnalyzer.analyze_kupon'} <= names
+    
+    slower = json.loads(json.dumps(report))
+    for result in slower['results']:
+        result['median'] *= 2
+    assert compare_results(report, report) == []
+    assert len(compare_results(slower, report)) == len(report['results'])
+
+def test_instrumentation(tmp_path):
+    """Aşama süreleri Prometheus formatında dışa aktarılmalı, profil dosyası yazılmalı"""
+    print("\n=== INSTRUMENTATION TEST ===")
+    
+    instrumentation.metrics.reset()
+    instrumentation.enable_profiling(str(tmp_path), engine='cprofile')
+    try:
+        KuponAnalyzer().analyze_kupon([{'home_team': 'Galatasaray', 'away_team': 'Besiktas'}])
+    finally:
+        instrumentation.disable_profiling()
+    
+    with StubSportsAPI() as api:
+        collector = SportsDataCollector(base_url=api.base_url)
+        collector.get_team_stats('Galatasaray')
+        collector.get_team_stats('Galatasaray')
+    
+    snapshot = instrumentation.metrics.snapshot()
+    assert snapshot['stages']['{stage="analyze_kupon",analyzer="mvp"}']['count'] == 1
+    assert snapshot['events']['{event="http_cache",result="hit"}'] == 1
+    
+    text = instrumentation.export_prometheus()
+    assert '# TYPE kupon_stage_duration_seconds histogram' in text
+    assert 'kupon_stage_duration_seconds_bucket{stage="http_fetch",api="football_data",le="+Inf"} 1' in text
+    assert 'kupon_events_total{event="http_cache",result="miss"} 1' in text
+    assert len(list(tmp_path.glob("analyze_kupon-*.prof"))) == 1
+
+def test_system_kupon_engine():
+    """DP sonuçları alt küme sayımıyla birebir aynı olmalı"""
+    print("\n=== SYSTEM KUPON TEST ===")
+    
+    rng = np.random.default_rng(11)
+    probs = rng.uniform(0.3, 0.8, size=6)
+    odds = rng.uniform(1.3, 3.0, size=6)
+    
+    results = system_bet(probs, odds, sizes=[3, 4, 6])
+    for k in (3, 4, 6):
+        expected_payout = sum(
+            np.prod(probs[list(s)] * odds[list(s)]) for s in itertools.combinations(range(6), k)
+        )
+        hit_probability = sum(
+            np.prod(np.where(hits, probs, 1 - probs))
+            for hits in itertools.product([0, 1], repeat=6) if sum(hits) >= k
+        )
+        assert np.isclose(results[k]['expected_payout'][0], expected_payout)
+        assert np.isclose(results[k]['hit_probability'][0], hit_probability)
+    assert results[4]['combinations'][0] == 15
+    assert np.isclose(hit_distribution(probs)[0, -1], np.prod(probs))
+    
+    # Farklı uzunluktaki kuponlar maske ile tek seferde hesaplanır
+    mask = np.array([[True] * 6, [True] * 4 + [False] * 2])
+    batch = system_bet(np.vstack([probs, probs]), np.vstack([odds, odds]), sizes=[3], mask=mask)
+    short = system_bet(probs[:4], odds[:4], sizes=[3])
+    assert np.isclose(batch[3]['expected_payout'][1], short[3]['expected_payout'][0])
+    assert batch[3]['combinations'][1] == 4
+    
+    # Boş veya 1..n dışındaki sistem boyutları açıklayıcı hata verir
+    for sizes in ([], [0], [7], [3, -1]):
+        try:
+            system_bet(probs, odds, sizes=sizes)
+            assert False, sizes
+        except ValueError:
+            pass
+    
+    summary = analyze_system_kupon(probs, odds, sizes=[3])
+    print(f"3/6 sistem: {summary['systems']['3/6']}")
+
+def _random_fixture_pool(size, seed):
+    """Rastgele olasılık ve oranlarla maç havuzu"""
+    rng = np.random.default_rng(seed)
+    fixtures = []
+    for i in range(size):
+        p_1x2 = rng.dirichlet([3, 2, 2]) * 100
+        p_over = rng.uniform(30, 70)
+        fixtures.append({
+            'home_team': f"Ev {i}", 'away_team': f"Dep {i}", 'league': f"Lig {i % 4}",
+            'prediction': {
+                '1x2_probabilities': {'1': p_1x2[0], 'X': p_1x2[1], '2': p_1x2[2]},
+                'goals_probabilities': {'Alt 2.5': 100 - p_over, 'Üst 2.5': p_over},
+            },
+            'odds': dict(zip(['1', 'X', '2', 'over_2_5', 'under_2_5'], rng.uniform(1.2, 5.0, size=5))),
+        })
+    return fixtures
+
+def test_kupon_optimizer():
+    """Dal-sınır araması kaba kuvvetle aynı en iyi kuponları bulmalı"""
+    print("\n=== KUPON OPTIMIZER TEST ===")
+    
+    fixtures = _random_fixture_pool(10, seed=5)
+    
+    for objective in ('ev', 'hit'):
+        found = optimize_kupon(fixtures, size=3, top_k=5, objective=objective,
+                               min_total_odds=4.0, max_correlated=2)
+        
+        # Kaba kuvvet: her maçtan en fazla bir tahmin, aynı ligden en fazla iki
+        pool = build_pick_pool(fixtures)
+        scores = []
+        for chosen in itertools.combinations(pool, 3):
+            for picks in itertools.product(*chosen):
+                leagues = [pick['league'] for pick in picks]
+                total_odds = np.prod([pick['odds'] for pick in picks])
+                if max(leagues.count(league) for league in leagues) > 2 or total_odds < 4.0:
+                    continue
+                hit = np.prod([pick['probability'] for pick in picks])
+                scores.append(hit * total_odds if objective == 'ev' else hit)
+        expected = sorted(scores, reverse=True)[:5]
+        
+        got = [kupon['expected_value'] + 1 if objective == 'ev' else kupon['hit_probability'] / 100
+               for kupon in found]
+        assert np.allclose(got, expected, atol=1e-3)
+    
+    start = time.perf_counter()
+    best = optimize_kupon(_random_fixture_pool(150, seed=6), size=6, top_k=20, max_correlated=3)
+    print(f"150 maçlık havuz: {time.perf_counter() - start:.3f} sn, en iyi EV {best[0]['expected_value']}")
+
+def test_value_scanner():
+    """Marj kaldırılıp value satırları EV'ye göre sıralanmalı"""
+    print("\n=== VALUE SCANNER TEST ===")
+    
+    fair, margin = remove_margin(np.array([[2.0, 3.5, 4.0]]))
+    assert np.isclose(fair.sum(), 1.0) and np.isclose(margin[0], 1 / 2 + 1 / 3.5 + 1 / 4 - 1)
+    
+    table = fixtures_to_table(_random_fixture_pool(20000, seed=8))
+    start = time.perf_counter()
+    values = scan_value_bets(table, min_edge=0.02)
+    elapsed = time.perf_counter() - start
+    
+    assert (values['edge'] > 0.02).all()
+    assert values['expected_value'].is_monotonic_decreasing
+    # Tek satırı elle doğrula
+    row = values.iloc[0]
+    match = table[(table['home_team'] == row['home_team'])].iloc[0]
+    assert np.isclose(row['expected_value'], row['model_probability'] * row['odds'] - 1)
+    assert row['odds'] in match[['odds_1', 'odds_x', 'odds_2', 'odds_over', 'odds_under']].values
+    print(f"{len(table) * 5} satır, {len(values)} value bet, {elapsed * 1000:.1f} ms")
+
+def test_monte_carlo_simulator():
+    """Simülasyon Poisson kesin değerlerine yakınsamalı ve n_jobs'tan bağımsız olmalı"""
+    print("\n=== MONTE CARLO TEST ===")
+    
+    home_stats = {'attack': 7.0, 'defense': 7.5, 'form': 7.0}
+    away_stats = {'attack': 5.0, 'defense': 6.0, 'form': 5.5}
+    match = {'home_team': 'Galatasaray', 'away_team': 'Konyaspor', 'home_stats': home_stats, 'away_stats': away_stats}
+    
+    simulator = MonteCarloSimulator(seed=1, chunk_size=50_000)
+    result = simulator.simulate_round([match], n_sims=200_000)[0]
+    
+    home_rate, away_rate = match_rates(home_stats, away_stats)
+    assert abs(result['expected_goals']['home'] - home_rate) < 0.02
+    total_rate = home_rate + away_rate
+    exact_under = np.exp(-total_rate) * (1 + total_rate + total_rate ** 2 / 2)
+    assert abs(result['over_under'][2.5]['Alt'] / 100 - exact_under) < 0.005
+    assert abs(sum(result['1x2_probabilities'].values()) - 100) < 0.05
+    
+    picks = [dict(match, market='1', odds=1.7), dict(match, market='Üst 2.5', odds=1.9),
+             dict(match, market='under_4.5', odds=1.4)]
+    coupon = simulator.simulate_coupon(picks, n_sims=120_000, system_size=2)
+    parallel = MonteCarloSimulator(seed=1, chunk_size=50_000, n_jobs=2).simulate_coupon(picks, n_sims=120_000, system_size=2)
+    assert coupon == parallel
+    assert coupon['stake'] == 3 and abs(sum(coupon['hit_distribution']) - 1) < 1e-9
+    
+    # get_current_odds anahtarları ('over_2_5') 2.5 çizgisi olarak okunmalı
+    odds = SportsDataCollector().get_current_odds({'home': 'Galatasaray', 'away': 'Konyaspor'})
+    home_goals, away_goals = np.array([0, 1, 2, 3]), np.array([0, 1, 1, 2])
+    for market in ('over_2_5', 'under_2_5'):
+        assert market in odds
+    assert pick_hits(home_goals, away_goals, 'over_2_5').tolist() == [False, False, True, True]
+    assert pick_hits(home_goals, away_goals, 'under_2_5').tolist() == [True, True, False, False]
+    assert (pick_hits(home_goals, away_goals, 'Üst 2.5') == pick_hits(home_goals, away_goals, 'over_2_5')).all()
+    for market in ('over_2__5', 'over', 'total_2.5', 'Üst 2.5x'):
+        try:
+            pick_hits(home_goals, away_goals, market)
+            assert False, market
+        except ValueError:
+            pass
+    print(f"2/3 sistem beklenen getiri: {coupon['expected_return']} (kâr olasılığı %{coupon['profit_probability']})")
+
+def test_walk_forward_backtest(tmp_path):
+    """Backtest maç günlerini sırayla oynatıp sızıntısız, akışlı sonuç üretmeli"""
+    print("\n=== WALK-FORWARD BACKTEST TEST ===")
+    
+    rng = np.random.default_rng(5)
+    teams = [f"Takım {i}" for i in range(10)]
+    days = 60
+    rows = []
+    for day in pd.date_range('2020-08-01', periods=days, freq='7D').strftime('%Y-%m-%d'):
+        order = rng.permutation(len(teams))
+        for home, away in order.reshape(-1, 2):
+            rows.append((day, teams[home], teams[away], rng.poisson(1.5), rng.poisson(1.1)))
+    history = pd.DataFrame(rows, columns=['match_date', 'home_team', 'away_team', 'home_goals', 'away_goals'])
+    history['odds_1'], history['odds_x'], history['odds_2'] = 2.2, 3.3, 3.4
+    history['odds_over'], history['odds_under'] = 1.9, 1.9
+    csv_path = str(tmp_path / "history.csv")
+    history.to_csv(csv_path, index=False)
+    
+    # Parça sınırında bölünen maç günleri birleştirilmeli
+    results = list(Backtester(RuleBasedStrategy()).run(csv_path, chunk_size=7))
+    assert len(results) == days and all(result['fixtures'] == 5 for result in results)
+    summary = summarize(results)
+    assert summary['picks'] == len(history) and 0 <= summary['accuracy'] <= 1
+    assert summary['coupon_stake'] == days
+    
+    strategy = MLStrategy(TrainingConfig(n_estimators_1x2=10, n_estimators_goals=10, n_jobs=1),
+                          retrain_every=20, min_train=50)
+    ml_results = list(Backtester(strategy, coupon_size=2).run(csv_path, start='2020-12-01'))
+    assert strategy.analyzer.is_trained and ml_results[0]['matchday'] >= '2020-12-01'
+    assert len(ml_results) < days and all(result['picks'] == 5 for result in ml_results)
+    
+    summaries = run_walk_forward(
+        csv_path, {'rule_based': {}, 'enhanced': {}},
+        folds=[('2020-10-01', '2021-03-01'), ('2021-03-01', '2021-10-01')],
+        n_jobs=2, output_dir=str(tmp_path / "runs")
+    )
+    assert [s['strategy'] for s in summaries] == ['rule_based', 'rule_based', 'enhanced', 'enhanced']
+    assert summaries[0]['matchdays'] + summaries[1]['matchdays'] == days - 9
+    with open(tmp_path / "runs" / "rule_based_2020-10-01_2021-03-01.jsonl", encoding='utf-8') as f:
+        assert sum(1 for _ in f) == summaries[0]['matchdays']
+    for s in summaries:
+        print(f"{s['strategy']} {s['start']}: isabet {s['accuracy']}, kupon ROI {s['coupon_roi']}")
+
+def test_probability_calibration(tmp_path):
+    """Kalibratörler aşırı güvenli olasılıkları düzeltmeli ve pakete kaydedilmeli"""
+    print("\n=== CALIBRATION TEST ===")
+    
+    # Gerçek olasılık p iken model p'yi 0/1'e doğru iter
+    rng = np.random.default_rng(11)
+    true_p = rng.uniform(0.05, 0.95, 20_000)
+    labels = (rng.uniform(size=true_p.size) < true_p).astype(int)
+    skewed = true_p ** 3 / (true_p ** 3 + (1 - true_p) ** 3)
+    raw = np.column_stack([1 - skewed, skewed])
+    
+    for method in ('isotonic', 'sigmoid'):
+        calibrator = ProbabilityCalibrator(method).fit(raw[:10_000], labels[:10_000])
+        calibrated = calibrator.transform(raw[10_000:])
+        assert np.allclose(calibrated.sum(axis=1), 1)
+        before = reliability_report(raw[10_000:], labels[10_000:])
+        after = reliability_report(calibrated, labels[10_000:])
+        assert after['ece'] < before['ece'] / 2 and after['brier'] <= before['brier']
+        assert sum(b['count'] for b in after['bins']) == 10_000
+        print(f"{method}: ECE {before['ece']} -> {after['ece']}")
+    
+    bundle_path = str(tmp_path / "models.joblib")
+    analyzer = MLKuponAnalyzer(model_path=bundle_path)
+    analyzer.train_models(TrainingConfig(num_samples=2000, n_estimators_1x2=20, n_estimators_goals=20))
+    assert set(analyzer.calibration_report) == {'1x2', 'goals'}
+    
+    home_stats = {'attack': 8.5, 'defense': 7.0, 'form': 8.0}
+    away_stats = {'attack': 7.0, 'defense': 6.5, 'form': 6.0}
+    expected = analyzer.predict_match(home_stats, away_stats)
+    loaded = MLKuponAnalyzer(model_path=bundle_path)
+    loaded.load_models()
+    assert loaded.calibrator_1x2 is not None and loaded.predict_match(home_stats, away_stats) == expected
+    
+    # Kalibrasyon kapalıyken ham olasılıklar döner
+    plain = MLKuponAnalyzer(model_path=str(tmp_path / "plain.joblib"))
+    plain.train_models(TrainingConfig(num_samples=500, n_estimators_1x2=10, n_estimators_goals=10, calibration=None))
+    X = plain.create_features(home_stats, away_stats)
+    assert np.allclose(plain.predict_proba_features(X)[0], plain.model_1x2.predict_proba(plain.scaler.transform(X)))
+
+def test_online_model_update(tmp_path):
+    """Biten maçlarla modeller ağaç eklenerek güncellenmeli, sınırda yeniden eğitilmeli"""
+    print("\n=== ONLINE UPDATE TEST ===")
+    
+    bundle_path = str(tmp_path / "models.joblib")
+    config = TrainingConfig(num_samples=1000, n_estimators_1x2=20, n_estimators_goals=20,
+                            online_estimators=5, online_max_estimators=30, online_window=1500)
+    analyzer = MLKuponAnalyzer(model_path=bundle_path)
+    analyzer.train_models(config)
+    
+    rng = np.random.default_rng(8)
+    matchday = [
+        {'home_stats': dict(zip(('attack', 'defense', 'form'), rng.uniform(3, 10, 3))),
+         'away_stats': dict(zip(('attack', 'defense', 'form'), rng.uniform(3, 10, 3))),
+         'home_goals': int(home_goals), 'away_goals': int(away_goals)}
+        for home_goals, away_goals in rng.poisson(1.4, size=(300, 2))
+    ]
+    
+    result = analyzer.update_models(matchday)
+    assert result == {'mode': 'warm', 'rows': 1300, 'n_estimators_1x2': 25, 'n_estimators_goals': 25}
+    
+    # Paketten yüklenen pencere ve ayarlarla güncelleme devam eder; önbellekteki model değişmez
+    loaded = MLKuponAnalyzer(model_path=bundle_path)
+    loaded.load_models()
+    shared = loaded.model_goals
+    assert len(loaded.feature_window) == 1300 and loaded.training_config.online_estimators == 5
+    assert loaded.update_models(matchday, save=False)['rows'] == 1500
+    assert loaded.model_goals.n_estimators == 30 and shared.n_estimators == 25
+    
+    # Belleğe eşlenmiş yüklemede pencere paketteki dizileri kopyalamaz
+    mapped = MLKuponAnalyzer(model_path=bundle_path)
+    mapped.load_models(mmap_mode='r')
+    assert isinstance(mapped.feature_window.arrays()[0], np.memmap)
+    assert mapped.update_models(matchday, save=False)['rows'] == 1500
+    assert not isinstance(mapped.feature_window.arrays()[0], np.memmap)
+    
+    # Ağaç sınırı aşılınca pencere üzerinde yeniden eğitilir
+    refit = loaded.update_models(matchday[:50], save=False)
+    assert refit == {'mode': 'refit', 'rows': 1500, 'n_estimators_1x2': 20, 'n_estimators_goals': 20}
+    assert len(loaded.feature_window) >= 1500
+    
+    # hist motoru warm_start ile uyumsuz: her güncelleme yeniden eğitimdir
+    hist = MLKuponAnalyzer(model_path=str(tmp_path / "hist.joblib"))
+    hist.train_models(TrainingConfig(num_samples=500, engine_1x2='hist', n_estimators_1x2=20, n_estimators_goals=10))
+    assert hist.update_models(matchday[:20], save=False)['mode'] == 'refit'
+    
+    # Pencere yalnızca son online_window satırın kopyasını tutar
+    window = FeatureWindow(100)
+    window.append(X_big := np.arange(3000.0).reshape(200, 15), np.zeros(200), np.zeros(200))
+    assert len(window) == 100 and not np.shares_memory(window.arrays()[0], X_big)
+    assert (window.arrays()[0] == X_big[100:]).all()
+    
+    # Skor içermeyen veya boş girdiler açık hatayla reddedilir
+    for bad, error in (([], ValueError), ([Fixture.from_dict(matchday[0])], TypeError)):
+        try:
+            hist.update_models(bad, save=False)
+            assert False, bad
+        except error:
+            pass
+    
+    strategy = MLStrategy(TrainingConfig(n_estimators_1x2=10, n_estimators_goals=10, n_jobs=1,
+                                         online_estimators=2, online_max_estimators=20),
+                          window=400, min_train=100, online=True)
+    X, y_1x2, y_goals = analyzer.generate_training_data(300)
+    for start in range(0, 300, 20):
+        strategy.update(None, X[start:start + 20], y_1x2[start:start + 20], y_goals[start:start + 20])
+    assert strategy.analyzer.is_trained and strategy.analyzer.model_goals.n_estimators <= 20
+    print(f"Güncelleme: {result}, yeniden eğitim: {refit}")
+
+def test_hyperparameter_search(tmp_path):
+    """Arama en iyi ayarları TrainingConfig'e yazmalı ve paketin yanına kaydetmeli"""
+    print("\n=== TUNING TEST ===")
+    
+    spaces = {
+        '1x2': {'n_estimators_1x2': ('n_estimators', [10, 20]), 'max_depth_1x2': ('max_depth', [2, 3])},
+        'goals': {'n_estimators_goals': ('n_estimators', [10, 20]), 'max_depth_goals': ('max_depth', [4, 6])},
+    }
+    cache_dir = str(tmp_path / "cache")
+    base = TrainingConfig(num_samples=1500)
+    best, summary = tune_models(config=base, cv=2, factor=2, n_candidates=4, min_resources=375,
+                                n_jobs=2, cache_dir=cache_dir, spaces=spaces)
+    assert best.n_estimators_1x2 in (10, 20) and best.max_depth_goals in (4, 6)
+    assert summary['1x2']['candidates'] == 4 and summary['goals']['iterations'] >= 1
+    assert os.listdir(cache_dir)
+    
+    # Önbellekteki özellikler ve katlarla aynı sonuç
+    again, _ = tune_models(config=base, models=('goals',), cv=2, factor=2, n_candidates=4, min_resources=375,
+                           n_jobs=1, cache_dir=cache_dir, spaces=spaces)
+    assert again.max_depth_goals == best.max_depth_goals
+    
+    model_path = str(tmp_path / "models.joblib")
+    path = save_tuning_result(best, summary, tuning_path(model_path))
+    assert path == str(tmp_path / "models.tuning.json")
+    assert load_tuned_config(path) == best
+    print(f"En iyi ayarlar: {summary}")
+
+def test_multi_output_model(tmp_path):
+    """Çok çıktılı model tüm pazarları tek geçişte aynı sonuç anahtarlarıyla vermeli"""
+    print("\n=== MULTI-OUTPUT MODEL TEST ===")
+    
+    bundle_path = str(tmp_path / "multi.joblib")
+    config = TrainingConfig(num_samples=1500, multi_output=True, n_estimators_multi=30,
+                            online_estimators=5, online_max_estimators=50)
+    analyzer = MLKuponAnalyzer(model_path=bundle_path)
+    analyzer.train_models(config)
+    assert analyzer.model_1x2 is None and analyzer.model_multi.n_outputs_ == 2
+    
+    matches = [
+        {'home_stats': {'attack': 8.5, 'defense': 7.0, 'form': 8.0},
+         'away_stats': {'attack': 4.0, 'defense': 5.5, 'form': 4.0}},
+        {'home_stats': {'attack': 4.0, 'defense': 5.0, 'form': 3.5},
+         'away_stats': {'attack': 9.0, 'defense': 8.5, 'form': 9.0}},
+    ]
+    instrumentation.metrics.reset()
+    predictions = analyzer.predict_matches_batch(matches)
+    stages = instrumentation.metrics.snapshot()['stages']
+    assert any('model="multi"' in key for key in stages) and not any('model="goals"' in key for key in stages)
+    
+    for prediction in predictions:
+        assert prediction['1x2_prediction'] in ('1', 'X', '2')
+        assert prediction['goals_prediction'] in ('Alt 2.5', 'Üst 2.5')
+        assert abs(sum(prediction['1x2_probabilities'].values()) - 100) < 0.2
+        dc = prediction['double_chance_probabilities']
+        assert abs(dc['1X'] - prediction['1x2_probabilities']['1'] - prediction['1x2_probabilities']['X']) < 0.2
+    
+    loaded = MLKuponAnalyzer(model_path=bundle_path)
+    loaded.load_models()
+    assert loaded.predict_matches_batch(matches) == predictions
+    
+    X, y_1x2, y_goals = analyzer.generate_training_data(200, seed=7)
+    assert analyzer.update_models((X, y_1x2, y_goals), save=False)['n_estimators_goals'] == 35
+    print(f"Çok çıktılı tahmin: {predictions[0]['1x2_prediction']} / {predictions[0]['goals_prediction']}")
+
+def test_prediction_service(tmp_path):
+    """Servis eşzamanlı istekleri toplu tahminde birleştirmeli ve tekli tahminle aynı sonucu vermeli"""
+    print("\n=== PREDICTION SERVICE TEST ===")
+    import requests
+    from concurrent.futures import ThreadPoolExecutor
+    
+    batcher = MicroBatcher(lambda items: [item * 2 for item in items], max_wait=0.05)
+    futures = batcher.submit_many(range(10))
+    assert [future.result() for future in futures] == list(range(0, 20, 2)) and batcher.batch_count == 1
+    batcher.close()
+    
+    # Hatalı öğe yalnızca kendi isteğini düşürür
+    batcher = MicroBatcher(lambda items: [10 / item for item in items], max_wait=0.05)
+    futures = batcher.submit_many([1, 0, 2])
+    assert futures[0].result() == 10 and futures[2].result() == 5
+    assert isinstance(futures[1].exception(), ZeroDivisionError)
+    batcher.close()
+    
+    bundle_path = str(tmp_path / "models.joblib")
+    analyzer = MLKuponAnalyzer(model_path=bundle_path)
+    analyzer.train_models(TrainingConfig(num_samples=500, n_estimators_1x2=10, n_estimators_goals=10))
+    
+    rng = np.random.default_rng(4)
+    matches = [
+        {'home_team': f"Ev {i}", 'away_team': f"Deplasman {i}",
+         'home_stats': dict(zip(('attack', 'defense', 'form'), rng.uniform(3, 10, 3).round(2))),
+         'away_stats': dict(zip(('attack', 'defense', 'form'), rng.uniform(3, 10, 3).round(2)))}
+        for i in range(32)
+    ]
+    expected = analyzer.predict_matches_batch(matches)
+    
+    with PredictionServer(bundle_path, max_wait=0.02) as server:
+        url = server.base_url
+        with ThreadPoolExecutor(16) as pool:
+            responses = list(pool.map(lambda match: requests.post(url + 'predict', json=match, timeout=10), matches))
+        assert [response.json() for response in responses] == expected
+        # 32 eşzamanlı istek daha az model çağrısında birleştirilir
+        batch_count = server.service.batcher.batch_count
+        assert batch_count < len(matches)
+        
+        batch = requests.post(url + 'predict/batch', json={'matches': matches[:5]}, timeout=10).json()
+        assert batch['predictions'] == expected[:5]
+        
+        kupon = requests.post(url + 'kupon', json={'matches': matches[:3]}, timeout=10).json()
+        assert kupon == analyzer.analyze_kupon_ml(matches[:3])
+        mvp = requests.post(url + 'kupon', json={'analyzer': 'mvp', 'matches': [
+            {'home_team': 'Galatasaray', 'away_team': 'Besiktas', 'bet_type': '1X2'}]}, timeout=10).json()
+        assert mvp['total_matches'] == 1
+        
+        assert requests.get(url + 'health', timeout=10).json()['model_loaded']
+        assert 'kupon_stage_duration_seconds' in requests.get(url + 'metrics', timeout=10).text
+        assert requests.post(url + 'predict', json={'home_stats': {}}, timeout=10).status_code == 400
+        # Biçimsiz gövdeler sunucu hatası değil 400 döner
+        for path, body in [('predict', [1, 2]), ('predict', "x"), ('predict/batch', {'matches': "ab"}),
+                           ('kupon', {'matches': [1]})]:
+            assert requests.post(url + path, json=body, timeout=10).status_code == 400
+        
+        # Geçerli ve geçersiz istek aynı anda: yalnızca geçersiz olan 400 alır
+        with ThreadPoolExecutor(2) as pool:
+            valid, invalid = pool.map(lambda body: requests.post(url + 'predict', json=body, timeout=10),
+                                      [matches[0], {'home_stats': {}}])
+        assert valid.status_code == 200 and valid.json() == expected[0]
+        assert invalid.status_code == 400
+        assert requests.get(url + 'yok', timeout=10).status_code == 404
+    
+    with PredictionServer(str(tmp_path / "yok.joblib")) as server:
+        assert requests.post(server.base_url + 'predict', json=matches[0], timeout=10).status_code == 503
+    print(f"{len(matches)} eşzamanlı istek için model çağrısı: {batch_count}")
+
+def test_bulk_coupon_analysis(tmp_path):
+    """Toplu analiz tekil maçları bir kez tahmin edip kuponları sırayla döndürmeli"""
+    print("\n=== BULK COUPON TEST ===")
+    
+    bundle_path = str(tmp_path / "models.joblib")
+    analyzer = MLKuponAnalyzer(model_path=bundle_path)
+    analyzer.train_models(TrainingConfig(num_samples=500, n_estimators_1x2=10, n_estimators_goals=10))
+    
+    rng = np.random.default_rng(9)
+    fixtures = [
+        {'home_team': f"Ev {i}", 'away_team': f"Deplasman {i}",
+         'home_stats': dict(zip(('attack', 'defense', 'form'), rng.uniform(3, 10, 3))),
+         'away_stats': dict(zip(('attack', 'defense', 'form'), rng.uniform(3, 10, 3)))}
+        for i in range(40)
+    ]
+    coupons = [[fixtures[i] for i in rng.choice(40, size=rng.integers(1, 6), replace=False)] for _ in range(300)]
+    expected = [analyzer.analyze_kupon_ml(coupon) for coupon in coupons]
+    
+    # Tek süreç: her tekil maç bir kez tahmin edilir
+    with BulkKuponAnalyzer(bundle_path, n_workers=1, block_size=128) as bulk:
+        assert list(bulk.analyze(iter(coupons))) == expected
+        assert bulk.stats['coupons'] == 300 and bulk.stats['unique_fixtures'] == 40
+    
+    # Süreç havuzu: kupon parçaları işçilerde analiz edilir, önbellek süreç başınadır
+    with BulkKuponAnalyzer(bundle_path, n_workers=2, shard_size=8, block_size=128) as bulk:
+        results = bulk.analyze(iter(coupons))
+        assert next(results) == expected[0]
+        assert [expected[0]] + list(results) == expected
+        assert bulk.stats['coupons'] == 300 and 40 <= bulk.stats['unique_fixtures'] <= 80
+        assert bulk.stats['fixtures'] == sum(len(coupon) for coupon in coupons)
+    
+    # Önbellek sınırlıdır; küçük önbellekle de sonuçlar değişmez
+    with BulkKuponAnalyzer(bundle_path, n_workers=1, block_size=16, cache_size=5) as bulk:
+        assert list(bulk.analyze(iter(coupons))) == expected
+        assert len(bulk._predictions) <= 5
+    
+    mvp_coupons = [
+        [{'home_team': 'Galatasaray', 'away_team': 'Besiktas', 'bet_type': '1X2'},
+         {'home_team': 'Fenerbahce', 'away_team': 'Trabzonspor', 'bet_type': 'O/U2.5'}]
+    ] * 50
+    mvp_results = list(analyze_coupons_bulk(mvp_coupons, analyzer='mvp', n_workers=1))
+    assert mvp_results == [KuponAnalyzer().analyze_kupon(mvp_coupons[0])] * 50
+    print(f"{bulk.stats['fixtures']} maç, {bulk.stats['unique_fixtures']} tekil tahmin")
+
+def test_fixture_data_structures():
+    """Fixture / FixtureBatch sözlüklerle aynı özellikleri ve analizleri üretmeli"""
+    print("\n=== FIXTURE STRUCTURES TEST ===")
+    
+    matches = [
+        {'home_team': 'Galatasaray', 'away_team': 'Besiktas', 'bet_type': '1X2',
+         'home_stats': {'attack': 8.5, 'defense': 7.0, 'form': 8.0},
+         'away_stats': {'attack': 7.0, 'defense': 6.5, 'form': 6.0}},
+        {'home_team': 'Fenerbahce', 'away_team': 'Trabzonspor', 'bet_type': 'O/U2.5',
+         'home_stats': {'attack': 4.0, 'defense': 5.0, 'form': 3.5},
+         'away_stats': {'attack': 9.0, 'defense': 8.5, 'form': 9.0},
+         'additional_data': {'h2h_home_wins': 2, 'h2h_away_wins': 5, 'total_h2h': 10}},
+    ]
+    fixtures = [Fixture.from_dict(match) for match in matches]
+    batch = FixtureBatch.from_fixtures(fixtures)
+    assert len(batch) == 2 and batch[1] == fixtures[1]
+    assert fixtures[0]['home_stats']['attack'] == 8.5 and fixtures[1].get('bet_type') == 'O/U2.5'
+    assert not hasattr(fixtures[0], '__dict__')
+    
+    analyzer = MLKuponAnalyzer()
+    analyzer.train_models(TrainingConfig(num_samples=500, n_estimators_1x2=10, n_estimators_goals=10), save=False)
+    X = analyzer.create_features_batch(matches)
+    assert np.allclose(analyzer.create_features_batch(batch), X)
+    assert np.allclose(analyzer.create_features_batch(fixtures), X)
+    assert np.allclose(FixtureBatch.from_arrow(batch.to_arrow()).features(), X)
+    assert np.allclose(analyzer.create_features_batch([fixture.to_dict() for fixture in fixtures]), X)
+    
+    expected = analyzer.analyze_kupon_ml(matches)
+    assert analyzer.analyze_kupon_ml(batch) == expected
+    assert analyzer.analyze_kupon_ml(fixtures, analyzer.predict_batch(batch)) == expected
+    
+    # İstatistiği olmayan maç ML yolunda reddedilir, NaN olarak modele gitmez
+    for missing in ([{'home_team': 'A', 'away_team': 'B'}], [Fixture('A', 'B')],
+                    FixtureBatch(['A'], ['B'])):
+        try:
+            analyzer.analyze_kupon_ml(missing)
+            assert False, "eksik istatistik kabul edildi"
+        except ValueError:
+            pass
+    
+    mvp = KuponAnalyzer()
+    assert mvp.analyze_kupon(batch) == mvp.analyze_kupon(matches)
+    api_matches = [{'home_team': match['home_team'], 'away_team': match['away_team']} for match in matches]
+    with StubSportsAPI() as api:
+        enhanced = EnhancedKuponAnalyzer(data_collector=SportsDataCollector(base_url=api.base_url))
+        assert enhanced.analyze_kupon(FixtureBatch.from_fixtures(api_matches)) == enhanced.analyze_kupon(api_matches)
+    print(f"Kupon güveni: %{expected['kupon_confidence']}")
+
+def test_team_strength_index():
+    """İndeks tabanlı analiz eski formülle aynı sonucu vermeli ve artımlı güncellenmeli"""
+    print("\n=== TEAM INDEX TEST ===")
+    import pickle
+    
+    analyzer = KuponAnalyzer()
+    stats = analyzer.team_stats['Galatasaray']
+    assert analyzer.calculate_team_strength('Galatasaray', is_home=True) == \
+        (stats['attack'] + stats['defense'] + stats['form']) / 3 * stats['home_advantage']
+    assert analyzer.calculate_team_strength('Bilinmeyen', is_home=True) == 5.0
+    
+    # Tek takım değişince yalnızca onun satırı / sütunu yenilenir, tam yeniden kurulumla aynı olmalı
+    analyzer.update_team('Besiktas', {'attack': 9.5, 'defense': 8.0, 'form': 9.0, 'home_advantage': 1.15})
+    for i in range(20):
+        analyzer.update_team(f"Takım {i}", {'attack': 4 + i % 5, 'defense': 6.0, 'form': 5.5, 'home_advantage': 1.05})
+    # İkinci lig ayrı (ve küçük) bir matris kullanır
+    for i in range(3):
+        analyzer.update_team(f"Lig2 {i}", {'attack': 6 + i, 'defense': 7.0, 'form': 6.0, 'home_advantage': 1.1}, 'Lig 2')
+    names, diff = analyzer.strength_matrix()
+    rebuilt_names, rebuilt = TeamStrengthIndex(
+        {team: analyzer.team_stats[team] for team in names}).strength_matrix()
+    assert names == rebuilt_names and diff.shape == (24, 24) and np.array_equal(diff, rebuilt)
+    assert analyzer.strength_matrix('Lig 2')[1].shape == (3, 3)
+    
+    # Lig değişikliği eski ligin matrisinden takımı çıkarır
+    analyzer.update_team('Takım 0', analyzer.team_stats['Takım 0'], 'Lig 2')
+    assert analyzer.strength_matrix()[1].shape == (23, 23) and analyzer.strength_matrix('Lig 2')[1].shape == (4, 4)
+    
+    # Yerinde değişiklik refresh_index ile indekse yansır
+    analyzer.team_stats['Trabzonspor']['attack'] = 9.0
+    analyzer.refresh_index()
+    assert analyzer.analyze_match('Galatasaray', 'Trabzonspor', 'O/U2.5')['prediction'] == 'Üst 2.5'
+    
+    teams = ['Galatasaray', 'Besiktas', 'Trabzonspor', 'Takım 0', 'Lig2 1', 'Bilinmeyen']
+    matches = [
+        {'home_team': home, 'away_team': away, 'bet_type': bet_type}
+        for home in teams for away in teams if home != away for bet_type in ('1X2', 'O/U2.5')
+    ]
+    round_results = analyzer.analyze_round(matches)
+    assert round_results == [analyzer.analyze_match(m['home_team'], m['away_team'], m['bet_type']) for m in matches]
+    
+    # Eski formülle (her çağrıda yeniden hesaplama) aynı sonuç
+    def strength(team, is_home):
+        if team not in analyzer.team_stats:
+            return 5.0
+        values = analyzer.team_stats[team]
+        total = (values['attack'] + values['defense'] + values['form']) / 3
+        return total * values['home_advantage'] if is_home else total
+    for match, result in zip(matches, round_results):
+        assert result['home_strength'] == round(strength(match['home_team'], True), 2)
+        assert result['away_strength'] == round(strength(match['away_team'], False), 2)
+    
+    result = analyzer.analyze_match('Besiktas', 'Trabzonspor')
+    assert result['prediction'] == '1' and result['home_strength'] == round(26.5 / 3 * 1.15, 2)
+    assert analyzer.analyze_kupon(matches)['matches'] == round_results
+    
+    # Analizci süreç havuzlarına gönderilebilmeli
+    restored = pickle.loads(pickle.dumps(analyzer))
+    assert restored.analyze_round(matches) == round_results
+    print(f"{len(names)} takım, Besiktas - Trabzonspor farkı: {diff[names.index('Besiktas'), names.index('Trabzonspor')]:.2f}")
+
 if __name__ == "__main__":
     # Tüm testleri çalıştır
     test_mvp()
     test_api_integration()
     test_ml_algorithm()
+    test_ml_batch_prediction()
+    test_training_data_generator()
+    test_training_config()
+    test_http_cache_and_retry()
+    test_async_kupon_fetch()
+    test_rating_engine()
+    test_benchmarks()
+    test_system_kupon_engine()
+    test_kupon_optimizer()
+    test_value_scanner()
+    test_monte_carlo_simulator()
+    test_fixture_data_structures()
+    test_team_strength_index()
     
     print("\n=== TESTLER TAMAMLANDI ===")
\ No newline at end of file
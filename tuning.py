@@ -0,0 +1,161 @@
+# tuning.py
+"""1X2 ve gol modelleri için hiperparametre araması
+
+Arama successive halving (HalvingRandomSearchCV) ile yapılır: adaylar önce
+az örnekle değerlendirilir, yalnızca iyi olanlar daha fazla veriyle devam
+eder. Çapraz doğrulama katları süreçlere dağıtılır. Özellik matrisi ve kat
+bölmeleri joblib.Memory ile diske önbelleğe alınır; aynı veriyle tekrarlanan
+aramalar bunları yeniden üretmez. En iyi ayarlar model paketinin yanına JSON
+olarak kaydedilir ve train_models'e TrainingConfig olarak verilebilir.
+
+Kullanım:
+    python tuning.py --data training_features.parquet --train
+"""
+import argparse
+import json
+import os
+from dataclasses import asdict, fields, replace
+from datetime import datetime
+
+import numpy as np
+from joblib import Memory
+from scipy.stats import loguniform, randint
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import HalvingRandomSearchCV, StratifiedKFold
+
+from ml_algorithm import (DEFAULT_BUNDLE_PATH, MLKuponAnalyzer, TrainingConfig,
+                          build_model_1x2, build_model_goals)
+
+DEFAULT_CACHE_DIR = '.kupon_cache'
+
+# Model -> (TrainingConfig alanı -> (tahminci parametresi, dağılım))
+SEARCH_SPACES = {
+    '1x2': {
+        'n_estimators_1x2': ('n_estimators', randint(50, 400)),
+        'max_depth_1x2': ('max_depth', randint(2, 9)),
+        'learning_rate_1x2': ('learning_rate', loguniform(0.01, 0.3)),
+    },
+    'goals': {
+        'n_estimators_goals': ('n_estimators', randint(50, 400)),
+        'max_depth_goals': ('max_depth', randint(3, 17)),
+    },
+}
+
+def tuning_path(model_path=DEFAULT_BUNDLE_PATH):
+    """Model paketinin yanındaki arama sonucu dosyası"""
+    return f"{os.path.splitext(model_path)[0]}.tuning.json"
+
+def _load_features(source, mtime_ns, num_samples, seed):
+    """Özellik matrisi: Parquet dosyasından veya sentetik üretimle (mtime önbellek anahtarıdır)"""
+    if source is None:
+        return MLKuponAnalyzer().generate_training_data(num_samples, seed=seed)
+    from ingest import load_feature_matrix
+    return load_feature_matrix(source, mmap=False)
+
+def _fold_indices(y, n_splits, seed):
+    """Tabakalı katların (eğitim, doğrulama) indeksleri"""
+    splitter = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed)
+    return list(splitter.split(np.zeros(len(y)), y))
+
+def _search_estimator(model, config, space):
+    """Aranacak tahminci, parametre dağılımları ve parametre -> TrainingConfig alanı eşlemesi
+
+    Ağaç modelleri ölçekten bağımsız olduğundan aramada StandardScaler atlanır.
+    hist motorunda ağaç sayısı max_iter parametresidir.
+    """
+    # Paralellik katlar arasındadır; tek model tek çekirdek kullanır
+    config = replace(config, n_jobs=1)
+    estimator = build_model_1x2(config) if model == '1x2' else build_model_goals(config)
+    distributions = {}
+    names = {}
+    for field, (param, distribution) in space.items():
+        if param == 'n_estimators' and not hasattr(estimator, 'n_estimators'):
+            param = 'max_iter'
+        distributions[param] = distribution
+        names[param] = field
+    return estimator, distributions, names
+
+def tune_models(data=None, config=None, models=('1x2', 'goals'), cv=5, factor=3,
+                n_candidates='exhaust', min_resources=200, scoring='neg_log_loss', n_jobs=-1,
+                cache_dir=DEFAULT_CACHE_DIR, spaces=SEARCH_SPACES, verbose=0):
+    """Modelleri arayıp en iyi ayarlarla güncellenmiş TrainingConfig ve özet döndür
+
+    data: None (config.num_samples kadar sentetik veri) veya ingest_matches ile
+    yazılmış Parquet dosyasının yolu. min_resources ilk turdaki örnek sayısıdır;
+    çok küçük alt örneklerde bazı sınıflar hiç görülmez. spaces, SEARCH_SPACES
+    biçiminde (dağılım yerine değer listesi de olabilir). cache_dir=None önbelleği kapatır.
+    """
+    config = config or TrainingConfig()
+    memory = Memory(cache_dir, verbose=0)
+    mtime_ns = os.stat(data).st_mtime_ns if data is not None else None
+    X, y_1x2, y_goals = memory.cache(_load_features)(
+        os.path.abspath(data) if data is not None else None, mtime_ns,
+        config.num_samples, config.random_state
+    )
+
+    best_config = config
+    summary = {}
+    for model in models:
+        y = y_1x2 if model == '1x2' else y_goals
+        folds = memory.cache(_fold_indices)(y, cv, config.random_state)
+        estimator, distributions, names = _search_estimator(model, config, spaces[model])
+
+        print(f"{model} modeli aranıyor ({len(X)} örnek, {cv} kat)...")
+        search = HalvingRandomSearchCV(
+            estimator, distributions, n_candidates=n_candidates, factor=factor, min_resources=min_resources,
+            cv=folds, scoring=scoring, n_jobs=n_jobs, random_state=config.random_state,
+            refit=False, verbose=verbose
+        )
+        search.fit(X, y)
+
+        # numpy sayıları JSON'a yazılabilsin diye Python tiplerine çevrilir
+        params = {names[param]: np.asarray(value).item() for param, value in search.best_params_.items()}
+        best_config = replace(best_config, **params)
+        summary[model] = {
+            'best_params': params,
+            'best_score': round(float(search.best_score_), 4),
+            'candidates': int(search.n_candidates_[0]),
+            'iterations': int(search.n_iterations_)
+        }
+        print(f"{model}: {params} ({scoring} {search.best_score_:.4f})")
+
+    return best_config, summary
+
+def save_tuning_result(config, summary, path):
+    """En iyi ayarları ve arama özetini JSON olarak kaydet"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'training_config': asdict(config),
+            'search': summary,
+            'created_at': datetime.now().isoformat()
+        }, f, indent=2, ensure_ascii=False)
+    return path
+
+def load_tuned_config(path):
+    """Kaydedilmiş arama sonucundan TrainingConfig oluştur (bilinmeyen alanlar atlanır)"""
+    with open(path, encoding='utf-8') as f:
+        saved = json.load(f)['training_config']
+    known = {field.name for field in fields(TrainingConfig)}
+    return TrainingConfig(**{key: value for key, value in saved.items() if key in known})
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Model hiperparametre araması")
+    parser.add_argument('--data', help="ingest.py ile üretilmiş Parquet özellik dosyası (yoksa sentetik)")
+    parser.add_argument('--num-samples', type=int, default=TrainingConfig.num_samples)
+    parser.add_argument('--engine', choices=['gbm', 'hist'], default='gbm')
+    parser.add_argument('--models', nargs='+', choices=list(SEARCH_SPACES), default=list(SEARCH_SPACES))
+    parser.add_argument('--cv', type=int, default=5)
+    parser.add_argument('--factor', type=int, default=3)
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--model-path', default=DEFAULT_BUNDLE_PATH)
+    parser.add_argument('--train', action='store_true', help="En iyi ayarlarla eğitip paketi kaydet")
+    args = parser.parse_args()
+
+    base = TrainingConfig(num_samples=args.num_samples, engine_1x2=args.engine)
+    best, summary = tune_models(args.data, base, args.models, args.cv, args.factor,
+                                n_jobs=args.n_jobs, cache_dir=args.cache_dir)
+    print(f"Arama sonucu kaydedildi: {save_tuning_result(best, summary, tuning_path(args.model_path))}")
+
+    if args.train:
+        MLKuponAnalyzer(model_path=args.model_path).train_models(best, data=args.data)
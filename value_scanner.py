@@ -0,0 +1,81 @@
+# value_scanner.py
+"""Tüm program için vektörel value bet taraması
+
+Bahisçi marjı her pazar grubunda (1X2 ve Alt/Üst 2.5) oranlardan çıkarılan
+olasılıklar normalize edilerek kaldırılır, ardından model olasılıklarıyla
+karşılaştırılır. Tüm hesaplar (maç, pazar) dizileri üzerinde yapılır.
+"""
+import numpy as np
+import pandas as pd
+
+MARKET_LABELS = ['1', 'X', '2', 'Üst 2.5', 'Alt 2.5']
+ODDS_COLUMNS = ['odds_1', 'odds_x', 'odds_2', 'odds_over', 'odds_under']
+PROB_COLUMNS = ['prob_1', 'prob_x', 'prob_2', 'prob_over', 'prob_under']
+# Marjın ayrı ayrı kaldırıldığı pazar grupları (sütun dilimleri)
+MARKET_GROUPS = [slice(0, 3), slice(3, 5)]
+
+def remove_margin(odds):
+    """(N, k) oran grubundan marjsız olasılıkları ve marjı döndür"""
+    implied = 1.0 / odds
+    overround = implied.sum(axis=1, keepdims=True)
+    return implied / overround, overround[:, 0] - 1
+
+def fixtures_to_table(fixtures):
+    """optimize_kupon ile aynı formattaki maç listesini tarama tablosuna çevir"""
+    rows = []
+    for fixture in fixtures:
+        p_1x2 = fixture['prediction']['1x2_probabilities']
+        p_goals = fixture['prediction']['goals_probabilities']
+        odds = fixture['odds']
+        rows.append((
+            fixture['home_team'], fixture['away_team'], fixture.get('league', ''),
+            odds.get('1', np.nan), odds.get('X', np.nan), odds.get('2', np.nan),
+            odds.get('over_2_5', np.nan), odds.get('under_2_5', np.nan),
+            p_1x2['1'] / 100, p_1x2['X'] / 100, p_1x2['2'] / 100,
+            p_goals['Üst 2.5'] / 100, p_goals['Alt 2.5'] / 100
+        ))
+    return pd.DataFrame(rows, columns=['home_team', 'away_team', 'league'] + ODDS_COLUMNS + PROB_COLUMNS)
+
+def scan_value_bets(table, min_edge=0.0, min_odds=1.01, sort_by='expected_value', top=None):
+    """Model olasılığı marjsız olasılığı aşan tüm (maç, pazar) satırlarını sıralı döndür
+
+    table: ODDS_COLUMNS ve PROB_COLUMNS (0-1 arası) sütunlarını içeren DataFrame.
+    Eksik oranlar (NaN) taramaya girmez.
+    """
+    odds = table[ODDS_COLUMNS].to_numpy(dtype=float)
+    model_probs = table[PROB_COLUMNS].to_numpy(dtype=float)
+
+    fair_probs = np.empty_like(odds)
+    margins = np.empty_like(odds)
+    for group in MARKET_GROUPS:
+        fair, margin = remove_margin(odds[:, group])
+        fair_probs[:, group] = fair
+        margins[:, group] = margin[:, np.newaxis]
+
+    edge = model_probs - fair_probs
+    expected_value = model_probs * odds - 1
+
+    with np.errstate(invalid='ignore'):
+        mask = np.isfinite(edge) & (edge > min_edge) & (odds >= min_odds)
+    rows, cols = np.nonzero(mask)
+
+    key = {'expected_value': expected_value, 'edge': edge}[sort_by][rows, cols]
+    order = np.argsort(-key, kind='stable')
+    if top is not None:
+        order = order[:top]
+    rows, cols = rows[order], cols[order]
+
+    result = pd.DataFrame({
+        'home_team': table['home_team'].to_numpy()[rows],
+        'away_team': table['away_team'].to_numpy()[rows],
+        'market': np.asarray(MARKET_LABELS, dtype=object)[cols],
+        'odds': odds[rows, cols],
+        'fair_probability': fair_probs[rows, cols],
+        'model_probability': model_probs[rows, cols],
+        'edge': edge[rows, cols],
+        'expected_value': expected_value[rows, cols],
+        'margin': margins[rows, cols]
+    })
+    if 'league' in table.columns:
+        result.insert(2, 'league', table['league'].to_numpy()[rows])
+    return result